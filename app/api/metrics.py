@@ -15,6 +15,7 @@ def metrics(request: Request) -> dict[str, object]:
     nodes_total = len(repository.list_nodes())
     nodes_enabled = len(repository.list_enabled_nodes())
     probe_results_total = repository.count_probe_results()
+    write_stats = getattr(repository, 'write_stats', None)
 
     return {
         'service': app_state.service_name,
@@ -26,10 +27,29 @@ def metrics(request: Request) -> dict[str, object]:
         'nodes_total': nodes_total,
         'nodes_enabled': nodes_enabled,
         'probe_results_total': probe_results_total,
+        'storage_writes': None if write_stats is None else write_stats(),
         'scheduler': {
             'successful_cycles': scheduler.successful_cycles,
             'failed_cycles': scheduler.failed_cycles,
             'consecutive_failures': scheduler.consecutive_failures,
             'last_cycle_duration_ms': scheduler.last_cycle_duration_ms,
+            'last_cycle_partial': scheduler.last_cycle_partial,
+            'partial_cycles': scheduler.partial_cycles,
+            'deadline_exceeded_probes': scheduler.deadline_exceeded_probes,
+            'dispatched_batches': scheduler.dispatched_batches,
+            'failed_batches': scheduler.failed_batches,
+            'last_batch_duration_ms': scheduler.last_batch_duration_ms,
         },
+        'retention': app_state.retention_pruner.stats(),
+        'rate_limit': app_state.probe_rate_limiter.stats(),
+        'dns_cache': (
+            {'enabled': False}
+            if app_state.dns_cache is None
+            else app_state.dns_cache.stats()
+        ),
+        'probe_timeouts': (
+            {'mode': 'fixed', 'timeout_s': app_state.probe_timeout_s}
+            if app_state.probe_timeouts is None
+            else app_state.probe_timeouts.stats()
+        ),
     }
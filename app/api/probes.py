@@ -1,17 +1,62 @@
-from datetime import datetime
+import asyncio
+import base64
+import binascii
+import ssl
+from concurrent.futures import Executor
+from datetime import UTC, datetime, timedelta
+from typing import Literal
 
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 from app.domain.models import (
     ProbeResult,
+    ProbeResultsGroupSummary,
+    ProbeResultsSeries,
     ProbeResultsSummary,
     ProbeRunRequest,
     ProbeRunResponse,
     RegisteredNode,
 )
+from app.services.probe_engine import (
+    DEFAULT_PROBE_CONCURRENCY,
+    ShardProbeSettings,
+    in_target_order,
+    probe_shard,
+    run_bulk_probes,
+    run_probes,
+    split_by_probe_type,
+)
 
 router = APIRouter(tags=['probes'])
 
+SERIES_MAX_BUCKETS = 10_000
+RESULTS_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def _encode_cursor(key: tuple[datetime, int]) -> str:
+    checked_at, result_id = key
+    checked_at_us = (_as_utc(checked_at) - EPOCH) // timedelta(microseconds=1)
+    token = f'{checked_at_us}:{result_id}'.encode()
+    return base64.urlsafe_b64encode(token).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        token = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        checked_at_us, result_id = (int(part) for part in token.split(':'))
+        if not 0 <= result_id < 2**63:
+            raise ValueError(f'cursor id out of range: {result_id}')
+        checked_at = EPOCH + timedelta(microseconds=checked_at_us)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError) as exc:
+        raise HTTPException(status_code=422, detail='Invalid cursor') from exc
+    return checked_at, result_id
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
 
 def _resolve_targets(repository, node_id: str | None) -> list[RegisteredNode]:
     if node_id is None:
@@ -23,47 +68,225 @@ def _resolve_targets(repository, node_id: str | None) -> list[RegisteredNode]:
     return [node]
 
 
-def run_probe_cycle(app, node_id: str | None) -> list[ProbeResult]:
+async def run_probe_cycle(app, node_id: str | None) -> list[ProbeResult]:
     repository = app.state.repository
+    targets = await asyncio.to_thread(_resolve_targets, repository, node_id)
+    return await probe_targets(app, targets, skip_open_breakers=node_id is None)
+
+
+def _apply_breaker(app, targets: list[RegisteredNode]) -> list[RegisteredNode]:
+    breaker = getattr(app.state, 'circuit_breaker', None)
+    if breaker is None:
+        return targets
+    return breaker.allowed(targets)
+
+
+async def probe_targets(
+    app,
+    targets: list[RegisteredNode],
+    skip_open_breakers: bool = False,
+) -> list[ProbeResult]:
+    """Probe the given nodes and record their results.
+
+    Scheduled work passes `skip_open_breakers` so nodes in circuit-breaker
+    backoff are left out; explicit runs probe every target they name.
+    """
+    if skip_open_breakers:
+        targets = _apply_breaker(app, targets)
+    probe_timeouts = getattr(app.state, 'probe_timeouts', None)
+    if probe_timeouts is not None:
+        await asyncio.to_thread(probe_timeouts.warm, targets)
+
+    tcp_targets, udp_targets, http_targets = split_by_probe_type(targets)
+    if udp_targets or http_targets:
+        outcomes = await asyncio.gather(
+            _probe_tcp_targets(app, tcp_targets),
+            _probe_udp_targets(app, udp_targets),
+            _probe_http_targets(app, http_targets),
+        )
+        results = in_target_order(targets, [result for group in outcomes for result in group])
+    else:
+        results = await _probe_tcp_targets(app, tcp_targets)
+    await _record_results(app, results)
+    return results
+
+
+async def _probe_udp_targets(app, targets: list[RegisteredNode]) -> list[ProbeResult]:
+    if not targets:
+        return []
+    return await run_bulk_probes(
+        targets,
+        app.state.probe_udp_nodes,
+        retry_count=getattr(app.state, 'probe_retry_count', 0),
+        deadline_s=getattr(app.state, 'cycle_deadline_s', None),
+        rate_limiter=getattr(app.state, 'probe_rate_limiter', None),
+    )
+
+
+async def _probe_http_targets(app, targets: list[RegisteredNode]) -> list[ProbeResult]:
+    if not targets:
+        return []
+    return await run_probes(
+        targets,
+        app.state.probe_http_node,
+        retry_count=getattr(app.state, 'probe_retry_count', 0),
+        concurrency=getattr(app.state, 'probe_concurrency', DEFAULT_PROBE_CONCURRENCY),
+        rate_limiter=getattr(app.state, 'probe_rate_limiter', None),
+        deadline_s=getattr(app.state, 'cycle_deadline_s', None),
+        slots=getattr(app.state, 'probe_slots', None),
+    )
+
+
+async def _probe_tcp_targets(app, targets: list[RegisteredNode]) -> list[ProbeResult]:
+    if not targets:
+        return []
     probe_node = app.state.probe_node
+    probe_nodes = getattr(app.state, 'probe_nodes', None)
     retry_count = getattr(app.state, 'probe_retry_count', 0)
-    targets = _resolve_targets(repository, node_id)
+    concurrency = getattr(app.state, 'probe_concurrency', DEFAULT_PROBE_CONCURRENCY)
+    deadline_s = getattr(app.state, 'cycle_deadline_s', None)
+
+    if probe_nodes is not None:
+        return await run_bulk_probes(
+            targets,
+            probe_nodes,
+            retry_count=retry_count,
+            deadline_s=deadline_s,
+            rate_limiter=getattr(app.state, 'probe_rate_limiter', None),
+        )
+    return await run_probes(
+        targets,
+        probe_node,
+        retry_count=retry_count,
+        concurrency=concurrency,
+        rate_limiter=getattr(app.state, 'probe_rate_limiter', None),
+        deadline_s=deadline_s,
+        burst_size=getattr(app.state, 'probe_burst_size', 1),
+        burst_spacing_s=getattr(app.state, 'probe_burst_spacing_s', 0.02),
+        slots=getattr(app.state, 'probe_slots', None),
+    )
+
+
+async def run_sharded_probe_cycle(
+    app,
+    executor: Executor,
+    shard_count: int,
+) -> tuple[list[ProbeResult], list[dict[str, object]]]:
+    """Probe all enabled nodes split into shards, one worker call per shard.
+
+    Shards always use the built-in probers because custom `probe_node`
+    callables cannot cross a process boundary; every other probe setting,
+    including adaptive per-node timeouts, is passed to the workers. The
+    concurrency limit is divided between the shards so the cycle as a whole
+    stays within it. Results are merged and stored together once every shard
+    has finished.
+    """
+    repository = app.state.repository
+    targets = await asyncio.to_thread(_resolve_targets, repository, None)
+    targets = _apply_breaker(app, targets)
+    probe_timeouts = getattr(app.state, 'probe_timeouts', None)
+    if probe_timeouts is not None:
+        await asyncio.to_thread(probe_timeouts.warm, targets)
+    shards = [targets[index::shard_count] for index in range(shard_count)]
+    shards = [shard for shard in shards if shard]
+    concurrency = getattr(app.state, 'probe_concurrency', DEFAULT_PROBE_CONCURRENCY)
+    dns_cache = getattr(app.state, 'dns_cache', None)
+    tls_context = getattr(app.state, 'probe_tls_context', None)
+    http_prober = getattr(app.state, 'http_prober', None)
+    loop = asyncio.get_running_loop()
+    outcomes = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                executor,
+                probe_shard,
+                shard,
+                ShardProbeSettings(
+                    timeout_s=app.state.probe_timeout_s,
+                    retry_count=getattr(app.state, 'probe_retry_count', 0),
+                    concurrency=max(1, concurrency // max(1, len(shards))),
+                    mode=getattr(app.state, 'probe_mode', 'async'),
+                    deadline_s=getattr(app.state, 'cycle_deadline_s', None),
+                    node_timeouts=(
+                        None if probe_timeouts is None else probe_timeouts.snapshot(shard)
+                    ),
+                    dns_cache_ttl_s=0.0 if dns_cache is None else dns_cache.ttl_s,
+                    include_dns=getattr(app.state, 'probe_include_dns', False),
+                    burst_size=getattr(app.state, 'probe_burst_size', 1),
+                    burst_spacing_s=getattr(app.state, 'probe_burst_spacing_s', 0.02),
+                    phases=getattr(app.state, 'probe_phases', False),
+                    tls=tls_context is not None,
+                    tls_verify=tls_context is None or tls_context.verify_mode != ssl.CERT_NONE,
+                    http_verify_tls=True if http_prober is None else http_prober.verify_tls,
+                ),
+            )
+            for shard in shards
+        )
+    )
 
     results: list[ProbeResult] = []
-    for node in targets:
-        attempt = 0
-        while True:
-            result = probe_node(node)
-            if result.status == 'up' or attempt >= retry_count:
-                break
-            attempt += 1
-        repository.add_probe_result(result)
-        results.append(result)
-    return results
+    timings: list[dict[str, object]] = []
+    for index, (shard_results, duration_ms) in enumerate(outcomes):
+        results.extend(shard_results)
+        timings.append({'shard': index, 'nodes': len(shard_results), 'duration_ms': duration_ms})
+    await _record_results(app, results)
+    return results, timings
+
+
+async def _record_results(app, results: list[ProbeResult]) -> None:
+    repository = app.state.repository
+    probe_timeouts = getattr(app.state, 'probe_timeouts', None)
+    if probe_timeouts is not None:
+        probe_timeouts.observe(results)
+    await asyncio.to_thread(repository.add_probe_results, results)
+    breaker = getattr(app.state, 'circuit_breaker', None)
+    if breaker is not None:
+        changed = breaker.record(results)
+        if changed:
+            await asyncio.to_thread(repository.save_breaker_states, changed)
 
 
 @router.post('/probes/run', response_model=ProbeRunResponse)
-def run_probe(request: Request, payload: ProbeRunRequest | None = None) -> ProbeRunResponse:
+async def run_probe(
+    request: Request,
+    payload: ProbeRunRequest | None = None,
+) -> ProbeRunResponse:
     node_id = None if payload is None else payload.node_id
-    results = run_probe_cycle(request.app, node_id)
+    results = await run_probe_cycle(request.app, node_id)
     return ProbeRunResponse(results=results)
 
 
 @router.get('/results', response_model=list[ProbeResult])
 def list_results(
     request: Request,
+    response: Response,
     node_id: str | None = Query(default=None),
     limit: int | None = Query(default=None, ge=1, le=1000),
     from_: datetime | None = Query(default=None, alias='from'),
     to: datetime | None = Query(default=None),
+    cursor: str | None = Query(default=None),
 ) -> list[ProbeResult]:
+    """Results newest first.
+
+    With `limit` or `cursor` the response is one page; when more results
+    follow, the `X-Next-Cursor` header holds the cursor for the next page.
+    """
     repository = request.app.state.repository
-    return repository.list_probe_results(
+    if limit is None and cursor is None:
+        return repository.list_probe_results(
+            node_id=node_id,
+            checked_from=from_,
+            checked_to=to,
+        )
+    results, next_key = repository.page_probe_results(
         node_id=node_id,
-        limit=limit,
+        limit=limit or RESULTS_PAGE_SIZE,
         checked_from=from_,
         checked_to=to,
+        before=None if cursor is None else _decode_cursor(cursor),
     )
+    if next_key is not None:
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(next_key)
+    return results
 
 
 @router.get('/results/summary', response_model=ProbeResultsSummary)
@@ -79,3 +302,55 @@ def summarize_results(
         checked_from=from_,
         checked_to=to,
     )
+
+
+@router.get('/results/summaries', response_model=list[ProbeResultsGroupSummary])
+def summarize_results_grouped(
+    request: Request,
+    node_id: list[str] | None = Query(default=None),
+    from_: datetime | None = Query(default=None, alias='from'),
+    to: datetime | None = Query(default=None),
+    group_by: Literal['node', 'region'] = Query(default='node'),
+) -> list[ProbeResultsGroupSummary]:
+    """Summaries for every node, or the repeated `node_id`s, from one grouped read."""
+    repository = request.app.state.repository
+    return repository.summarize_probe_results_grouped(
+        node_ids=node_id,
+        checked_from=from_,
+        checked_to=to,
+        group_by=group_by,
+    )
+
+
+@router.get('/results/series', response_model=ProbeResultsSeries)
+def results_series(
+    request: Request,
+    node_id: str = Query(),
+    from_: datetime = Query(alias='from'),
+    to: datetime = Query(),
+    bucket_s: int = Query(default=60, ge=1, le=86400),
+) -> ProbeResultsSeries:
+    """Per-bucket counts, availability and latency for one node.
+
+    Buckets are aligned to the Unix epoch and only non-empty ones are
+    returned, so the response grows with the number of buckets, not rows.
+    """
+    from_, to = _as_utc(from_), _as_utc(to)
+    if to <= from_:
+        raise HTTPException(status_code=422, detail="'to' must be after 'from'")
+    if (to - from_).total_seconds() / bucket_s > SERIES_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=422,
+            detail=f'Range spans more than {SERIES_MAX_BUCKETS} buckets',
+        )
+    repository = request.app.state.repository
+    return ProbeResultsSeries(
+        node_id=node_id,
+        bucket_s=bucket_s,
+        buckets=repository.bucket_probe_results(
+            node_id=node_id,
+            checked_from=from_,
+            checked_to=to,
+            bucket_s=bucket_s,
+        ),
+    )
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Request
 
+from app.domain.models import BreakerState
+
 router = APIRouter(tags=['scheduler'])
 
 
@@ -9,12 +11,26 @@ def scheduler_status(request: Request) -> dict[str, object]:
     return {
         'running': scheduler.running,
         'interval_s': scheduler.interval_s,
+        'dispatch_mode': scheduler.dispatch_mode,
+        'scheduled_nodes': scheduler.scheduled_nodes,
+        'dispatch': scheduler.dispatch_stats(),
         'last_run': None if scheduler.last_run is None else scheduler.last_run.isoformat(),
         'last_error': scheduler.last_error,
         'last_cycle_duration_ms': scheduler.last_cycle_duration_ms,
         'successful_cycles': scheduler.successful_cycles,
         'failed_cycles': scheduler.failed_cycles,
         'consecutive_failures': scheduler.consecutive_failures,
+        'cycle_deadline_s': request.app.state.cycle_deadline_s,
+        'last_cycle_partial': scheduler.last_cycle_partial,
+        'partial_cycles': scheduler.partial_cycles,
+        'deadline_exceeded_probes': scheduler.deadline_exceeded_probes,
+        'dispatched_batches': scheduler.dispatched_batches,
+        'failed_batches': scheduler.failed_batches,
+        'last_batch_duration_ms': scheduler.last_batch_duration_ms,
+        'probe_concurrency': scheduler.concurrency_stats(),
+        'breakers': scheduler.breaker_stats(),
+        'probe_shards': scheduler.shard_count,
+        'shard_timings': scheduler.last_shard_timings,
     }
 
 
@@ -23,3 +39,11 @@ async def scheduler_run_once(request: Request) -> dict[str, object]:
     scheduler = request.app.state.scheduler
     count = await scheduler.run_once()
     return {'results_count': count}
+
+
+@router.get('/scheduler/breakers', response_model=list[BreakerState])
+def scheduler_breakers(request: Request) -> list[BreakerState]:
+    breaker = getattr(request.app.state, 'circuit_breaker', None)
+    if breaker is None:
+        return []
+    return breaker.states()
@@ -12,6 +12,9 @@ class Node(BaseModel):
     port: int = Field(ge=1, le=65535)
     region: str = Field(min_length=2, max_length=32)
     enabled: bool = True
+    probe_interval_s: float | None = Field(default=None, ge=1, le=86400)
+    probe_type: Literal['tcp', 'udp', 'http', 'https'] = 'tcp'
+    http_path: str = Field(default='/', min_length=1, max_length=2048, pattern=r'^/')
 
 
 class RegisteredNode(Node):
@@ -26,6 +29,16 @@ class ProbeResult(BaseModel):
     latency_ms: float = Field(ge=0)
     checked_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     error: str | None = Field(default=None, max_length=512)
+    burst_size: int | None = Field(default=None, ge=1)
+    latency_min_ms: float | None = Field(default=None, ge=0)
+    latency_median_ms: float | None = Field(default=None, ge=0)
+    latency_p95_ms: float | None = Field(default=None, ge=0)
+    jitter_ms: float | None = Field(default=None, ge=0)
+    loss_ratio: float | None = Field(default=None, ge=0, le=1)
+    dns_ms: float | None = Field(default=None, ge=0)
+    connect_ms: float | None = Field(default=None, ge=0)
+    tls_ms: float | None = Field(default=None, ge=0)
+    status_code: int | None = Field(default=None, ge=100, le=599)
 
 
 class ProbeRunRequest(BaseModel):
@@ -42,4 +55,36 @@ class ProbeResultsSummary(BaseModel):
     down_checks: int = Field(ge=0)
     availability_pct: float = Field(ge=0, le=100)
     avg_latency_ms: float | None = Field(default=None, ge=0)
+    p50_latency_ms: float | None = Field(default=None, ge=0)
+    p95_latency_ms: float | None = Field(default=None, ge=0)
+    p99_latency_ms: float | None = Field(default=None, ge=0)
     last_checked_at: datetime | None = None
+
+
+class ProbeResultsGroupSummary(ProbeResultsSummary):
+    node_id: str | None = None
+    region: str
+
+
+class ProbeResultsBucket(BaseModel):
+    bucket_start: datetime
+    total_checks: int = Field(ge=0)
+    up_checks: int = Field(ge=0)
+    down_checks: int = Field(ge=0)
+    availability_pct: float = Field(ge=0, le=100)
+    avg_latency_ms: float | None = Field(default=None, ge=0)
+    min_latency_ms: float | None = Field(default=None, ge=0)
+    max_latency_ms: float | None = Field(default=None, ge=0)
+
+
+class ProbeResultsSeries(BaseModel):
+    node_id: str
+    bucket_s: int = Field(ge=1)
+    buckets: list[ProbeResultsBucket]
+
+
+class BreakerState(BaseModel):
+    node_id: str = Field(min_length=1, max_length=128)
+    consecutive_failures: int = Field(ge=0)
+    backoff_s: float = Field(default=0.0, ge=0)
+    open_until: datetime | None = None
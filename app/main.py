@@ -1,5 +1,6 @@
 import logging
 import os
+import ssl
 import time
 from contextlib import asynccontextmanager
 from datetime import UTC, datetime
@@ -15,8 +16,22 @@ from app.api.nodes import router as nodes_router
 from app.api.probes import router as probes_router
 from app.api.scheduler import router as scheduler_router
 from app.core.logging import configure_logging
-from app.services.prober import tcp_probe
+from app.domain.models import ProbeResult, RegisteredNode
+from app.services.breaker import CircuitBreaker
+from app.services.concurrency import AIMDConcurrency, ProbeSlots
+from app.services.http_probe import HTTPProber
+from app.services.probe_engine import DEFAULT_PROBE_CONCURRENCY
+from app.services.prober import (
+    async_phased_probe,
+    async_tcp_probe,
+    bulk_tcp_probe,
+    bulk_udp_probe,
+)
+from app.services.rate_limit import ProbeRateLimiter
+from app.services.resolver import DNSCache
+from app.services.retention import RetentionPruner
 from app.services.scheduler import MonitoringScheduler
+from app.services.timeouts import AdaptiveTimeouts
 from app.storage.repository import InMemoryRepository, RepositoryUnavailableError
 from app.storage.sqlite_repository import SQLiteRepository
 
@@ -39,6 +54,41 @@ class RequestContextAdapter(logging.LoggerAdapter):
         return msg, kwargs
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _parse_region_intervals(raw: str) -> dict[str, float]:
+    """Parse `region=seconds` pairs such as `eu=10,us=300`, skipping bad entries."""
+    intervals: dict[str, float] = {}
+    for item in raw.split(','):
+        region, _, value = item.partition('=')
+        try:
+            interval = float(value)
+        except ValueError:
+            continue
+        if region.strip() and interval > 0:
+            intervals[region.strip()] = max(1.0, interval)
+    return intervals
+
+
 def create_app(
     scheduler_interval_s: float | None = None,
     probe_timeout_s: float | None = None,
@@ -46,6 +96,7 @@ def create_app(
     storage_backend: str | None = None,
     sqlite_path: str | None = None,
     result_retention_per_node: int | None = None,
+    probe_concurrency: int | None = None,
 ) -> FastAPI:
     configure_logging()
     interval = scheduler_interval_s
@@ -78,6 +129,15 @@ def create_app(
         except ValueError:
             retry_count = 0
     retry_count = max(0, min(2, retry_count))
+    concurrency = probe_concurrency
+    if concurrency is None:
+        concurrency = _env_int('NETSENTINEL_PROBE_CONCURRENCY', DEFAULT_PROBE_CONCURRENCY)
+    concurrency = max(1, min(10000, concurrency))
+    probe_mode = os.getenv('NETSENTINEL_PROBE_MODE', 'async')
+    shards = max(1, min(64, _env_int('NETSENTINEL_PROBE_SHARDS', 1)))
+    dispatch = os.getenv('NETSENTINEL_SCHEDULER_DISPATCH', 'cycle')
+    cycle_deadline_s = _env_float('NETSENTINEL_CYCLE_DEADLINE_S', interval)
+    region_intervals = _parse_region_intervals(os.getenv('NETSENTINEL_REGION_INTERVALS', ''))
     backend = storage_backend or os.getenv('NETSENTINEL_STORAGE_BACKEND', 'memory')
     db_path = sqlite_path or os.getenv('NETSENTINEL_SQLITE_PATH', './netsentinel.sqlite3')
     retention = result_retention_per_node
@@ -92,10 +152,18 @@ def create_app(
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         await app.state.scheduler.start()
+        await app.state.retention_pruner.start()
         try:
             yield
         finally:
+            await app.state.retention_pruner.stop()
             await app.state.scheduler.stop()
+            if app.state.dns_cache is not None:
+                app.state.dns_cache.close()
+            await app.state.http_prober.aclose()
+            close_repository = getattr(app.state.repository, 'close', None)
+            if close_repository is not None:
+                close_repository()
 
     app = FastAPI(title='NetSentinel API', version=SERVICE_VERSION, lifespan=lifespan)
     app.state.service_name = SERVICE_NAME
@@ -106,7 +174,17 @@ def create_app(
         Path(db_path).name if app.state.storage_backend == 'sqlite' else 'memory'
     )
     if backend == 'sqlite':
-        app.state.repository = SQLiteRepository(db_path, retention_per_node=retention)
+        app.state.repository = SQLiteRepository(
+            db_path,
+            reader_pool_size=max(1, _env_int('NETSENTINEL_SQLITE_READERS', 4)),
+            synchronous=os.getenv('NETSENTINEL_SQLITE_SYNCHRONOUS', 'NORMAL'),
+            cache_size=-max(0, _env_int('NETSENTINEL_SQLITE_CACHE_SIZE_KIB', 16000)),
+            mmap_size=max(0, _env_int('NETSENTINEL_SQLITE_MMAP_SIZE_MB', 0)) * 1024 * 1024,
+            group_commit_max=max(1, _env_int('NETSENTINEL_SQLITE_GROUP_COMMIT_MAX', 256)),
+            group_commit_delay_s=max(
+                0.0, _env_float('NETSENTINEL_SQLITE_GROUP_COMMIT_DELAY_MS', 2.0) / 1000
+            ),
+        )
         try:
             app.state.repository.initialize()
         except RepositoryUnavailableError as exc:
@@ -115,10 +193,146 @@ def create_app(
             ) from exc
     else:
         app.state.repository = InMemoryRepository()
+    app.state.circuit_breaker = None
+    breaker_threshold = max(0, _env_int('NETSENTINEL_BREAKER_THRESHOLD', 0))
+    if breaker_threshold > 0:
+        app.state.circuit_breaker = CircuitBreaker(
+            threshold=breaker_threshold,
+            base_backoff_s=max(1.0, _env_float('NETSENTINEL_BREAKER_BASE_BACKOFF_S', interval)),
+            max_backoff_s=max(1.0, _env_float('NETSENTINEL_BREAKER_MAX_BACKOFF_S', 3600.0)),
+        )
+        try:
+            app.state.circuit_breaker.load(app.state.repository.list_breaker_states())
+        except RepositoryUnavailableError as exc:
+            raise RuntimeError('Failed to load circuit breaker state') from exc
     app.state.probe_timeout_s = timeout_s
     app.state.probe_retry_count = retry_count
-    app.state.probe_node = lambda node: tcp_probe(node, timeout_s=app.state.probe_timeout_s)
+    app.state.probe_concurrency = concurrency
+    app.state.probe_burst_size = max(1, min(20, _env_int('NETSENTINEL_PROBE_BURST_SIZE', 1)))
+    app.state.probe_burst_spacing_s = (
+        max(0.0, _env_float('NETSENTINEL_PROBE_BURST_SPACING_MS', 20.0)) / 1000
+    )
+    app.state.concurrency_controller = None
+    if os.getenv('NETSENTINEL_PROBE_CONCURRENCY_MODE', 'fixed') == 'aimd':
+        app.state.concurrency_controller = AIMDConcurrency(
+            initial=concurrency,
+            minimum=max(1, _env_int('NETSENTINEL_PROBE_CONCURRENCY_MIN', 10)),
+            maximum=min(10000, _env_int('NETSENTINEL_PROBE_CONCURRENCY_MAX', 1000)),
+        )
+        app.state.probe_concurrency = app.state.concurrency_controller.limit
+    app.state.probe_slots = ProbeSlots(lambda: app.state.probe_concurrency)
+    app.state.probe_timeouts = None
+    if os.getenv('NETSENTINEL_PROBE_TIMEOUT_MODE', 'fixed') == 'adaptive':
+        app.state.probe_timeouts = AdaptiveTimeouts(
+            app.state.repository,
+            default_timeout_s=timeout_s,
+            factor=max(1.0, _env_float('NETSENTINEL_ADAPTIVE_TIMEOUT_FACTOR', 3.0)),
+            min_timeout_s=max(0.1, _env_float('NETSENTINEL_ADAPTIVE_TIMEOUT_MIN_S', 0.1)),
+            max_timeout_s=max(0.1, _env_float('NETSENTINEL_ADAPTIVE_TIMEOUT_MAX_S', 10.0)),
+        )
+
+    dns_ttl_s = _env_float('NETSENTINEL_DNS_CACHE_TTL_S', 60.0)
+    app.state.dns_cache = DNSCache(ttl_s=dns_ttl_s) if dns_ttl_s > 0 else None
+    app.state.probe_include_dns = _env_bool('NETSENTINEL_PROBE_INCLUDE_DNS', False)
+    app.state.probe_tls_context = None
+    if _env_bool('NETSENTINEL_PROBE_TLS', False):
+        app.state.probe_tls_context = ssl.create_default_context()
+        if not _env_bool('NETSENTINEL_PROBE_TLS_VERIFY', True):
+            app.state.probe_tls_context.check_hostname = False
+            app.state.probe_tls_context.verify_mode = ssl.CERT_NONE
+    app.state.probe_phases = (
+        _env_bool('NETSENTINEL_PROBE_PHASES', False)
+        or app.state.probe_tls_context is not None
+    )
+
+    def node_timeout_s(node: RegisteredNode) -> float:
+        if app.state.probe_timeouts is None:
+            return app.state.probe_timeout_s
+        return app.state.probe_timeouts.timeout_for(node.node_id)
+
+    async def probe_node(node: RegisteredNode) -> ProbeResult:
+        if app.state.probe_phases:
+            return await async_phased_probe(
+                node,
+                timeout_s=node_timeout_s(node),
+                resolver=app.state.dns_cache,
+                include_dns=app.state.probe_include_dns,
+                ssl_context=app.state.probe_tls_context,
+            )
+        return await async_tcp_probe(
+            node,
+            timeout_s=node_timeout_s(node),
+            resolver=app.state.dns_cache,
+            include_dns=app.state.probe_include_dns,
+        )
+
+    app.state.probe_node = probe_node
+    app.state.probe_shards = shards
+    app.state.cycle_deadline_s = cycle_deadline_s if cycle_deadline_s > 0 else None
+    app.state.probe_rate_limiter = ProbeRateLimiter(
+        host_rate_per_s=max(0.0, _env_float('NETSENTINEL_HOST_RATE_PER_S', 0.0)),
+        host_burst=max(1.0, _env_float('NETSENTINEL_HOST_BURST', 1.0)),
+        region_rate_per_s=max(0.0, _env_float('NETSENTINEL_REGION_RATE_PER_S', 0.0)),
+        region_burst=max(1.0, _env_float('NETSENTINEL_REGION_BURST', 1.0)),
+    )
+    app.state.probe_mode = probe_mode if probe_mode == 'selector' else 'async'
+    app.state.probe_nodes = None
+    if app.state.probe_mode == 'selector':
+        app.state.probe_nodes = lambda nodes, deadline_s=None: bulk_tcp_probe(
+            nodes,
+            timeout_s=app.state.probe_timeout_s,
+            max_in_flight=app.state.probe_concurrency,
+            deadline_s=deadline_s,
+            node_timeouts=(
+                None
+                if app.state.probe_timeouts is None
+                else app.state.probe_timeouts.snapshot(nodes)
+            ),
+            resolver=app.state.dns_cache,
+            include_dns=app.state.probe_include_dns,
+        )
+    app.state.http_prober = HTTPProber(
+        keepalive=_env_bool('NETSENTINEL_HTTP_KEEPALIVE', True),
+        max_connections=app.state.probe_concurrency,
+        keepalive_expiry_s=max(0.0, _env_float('NETSENTINEL_HTTP_KEEPALIVE_EXPIRY_S', 60.0)),
+        verify_tls=_env_bool('NETSENTINEL_HTTP_VERIFY_TLS', True),
+    )
+
+    async def probe_http_node(node: RegisteredNode) -> ProbeResult:
+        return await app.state.http_prober.probe(node, timeout_s=node_timeout_s(node))
+
+    app.state.probe_http_node = probe_http_node
+    app.state.probe_udp_nodes = lambda nodes, deadline_s=None: bulk_udp_probe(
+        nodes,
+        timeout_s=app.state.probe_timeout_s,
+        deadline_s=deadline_s,
+        node_timeouts=(
+            None
+            if app.state.probe_timeouts is None
+            else app.state.probe_timeouts.snapshot(nodes)
+        ),
+        resolver=app.state.dns_cache,
+    )
+    app.state.scheduler_dispatch = dispatch if dispatch in ('due', 'staggered') else 'cycle'
+    if shards > 1 and app.state.probe_rate_limiter.enabled:
+        raise RuntimeError(
+            'NETSENTINEL_HOST_RATE_PER_S and NETSENTINEL_REGION_RATE_PER_S are not '
+            'supported with NETSENTINEL_PROBE_SHARDS above 1'
+        )
+    if shards > 1 and app.state.scheduler_dispatch != 'cycle':
+        raise RuntimeError(
+            'NETSENTINEL_PROBE_SHARDS above 1 requires NETSENTINEL_SCHEDULER_DISPATCH=cycle'
+        )
+    app.state.dispatch_jitter_s = max(0.0, _env_float('NETSENTINEL_DISPATCH_JITTER_S', 0.0))
+    app.state.region_intervals = region_intervals
     app.state.scheduler = MonitoringScheduler(app, interval)
+    app.state.retention_pruner = RetentionPruner(
+        app.state.repository,
+        max_age_s=max(0.0, _env_float('NETSENTINEL_RESULT_RETENTION_DAYS', 0.0)) * 86400,
+        keep_per_node=retention,
+        interval_s=_env_float('NETSENTINEL_RETENTION_PRUNE_INTERVAL_S', 300.0),
+        batch_size=max(1, _env_int('NETSENTINEL_RETENTION_PRUNE_BATCH', 5000)),
+    )
 
     logger = RequestContextAdapter(logging.getLogger('netsentinel.http'), {})
 
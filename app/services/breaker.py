@@ -0,0 +1,101 @@
+"""Circuit breaker that backs off probing of persistently down nodes."""
+import threading
+from datetime import UTC, datetime, timedelta
+
+from app.domain.models import BreakerState, ProbeResult, RegisteredNode
+from app.services.probe_engine import DEADLINE_EXCEEDED_ERROR
+from app.services.prober import LOCAL_SOCKET_ERROR
+
+
+class CircuitBreaker:
+    """Tracks consecutive failures per node and opens after `threshold` of them.
+
+    An open breaker skips the node in scheduled cycles until `open_until`.
+    Each further failure doubles the backoff from `base_backoff_s` up to
+    `max_backoff_s`; the first success closes the breaker. Deadline and local
+    socket errors say nothing about the node and are ignored. `open_until` is
+    wall-clock time so persisted state stays meaningful across restarts.
+    """
+
+    def __init__(
+        self,
+        threshold: int,
+        base_backoff_s: float = 60.0,
+        max_backoff_s: float = 3600.0,
+    ) -> None:
+        self.threshold = threshold
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max(base_backoff_s, max_backoff_s)
+        self._states: dict[str, BreakerState] = {}
+        self._lock = threading.Lock()
+        self.skipped_total = 0
+
+    def load(self, states: list[BreakerState]) -> None:
+        with self._lock:
+            self._states = {state.node_id: state for state in states}
+
+    def allowed(self, nodes: list[RegisteredNode]) -> list[RegisteredNode]:
+        now = datetime.now(UTC)
+        with self._lock:
+            allowed = [node for node in nodes if not self._is_open(node.node_id, now)]
+            self.skipped_total += len(nodes) - len(allowed)
+        return allowed
+
+    def record(self, results: list[ProbeResult]) -> list[BreakerState]:
+        """Apply probe outcomes and return the states that changed.
+
+        A returned state with zero failures means the breaker was reset.
+        """
+        changed: list[BreakerState] = []
+        with self._lock:
+            for result in results:
+                if self._is_inconclusive(result):
+                    continue
+                previous = self._states.get(result.node_id)
+                if result.status == 'up':
+                    if previous is not None:
+                        del self._states[result.node_id]
+                        changed.append(BreakerState(node_id=result.node_id, consecutive_failures=0))
+                    continue
+                failures = 1 if previous is None else previous.consecutive_failures + 1
+                state = BreakerState(node_id=result.node_id, consecutive_failures=failures)
+                if failures >= self.threshold:
+                    state.backoff_s = min(
+                        self.max_backoff_s,
+                        self.base_backoff_s * 2 ** (failures - self.threshold),
+                    )
+                    state.open_until = result.checked_at.astimezone(UTC) + timedelta(
+                        seconds=state.backoff_s
+                    )
+                self._states[result.node_id] = state
+                changed.append(state)
+        return changed
+
+    def states(self) -> list[BreakerState]:
+        with self._lock:
+            return list(self._states.values())
+
+    def stats(self) -> dict[str, object]:
+        now = datetime.now(UTC)
+        with self._lock:
+            open_count = sum(1 for node_id in self._states if self._is_open(node_id, now))
+            tracked = len(self._states)
+        return {
+            'enabled': True,
+            'threshold': self.threshold,
+            'tracked_nodes': tracked,
+            'open_breakers': open_count,
+            'skipped_total': self.skipped_total,
+        }
+
+    def _is_open(self, node_id: str, now: datetime) -> bool:
+        state = self._states.get(node_id)
+        return state is not None and state.open_until is not None and state.open_until > now
+
+    @staticmethod
+    def _is_inconclusive(result: ProbeResult) -> bool:
+        if result.error is None:
+            return False
+        return result.error == DEADLINE_EXCEEDED_ERROR or result.error.startswith(
+            LOCAL_SOCKET_ERROR
+        )
@@ -0,0 +1,113 @@
+"""Additive-increase/multiplicative-decrease tuning of probe concurrency."""
+import asyncio
+from collections import deque
+from collections.abc import Callable
+
+from app.domain.models import ProbeResult
+from app.services.prober import LOCAL_SOCKET_ERROR
+
+
+class AIMDConcurrency:
+    """Adjusts the probe concurrency limit after every scheduler cycle.
+
+    The limit is cut by `decrease_factor` when a cycle used more than
+    `target_ratio` of the scheduler interval or hit local socket errors
+    (EMFILE, ENOBUFS, ...). Otherwise, if the cycle had more targets than the
+    limit allowed in flight, it grows by `increase_step`.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 10,
+        maximum: int = 1000,
+        increase_step: int = 10,
+        decrease_factor: float = 0.5,
+        target_ratio: float = 0.8,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.target_ratio = target_ratio
+        self.limit = max(self.minimum, min(self.maximum, initial))
+        self.increases = 0
+        self.decreases = 0
+        self.last_adjustment: str | None = None
+
+    def record_cycle(
+        self,
+        duration_s: float,
+        interval_s: float,
+        results: list[ProbeResult],
+    ) -> int:
+        local_errors = sum(
+            1
+            for result in results
+            if result.error is not None and result.error.startswith(LOCAL_SOCKET_ERROR)
+        )
+        if local_errors > 0 or duration_s > interval_s * self.target_ratio:
+            decreased = max(self.minimum, int(self.limit * self.decrease_factor))
+            if decreased < self.limit:
+                self.decreases += 1
+                self.last_adjustment = 'decrease'
+            self.limit = decreased
+        elif len(results) > self.limit and self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit + self.increase_step)
+            self.increases += 1
+            self.last_adjustment = 'increase'
+        return self.limit
+
+    def stats(self) -> dict[str, object]:
+        return {
+            'mode': 'aimd',
+            'limit': self.limit,
+            'minimum': self.minimum,
+            'maximum': self.maximum,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'last_adjustment': self.last_adjustment,
+        }
+
+
+class ProbeSlots:
+    """Engine-wide cap on in-flight probe attempts, shared by every dispatch.
+
+    Overlapping cycles and due batches all draw from the same slots, so the
+    configured concurrency bounds the process rather than each call. The
+    limit is read on every acquire and release, so AIMD adjustments apply to
+    work that is already queued; a lowered limit lets in-flight probes finish.
+    """
+
+    def __init__(self, limit: Callable[[], int]) -> None:
+        self._limit = limit
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    async def acquire(self) -> None:
+        if not self._waiters and self.in_flight < max(1, self._limit()):
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        limit = max(1, self._limit())
+        while self._waiters and self.in_flight < limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
@@ -0,0 +1,105 @@
+"""Application-layer HTTP(S) probing over a pooled keep-alive client."""
+import asyncio
+import time
+from datetime import UTC, datetime
+
+import httpx
+
+from app.domain.models import ProbeResult, RegisteredNode
+
+HTTP_PROBE_TYPES = frozenset({'http', 'https'})
+
+
+class HTTPProber:
+    """Measures time to first byte of a GET against each node's `http_path`.
+
+    One `httpx.AsyncClient` is shared by every probe, so with `keepalive` set
+    idle connections stay pooled between cycles and repeat checks skip the
+    TCP and TLS setup. The client is bound to the event loop it was created
+    on and is rebuilt if probes arrive on a different loop. Responses below
+    500 count as up; the status code is recorded either way. The verdict is
+    made when the headers arrive. The body is then drained for at most
+    `drain_timeout_s` so the connection can be reused; a slower body just
+    closes the connection and does not affect the result.
+    """
+
+    def __init__(
+        self,
+        keepalive: bool = True,
+        max_connections: int = 100,
+        keepalive_expiry_s: float = 60.0,
+        verify_tls: bool = True,
+        drain_timeout_s: float = 0.5,
+    ) -> None:
+        self.keepalive = keepalive
+        self.drain_timeout_s = drain_timeout_s
+        self.max_connections = max_connections
+        self.keepalive_expiry_s = keepalive_expiry_s
+        self.verify_tls = verify_tls
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _client_for_loop(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                verify=self.verify_tls,
+                follow_redirects=False,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections if self.keepalive else 0,
+                    keepalive_expiry=self.keepalive_expiry_s,
+                ),
+            )
+            self._loop = loop
+        return self._client
+
+    async def probe(self, node: RegisteredNode, timeout_s: float = 1.5) -> ProbeResult:
+        client = self._client_for_loop()
+        host = f'[{node.host}]' if ':' in node.host else node.host
+        url = f'{node.probe_type}://{host}:{node.port}{node.http_path}'
+        started = time.perf_counter()
+        latency_ms = None
+        status_code = None
+        error = None
+        response = None
+        try:
+            async with asyncio.timeout(timeout_s):
+                response = await client.send(client.build_request('GET', url), stream=True)
+                latency_ms = round((time.perf_counter() - started) * 1000, 3)
+                status_code = response.status_code
+        except TimeoutError:
+            error = 'timeout'
+        except httpx.HTTPError as exc:
+            error = str(exc) or type(exc).__name__
+        if response is not None:
+            await self._release(response)
+        if latency_ms is None:
+            latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        if status_code is not None and status_code >= 500:
+            error = f'http_status_{status_code}'
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up' if error is None else 'down',
+            latency_ms=latency_ms,
+            checked_at=datetime.now(UTC),
+            error=error,
+            status_code=status_code,
+        )
+
+    async def _release(self, response: httpx.Response) -> None:
+        # Drain the body so the connection can go back to the pool; a body
+        # slower than the bound is abandoned and its connection closed.
+        try:
+            async with asyncio.timeout(self.drain_timeout_s):
+                await response.aread()
+        except (TimeoutError, httpx.HTTPError):
+            pass
+        finally:
+            await response.aclose()
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
@@ -0,0 +1,409 @@
+"""Concurrent probe dispatch shared by manual runs and scheduler cycles."""
+import asyncio
+import functools
+import inspect
+import math
+import ssl
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from app.domain.models import ProbeResult, RegisteredNode
+from app.services.concurrency import ProbeSlots
+from app.services.http_probe import HTTP_PROBE_TYPES, HTTPProber
+from app.services.prober import (
+    async_phased_probe,
+    async_tcp_probe,
+    bulk_tcp_probe,
+    bulk_udp_probe,
+)
+from app.services.rate_limit import ProbeRateLimiter
+from app.services.resolver import DNSCache
+
+DEFAULT_PROBE_CONCURRENCY = 100
+DEADLINE_EXCEEDED_ERROR = 'deadline_exceeded'
+
+
+async def run_probes(
+    targets: list[RegisteredNode],
+    probe_node: Callable,
+    retry_count: int = 0,
+    concurrency: int = DEFAULT_PROBE_CONCURRENCY,
+    rate_limiter: ProbeRateLimiter | None = None,
+    deadline_s: float | None = None,
+    burst_size: int = 1,
+    burst_spacing_s: float = 0.02,
+    slots: ProbeSlots | None = None,
+) -> list[ProbeResult]:
+    """Probe all targets concurrently and return results in target order.
+
+    At most `concurrency` probe attempts are in flight at once; passing shared
+    `slots` applies that cap across every concurrent call instead. Each node keeps
+    the immediate-retry semantics of `probe_retry_count`: a down result is
+    retried up to `retry_count` more times and the last attempt is reported.
+    When a rate limiter is given, every attempt first takes a token from its
+    region and host buckets; throttled nodes wait without holding a slot.
+    Probes still outstanding after `deadline_s` are cancelled and reported as
+    down with a `deadline_exceeded` error. With `burst_size` above 1 each
+    attempt is a burst (see `run_burst`) that occupies a single slot.
+    """
+    started = time.perf_counter()
+    semaphore = slots if slots is not None else asyncio.Semaphore(max(1, concurrency))
+
+    async def probe_with_retries(node: RegisteredNode) -> ProbeResult:
+        attempt = 0
+        while True:
+            if rate_limiter is not None:
+                await rate_limiter.acquire(node)
+            async with semaphore:
+                if burst_size > 1:
+                    result = await run_burst(node, probe_node, burst_size, burst_spacing_s)
+                else:
+                    result = await _call_probe(probe_node, node)
+            if result.status == 'up' or attempt >= retry_count:
+                return result
+            attempt += 1
+
+    tasks = [asyncio.create_task(probe_with_retries(node)) for node in targets]
+    if not tasks:
+        return []
+    _, pending = await asyncio.wait(tasks, timeout=deadline_s)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    return [
+        _deadline_exceeded(node, started) if task in pending else task.result()
+        for node, task in zip(targets, tasks)
+    ]
+
+
+def _deadline_exceeded(node: RegisteredNode, started: float) -> ProbeResult:
+    return ProbeResult(
+        node_id=node.node_id,
+        status='down',
+        latency_ms=round((time.perf_counter() - started) * 1000, 3),
+        checked_at=datetime.now(UTC),
+        error=DEADLINE_EXCEEDED_ERROR,
+    )
+
+
+async def run_burst(
+    node: RegisteredNode,
+    probe_node: Callable,
+    size: int,
+    spacing_s: float = 0.02,
+) -> ProbeResult:
+    """Run `size` probes of one node, started `spacing_s` apart, and reduce them."""
+
+    async def sample(index: int) -> ProbeResult:
+        if index:
+            await asyncio.sleep(index * spacing_s)
+        return await _call_probe(probe_node, node)
+
+    samples = await asyncio.gather(*(sample(index) for index in range(size)))
+    return reduce_burst(node, list(samples))
+
+
+def reduce_burst(node: RegisteredNode, samples: list[ProbeResult]) -> ProbeResult:
+    """Collapse burst samples into one result with loss and jitter statistics.
+
+    Latency statistics use successful samples only, with one sort per burst.
+    `latency_ms` is the median. Jitter is the mean absolute difference
+    between consecutive successful samples in send order. The node is up if
+    any sample got through.
+    """
+    latencies = [sample.latency_ms for sample in samples if sample.status == 'up']
+    loss_ratio = round(1 - len(latencies) / len(samples), 3)
+    if not latencies:
+        last = samples[-1]
+        return ProbeResult(
+            node_id=node.node_id,
+            status='down',
+            latency_ms=last.latency_ms,
+            checked_at=datetime.now(UTC),
+            error=last.error,
+            burst_size=len(samples),
+            loss_ratio=loss_ratio,
+        )
+    ordered = sorted(latencies)
+    count = len(ordered)
+    middle = count // 2
+    median = ordered[middle] if count % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+    p95 = ordered[math.ceil(0.95 * count) - 1]
+    jitter = 0.0
+    if count > 1:
+        jitter = sum(abs(b - a) for a, b in zip(latencies, latencies[1:])) / (count - 1)
+    return ProbeResult(
+        node_id=node.node_id,
+        status='up',
+        latency_ms=round(median, 3),
+        checked_at=datetime.now(UTC),
+        burst_size=len(samples),
+        latency_min_ms=round(ordered[0], 3),
+        latency_median_ms=round(median, 3),
+        latency_p95_ms=round(p95, 3),
+        jitter_ms=round(jitter, 3),
+        loss_ratio=loss_ratio,
+    )
+
+
+async def _call_probe(probe_node: Callable, node: RegisteredNode) -> ProbeResult:
+    if inspect.iscoroutinefunction(probe_node):
+        return await probe_node(node)
+    return await asyncio.to_thread(probe_node, node)
+
+
+async def run_bulk_probes(
+    targets: list[RegisteredNode],
+    probe_nodes: Callable[..., list[ProbeResult]],
+    retry_count: int = 0,
+    deadline_s: float | None = None,
+    rate_limiter: ProbeRateLimiter | None = None,
+) -> list[ProbeResult]:
+    """Probe all targets through a blocking bulk prober off the event loop.
+
+    Down nodes are re-probed together in up to `retry_count` extra rounds, which
+    matches the per-node retry semantics of `run_probes`. With a deadline, the
+    bulk prober receives the remaining budget as `deadline_s` and no retry
+    round starts once it is spent. An enabled rate limiter paces each round:
+    nodes are handed to the bulk prober in waves as their tokens are granted,
+    and nodes still throttled at the deadline are reported as
+    `deadline_exceeded`.
+    """
+    if not targets:
+        return []
+    started = time.perf_counter()
+
+    def remaining_s() -> float | None:
+        if deadline_s is None:
+            return None
+        return max(0.0, deadline_s - (time.perf_counter() - started))
+
+    def probe_wave(nodes: list[RegisteredNode]) -> list[ProbeResult]:
+        if deadline_s is None:
+            return probe_nodes(nodes)
+        return probe_nodes(nodes, deadline_s=remaining_s())
+
+    async def probe_round(nodes: list[RegisteredNode]) -> list[ProbeResult]:
+        if rate_limiter is None or not rate_limiter.enabled:
+            return await asyncio.to_thread(probe_wave, nodes)
+        acquiring = {
+            asyncio.create_task(rate_limiter.acquire(node)): index
+            for index, node in enumerate(nodes)
+        }
+        waves: list[tuple[list[int], asyncio.Task[list[ProbeResult]]]] = []
+        pending = set(acquiring)
+        while pending:
+            granted, pending = await asyncio.wait(
+                pending, timeout=remaining_s(), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not granted:
+                break
+            indexes = sorted(acquiring[task] for task in granted)
+            wave = [nodes[index] for index in indexes]
+            waves.append((indexes, asyncio.create_task(asyncio.to_thread(probe_wave, wave))))
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        round_results = [_deadline_exceeded(node, started) for node in nodes]
+        for indexes, wave_task in waves:
+            for index, result in zip(indexes, await wave_task):
+                round_results[index] = result
+        return round_results
+
+    results = await probe_round(targets)
+    for _ in range(retry_count):
+        retry_indexes = [index for index, result in enumerate(results) if result.status != 'up']
+        if not retry_indexes:
+            break
+        if deadline_s is not None and time.perf_counter() - started >= deadline_s:
+            break
+        retried = await probe_round([targets[index] for index in retry_indexes])
+        for index, result in zip(retry_indexes, retried):
+            results[index] = result
+    return results
+
+
+def split_by_probe_type(
+    targets: list[RegisteredNode],
+) -> tuple[list[RegisteredNode], list[RegisteredNode], list[RegisteredNode]]:
+    """Split targets into TCP, UDP and HTTP(S) nodes, keeping their order."""
+    tcp_targets = [node for node in targets if node.probe_type == 'tcp']
+    udp_targets = [node for node in targets if node.probe_type == 'udp']
+    http_targets = [node for node in targets if node.probe_type in HTTP_PROBE_TYPES]
+    return tcp_targets, udp_targets, http_targets
+
+
+def in_target_order(
+    targets: list[RegisteredNode],
+    results: list[ProbeResult],
+) -> list[ProbeResult]:
+    positions = {node.node_id: index for index, node in enumerate(targets)}
+    return sorted(results, key=lambda result: positions[result.node_id])
+
+
+@dataclass(frozen=True)
+class ShardProbeSettings:
+    """Probe configuration handed to shard worker processes.
+
+    Mirrors the app-level probe settings in picklable form: the TLS context
+    and DNS cache are rebuilt inside the worker, and `node_timeouts` carries
+    the adaptive per-node timeouts snapshotted for the shard's nodes.
+    """
+
+    timeout_s: float
+    retry_count: int = 0
+    concurrency: int = DEFAULT_PROBE_CONCURRENCY
+    mode: str = 'async'
+    deadline_s: float | None = None
+    node_timeouts: dict[str, float] | None = None
+    dns_cache_ttl_s: float = 0.0
+    include_dns: bool = False
+    burst_size: int = 1
+    burst_spacing_s: float = 0.02
+    phases: bool = False
+    tls: bool = False
+    tls_verify: bool = True
+    http_verify_tls: bool = True
+
+    def timeout_for(self, node: RegisteredNode) -> float:
+        if self.node_timeouts is None:
+            return self.timeout_s
+        return self.node_timeouts.get(node.node_id, self.timeout_s)
+
+
+_worker_dns_cache: DNSCache | None = None
+
+
+def _shard_dns_cache(ttl_s: float) -> DNSCache | None:
+    """The worker process's DNS cache, kept across shard calls."""
+    global _worker_dns_cache
+    if ttl_s <= 0:
+        return None
+    if _worker_dns_cache is None or _worker_dns_cache.ttl_s != ttl_s:
+        if _worker_dns_cache is not None:
+            _worker_dns_cache.close()
+        _worker_dns_cache = DNSCache(ttl_s=ttl_s)
+    return _worker_dns_cache
+
+
+def probe_shard(
+    targets: list[RegisteredNode],
+    settings: ShardProbeSettings,
+) -> tuple[list[ProbeResult], float]:
+    """Worker-process entry point probing one shard with the built-in probers.
+
+    TCP, UDP and HTTP(S) nodes are probed concurrently on one event loop, so
+    the whole shard shares a single `settings.deadline_s` budget. Returns the
+    shard's results together with its wall-clock duration in ms.
+    """
+    started = time.perf_counter()
+    results = asyncio.run(_probe_shard_targets(targets, settings))
+    return results, round((time.perf_counter() - started) * 1000, 3)
+
+
+async def _probe_shard_targets(
+    targets: list[RegisteredNode],
+    settings: ShardProbeSettings,
+) -> list[ProbeResult]:
+    resolver = _shard_dns_cache(settings.dns_cache_ttl_s)
+    tcp_targets, udp_targets, http_targets = split_by_probe_type(targets)
+    outcomes = await asyncio.gather(
+        _probe_tcp_shard(tcp_targets, settings, resolver),
+        run_bulk_probes(
+            udp_targets,
+            functools.partial(
+                bulk_udp_probe,
+                timeout_s=settings.timeout_s,
+                node_timeouts=settings.node_timeouts,
+                resolver=resolver,
+            ),
+            retry_count=settings.retry_count,
+            deadline_s=settings.deadline_s,
+        ),
+        _probe_http_shard(http_targets, settings),
+    )
+    return in_target_order(targets, [result for group in outcomes for result in group])
+
+
+async def _probe_tcp_shard(
+    targets: list[RegisteredNode],
+    settings: ShardProbeSettings,
+    resolver: DNSCache | None,
+) -> list[ProbeResult]:
+    if not targets:
+        return []
+    if settings.mode == 'selector':
+        bulk_probe = functools.partial(
+            bulk_tcp_probe,
+            timeout_s=settings.timeout_s,
+            max_in_flight=settings.concurrency,
+            node_timeouts=settings.node_timeouts,
+            resolver=resolver,
+            include_dns=settings.include_dns,
+        )
+        return await run_bulk_probes(
+            targets,
+            bulk_probe,
+            retry_count=settings.retry_count,
+            deadline_s=settings.deadline_s,
+        )
+
+    ssl_context = None
+    if settings.tls:
+        ssl_context = ssl.create_default_context()
+        if not settings.tls_verify:
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+
+    async def probe_node(node: RegisteredNode) -> ProbeResult:
+        if settings.phases or ssl_context is not None:
+            return await async_phased_probe(
+                node,
+                timeout_s=settings.timeout_for(node),
+                resolver=resolver,
+                include_dns=settings.include_dns,
+                ssl_context=ssl_context,
+            )
+        return await async_tcp_probe(
+            node,
+            timeout_s=settings.timeout_for(node),
+            resolver=resolver,
+            include_dns=settings.include_dns,
+        )
+
+    return await run_probes(
+        targets,
+        probe_node,
+        retry_count=settings.retry_count,
+        concurrency=settings.concurrency,
+        deadline_s=settings.deadline_s,
+        burst_size=settings.burst_size,
+        burst_spacing_s=settings.burst_spacing_s,
+    )
+
+
+async def _probe_http_shard(
+    targets: list[RegisteredNode],
+    settings: ShardProbeSettings,
+) -> list[ProbeResult]:
+    if not targets:
+        return []
+    prober = HTTPProber(max_connections=settings.concurrency, verify_tls=settings.http_verify_tls)
+
+    async def probe_node(node: RegisteredNode) -> ProbeResult:
+        return await prober.probe(node, timeout_s=settings.timeout_for(node))
+
+    try:
+        return await run_probes(
+            targets,
+            probe_node,
+            retry_count=settings.retry_count,
+            concurrency=settings.concurrency,
+            deadline_s=settings.deadline_s,
+        )
+    finally:
+        await prober.aclose()
@@ -1,8 +1,42 @@
+"""TCP and UDP probes: single async, phased (DNS/connect/TLS) and selector bulk."""
+import asyncio
+import errno
+import heapq
+import os
+import selectors
 import socket
+import ssl
 import time
 from datetime import UTC, datetime
 
 from app.domain.models import ProbeResult, RegisteredNode
+from app.services.resolver import DNSCache
+
+LOCAL_SOCKET_ERROR = 'local_socket_error'
+# Failures caused by the probe host running out of sockets, ports or buffers
+# rather than by the target; these signal that dispatch is too aggressive.
+LOCAL_SOCKET_ERRNOS = frozenset(
+    {errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM, errno.EADDRNOTAVAIL}
+)
+
+
+def describe_socket_error(exc: OSError) -> str:
+    if exc.errno in LOCAL_SOCKET_ERRNOS:
+        return f'{LOCAL_SOCKET_ERROR}: {exc}'
+    return str(exc)
+
+
+async def open_first_connection(
+    addresses: tuple[str, ...], port: int
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connect to the first address that accepts, raising the last error if none do."""
+    last_error: OSError = OSError(f'No addresses to connect to on port {port}')
+    for address in addresses:
+        try:
+            return await asyncio.open_connection(address, port)
+        except OSError as exc:
+            last_error = exc
+    raise last_error
 
 
 def tcp_probe(node: RegisteredNode, timeout_s: float = 1.5) -> ProbeResult:
@@ -32,5 +66,414 @@ def tcp_probe(node: RegisteredNode, timeout_s: float = 1.5) -> ProbeResult:
             status='down',
             latency_ms=latency_ms,
             checked_at=datetime.now(UTC),
-            error=str(exc),
+            error=describe_socket_error(exc),
+        )
+
+
+async def async_tcp_probe(
+    node: RegisteredNode,
+    timeout_s: float = 1.5,
+    resolver: DNSCache | None = None,
+    include_dns: bool = True,
+) -> ProbeResult:
+    """Non-blocking counterpart of `tcp_probe` for use on the event loop.
+
+    With a resolver, the host is resolved through its cache first; unless
+    `include_dns` is set, resolution time is left out of `latency_ms`.
+    """
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(timeout_s):
+            if resolver is None:
+                _, writer = await asyncio.open_connection(node.host, node.port)
+            else:
+                addresses = await resolver.resolve_async(node.host)
+                if not include_dns:
+                    started = time.perf_counter()
+                _, writer = await open_first_connection(addresses, node.port)
+    except TimeoutError:
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        return ProbeResult(
+            node_id=node.node_id,
+            status='down',
+            latency_ms=latency_ms,
+            checked_at=datetime.now(UTC),
+            error='timeout',
+        )
+    except OSError as exc:
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        return ProbeResult(
+            node_id=node.node_id,
+            status='down',
+            latency_ms=latency_ms,
+            checked_at=datetime.now(UTC),
+            error=describe_socket_error(exc),
+        )
+    latency_ms = round((time.perf_counter() - started) * 1000, 3)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return ProbeResult(
+        node_id=node.node_id,
+        status='up',
+        latency_ms=latency_ms,
+        checked_at=datetime.now(UTC),
+    )
+
+
+async def async_phased_probe(
+    node: RegisteredNode,
+    timeout_s: float = 1.5,
+    resolver: DNSCache | None = None,
+    include_dns: bool = True,
+    ssl_context: ssl.SSLContext | None = None,
+) -> ProbeResult:
+    """Probe a node timing DNS, TCP connect and optional TLS handshake separately.
+
+    Phases are timestamped with `perf_counter_ns`. A TLS handshake runs on the
+    connected stream when `ssl_context` is given. `latency_ms` covers connect
+    plus handshake, and resolution too when `include_dns` is set. Phases that
+    completed before a failure keep their timings.
+    """
+    phases_ms: dict[str, float] = {}
+    started_ns = time.perf_counter_ns()
+    mark_ns = started_ns
+    writer = None
+
+    def lap(phase: str) -> None:
+        nonlocal mark_ns
+        now_ns = time.perf_counter_ns()
+        phases_ms[phase] = round((now_ns - mark_ns) / 1_000_000, 3)
+        mark_ns = now_ns
+
+    def finish(error: str | None) -> ProbeResult:
+        latency_ms = round((time.perf_counter_ns() - started_ns) / 1_000_000, 3)
+        if not include_dns:
+            latency_ms = round(max(0.0, latency_ms - phases_ms.get('dns', 0.0)), 3)
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up' if error is None else 'down',
+            latency_ms=latency_ms,
+            checked_at=datetime.now(UTC),
+            error=error,
+            dns_ms=phases_ms.get('dns'),
+            connect_ms=phases_ms.get('connect'),
+            tls_ms=phases_ms.get('tls'),
         )
+
+    try:
+        async with asyncio.timeout(timeout_s):
+            if resolver is not None:
+                addresses = await resolver.resolve_async(node.host)
+            else:
+                infos = await asyncio.get_running_loop().getaddrinfo(
+                    node.host, node.port, type=socket.SOCK_STREAM
+                )
+                addresses = tuple(dict.fromkeys(info[4][0] for info in infos))
+            lap('dns')
+            _, writer = await open_first_connection(addresses, node.port)
+            lap('connect')
+            if ssl_context is not None:
+                await writer.start_tls(ssl_context, server_hostname=node.host)
+                lap('tls')
+    except TimeoutError:
+        return finish('timeout')
+    except OSError as exc:
+        return finish(describe_socket_error(exc))
+    finally:
+        if writer is not None:
+            writer.close()
+    result = finish(None)
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return result
+
+
+def bulk_tcp_probe(
+    nodes: list[RegisteredNode],
+    timeout_s: float = 1.5,
+    max_in_flight: int = 1024,
+    deadline_s: float | None = None,
+    node_timeouts: dict[str, float] | None = None,
+    resolver: DNSCache | None = None,
+    include_dns: bool = True,
+) -> list[ProbeResult]:
+    """Probe many nodes from one thread with non-blocking connects.
+
+    Each node gets a non-blocking socket whose `connect_ex` completion is
+    multiplexed through `selectors` (epoll on Linux). At most `max_in_flight`
+    sockets are open at once; results are returned in node order. Once
+    `deadline_s` has elapsed, open and not yet started connects are reported
+    as `deadline_exceeded`. `node_timeouts` overrides `timeout_s` per node id.
+    A resolver replaces the per-call address memo with its shared cache.
+    Every resolved address is tried in order until one accepts; the node's
+    timeout covers all attempts.
+    """
+    cutoff = None if deadline_s is None else time.perf_counter() + deadline_s
+    results: list[ProbeResult | None] = [None] * len(nodes)
+    addresses: dict[tuple[str, int], list[tuple]] = {}
+    pending: dict[int, tuple[socket.socket, float]] = {}
+    candidates: dict[int, list[tuple]] = {}
+    deadlines: list[tuple[float, int]] = []
+    next_index = 0
+
+    def finish(index: int, started: float, error: str | None) -> None:
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        results[index] = ProbeResult(
+            node_id=nodes[index].node_id,
+            status='up' if error is None else 'down',
+            latency_ms=latency_ms,
+            checked_at=datetime.now(UTC),
+            error=error,
+        )
+
+    def start(index: int) -> None:
+        node = nodes[index]
+        started = time.perf_counter()
+        try:
+            hosts = (node.host,)
+            if resolver is not None:
+                hosts = resolver.resolve(node.host)
+                if not include_dns:
+                    started = time.perf_counter()
+            remaining = []
+            for host in hosts:
+                key = (host, node.port)
+                if key not in addresses:
+                    addresses[key] = [
+                        (family, kind, proto, sockaddr)
+                        for family, kind, proto, _, sockaddr in socket.getaddrinfo(
+                            host, node.port, type=socket.SOCK_STREAM
+                        )
+                    ]
+                remaining.extend(addresses[key])
+        except OSError as exc:
+            finish(index, started, describe_socket_error(exc))
+            return
+        candidates[index] = remaining
+        node_timeout_s = timeout_s
+        if node_timeouts is not None:
+            node_timeout_s = node_timeouts.get(node.node_id, timeout_s)
+        heapq.heappush(deadlines, (started + node_timeout_s, index))
+        connect_next(index, started, None)
+
+    def connect_next(index: int, started: float, error: OSError | None) -> None:
+        remaining = candidates[index]
+        while remaining:
+            family, kind, proto, sockaddr = remaining.pop(0)
+            try:
+                sock = socket.socket(family, kind, proto)
+            except OSError as exc:
+                error = exc
+                continue
+            sock.setblocking(False)
+            code = sock.connect_ex(sockaddr)
+            if code in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+                selector.register(sock, selectors.EVENT_WRITE, index)
+                pending[index] = (sock, started)
+                return
+            sock.close()
+            if code == 0:
+                del candidates[index]
+                finish(index, started, None)
+                return
+            error = OSError(code, os.strerror(code))
+        del candidates[index]
+        if error is None:
+            error = OSError(f'No addresses for {nodes[index].host}')
+        finish(index, started, describe_socket_error(error))
+
+    with selectors.DefaultSelector() as selector:
+        while next_index < len(nodes) or pending:
+            if cutoff is not None and time.perf_counter() >= cutoff:
+                for index, (sock, started) in pending.items():
+                    selector.unregister(sock)
+                    sock.close()
+                    finish(index, started, 'deadline_exceeded')
+                pending.clear()
+                candidates.clear()
+                for index in range(next_index, len(nodes)):
+                    finish(index, time.perf_counter(), 'deadline_exceeded')
+                break
+            while next_index < len(nodes) and len(pending) < max(1, max_in_flight):
+                start(next_index)
+                next_index += 1
+            if not pending:
+                continue
+            wait_until = deadlines[0][0] if cutoff is None else min(deadlines[0][0], cutoff)
+            wait_s = max(0.0, wait_until - time.perf_counter())
+            for key, _ in selector.select(timeout=wait_s):
+                index = key.data
+                sock, started = pending.pop(index)
+                selector.unregister(sock)
+                code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                sock.close()
+                if code == 0:
+                    del candidates[index]
+                    finish(index, started, None)
+                else:
+                    connect_next(index, started, OSError(code, os.strerror(code)))
+            now = time.perf_counter()
+            while deadlines and (deadlines[0][1] not in pending or deadlines[0][0] <= now):
+                _, index = heapq.heappop(deadlines)
+                if index not in pending:
+                    continue
+                sock, started = pending.pop(index)
+                selector.unregister(sock)
+                sock.close()
+                del candidates[index]
+                finish(index, started, 'timeout')
+    return [result for result in results if result is not None]
+
+
+UDP_PROBE_MAGIC = b'NSNT'
+
+
+def bulk_udp_probe(
+    nodes: list[RegisteredNode],
+    timeout_s: float = 1.5,
+    deadline_s: float | None = None,
+    node_timeouts: dict[str, float] | None = None,
+    resolver: DNSCache | None = None,
+) -> list[ProbeResult]:
+    """Probe many UDP nodes from one socket per address family.
+
+    Each node is sent `UDP_PROBE_MAGIC` followed by an 8-byte token. Replies
+    are matched back by token and sender address; a reply without a token is
+    credited to the oldest outstanding probe for that address, so services
+    that answer with their own payload still count as up. Nodes with no reply
+    within their timeout are reported as `timeout`, and everything still open
+    once `deadline_s` has elapsed as `deadline_exceeded`. Results are returned
+    in node order.
+    """
+    cutoff = None if deadline_s is None else time.perf_counter() + deadline_s
+    results: list[ProbeResult | None] = [None] * len(nodes)
+    addresses: dict[tuple[str, int], tuple[int, tuple]] = {}
+    sockets: dict[int, socket.socket] = {}
+    outbox: list[tuple[int, int, tuple]] = []
+    sent: dict[int, tuple[float, tuple]] = {}
+    tokens: dict[bytes, int] = {}
+    by_address: dict[tuple[str, int], list[int]] = {}
+    deadlines: list[tuple[float, int]] = []
+    base_token = int.from_bytes(os.urandom(8), 'big')
+
+    def finish(index: int, started: float, error: str | None) -> None:
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        results[index] = ProbeResult(
+            node_id=nodes[index].node_id,
+            status='up' if error is None else 'down',
+            latency_ms=latency_ms,
+            checked_at=datetime.now(UTC),
+            error=error,
+        )
+
+    def token_for(index: int) -> bytes:
+        return ((base_token + index) % (1 << 64)).to_bytes(8, 'big')
+
+    def settle(index: int, error: str | None) -> None:
+        started, peer = sent.pop(index)
+        tokens.pop(token_for(index), None)
+        by_address[peer].remove(index)
+        finish(index, started, error)
+
+    for index, node in enumerate(nodes):
+        started = time.perf_counter()
+        try:
+            # UDP gives no connect error to fall back on, so use the first address.
+            host = node.host if resolver is None else resolver.resolve(node.host)[0]
+            key = (host, node.port)
+            if key not in addresses:
+                family, _, _, _, sockaddr = socket.getaddrinfo(
+                    host, node.port, type=socket.SOCK_DGRAM
+                )[0]
+                addresses[key] = (family, sockaddr)
+            family, sockaddr = addresses[key]
+            if family not in sockets:
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                sockets[family] = sock
+        except OSError as exc:
+            finish(index, started, describe_socket_error(exc))
+            continue
+        outbox.append((index, family, sockaddr))
+    outbox.reverse()
+
+    with selectors.DefaultSelector() as selector:
+        for sock in sockets.values():
+            selector.register(sock, selectors.EVENT_READ)
+        write_family = None
+        try:
+            while outbox or sent:
+                if cutoff is not None and time.perf_counter() >= cutoff:
+                    for index in list(sent):
+                        settle(index, 'deadline_exceeded')
+                    for index, _, _ in outbox:
+                        finish(index, time.perf_counter(), 'deadline_exceeded')
+                    break
+                while outbox:
+                    index, family, sockaddr = outbox[-1]
+                    try:
+                        sockets[family].sendto(UDP_PROBE_MAGIC + token_for(index), sockaddr)
+                    except BlockingIOError:
+                        break
+                    except OSError as exc:
+                        outbox.pop()
+                        finish(index, time.perf_counter(), describe_socket_error(exc))
+                        continue
+                    outbox.pop()
+                    started = time.perf_counter()
+                    sent[index] = (started, sockaddr[:2])
+                    tokens[token_for(index)] = index
+                    by_address.setdefault(sockaddr[:2], []).append(index)
+                    node_timeout_s = timeout_s
+                    if node_timeouts is not None:
+                        node_timeout_s = node_timeouts.get(nodes[index].node_id, timeout_s)
+                    heapq.heappush(deadlines, (started + node_timeout_s, index))
+                # A blocked send waits for its socket to become writable
+                # instead of retrying in a busy loop.
+                blocked_family = outbox[-1][1] if outbox else None
+                if blocked_family != write_family:
+                    for family, sock in sockets.items():
+                        events = selectors.EVENT_READ
+                        if family == blocked_family:
+                            events |= selectors.EVENT_WRITE
+                        selector.modify(sock, events)
+                    write_family = blocked_family
+                wake_times = [deadlines[0][0]] if deadlines else []
+                if cutoff is not None:
+                    wake_times.append(cutoff)
+                wait_s = None
+                if wake_times:
+                    wait_s = max(0.0, min(wake_times) - time.perf_counter())
+                for key, mask in selector.select(timeout=wait_s):
+                    if not mask & selectors.EVENT_READ:
+                        continue
+                    while True:
+                        try:
+                            payload, sender = key.fileobj.recvfrom(2048)
+                        except OSError:
+                            break
+                        candidates = by_address.get(sender[:2], [])
+                        if payload.startswith(UDP_PROBE_MAGIC):
+                            token = payload[len(UDP_PROBE_MAGIC):][:8]
+                            index = tokens.get(token)
+                            if index not in candidates:
+                                continue
+                        elif candidates:
+                            index = candidates[0]
+                        else:
+                            continue
+                        settle(index, None)
+                now = time.perf_counter()
+                while deadlines and (deadlines[0][1] not in sent or deadlines[0][0] <= now):
+                    _, index = heapq.heappop(deadlines)
+                    if index in sent:
+                        settle(index, 'timeout')
+        finally:
+            for sock in sockets.values():
+                sock.close()
+    return [result for result in results if result is not None]
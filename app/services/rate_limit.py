@@ -0,0 +1,100 @@
+"""Token-bucket rate limiting for probe dispatch."""
+import asyncio
+import time
+
+from app.domain.models import RegisteredNode
+
+
+class TokenBucket:
+    """Bucket refilled at `rate_per_s` tokens per second, holding up to `burst`.
+
+    Tokens are reserved up front and the balance may go negative, so waiters
+    are served in arrival order without polling.
+    """
+
+    def __init__(self, rate_per_s: float, burst: float) -> None:
+        self.rate_per_s = rate_per_s
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait to use it."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate_per_s
+
+    def refund(self) -> None:
+        """Return a reserved token whose caller gave up before using it."""
+        self._tokens = min(self.burst, self._tokens + 1)
+
+
+class ProbeRateLimiter:
+    """Per-region and per-host token buckets shared across probe cycles.
+
+    A rate of 0 disables limiting for that key type.
+    """
+
+    def __init__(
+        self,
+        host_rate_per_s: float = 0.0,
+        host_burst: float = 1.0,
+        region_rate_per_s: float = 0.0,
+        region_burst: float = 1.0,
+    ) -> None:
+        self.host_rate_per_s = host_rate_per_s
+        self.host_burst = host_burst
+        self.region_rate_per_s = region_rate_per_s
+        self.region_burst = region_burst
+        self._buckets: dict[tuple[str, str], TokenBucket] = {}
+        self.throttled_total = 0
+        self.wait_s_total = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.host_rate_per_s > 0 or self.region_rate_per_s > 0
+
+    async def acquire(self, node: RegisteredNode) -> None:
+        """Wait for a token from the node's region and host buckets.
+
+        A caller cancelled while waiting (e.g. at the cycle deadline) refunds
+        its reservations so the debt does not carry into later cycles.
+        """
+        wait_s = 0.0
+        charged: list[TokenBucket] = []
+        if self.region_rate_per_s > 0:
+            bucket = self._bucket('region', node.region, self.region_rate_per_s, self.region_burst)
+            wait_s = max(wait_s, bucket.reserve())
+            charged.append(bucket)
+        if self.host_rate_per_s > 0:
+            bucket = self._bucket('host', node.host, self.host_rate_per_s, self.host_burst)
+            wait_s = max(wait_s, bucket.reserve())
+            charged.append(bucket)
+        if wait_s > 0:
+            self.throttled_total += 1
+            self.wait_s_total += wait_s
+            try:
+                await asyncio.sleep(wait_s)
+            except asyncio.CancelledError:
+                for bucket in charged:
+                    bucket.refund()
+                raise
+
+    def stats(self) -> dict[str, object]:
+        return {
+            'enabled': self.enabled,
+            'buckets': len(self._buckets),
+            'throttled_total': self.throttled_total,
+            'wait_s_total': round(self.wait_s_total, 3),
+        }
+
+    def _bucket(self, kind: str, key: str, rate_per_s: float, burst: float) -> TokenBucket:
+        bucket = self._buckets.get((kind, key))
+        if bucket is None:
+            bucket = TokenBucket(rate_per_s, burst)
+            self._buckets[(kind, key)] = bucket
+        return bucket
@@ -0,0 +1,121 @@
+"""Hostname resolution cache for probe targets."""
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+
+@dataclass
+class _Entry:
+    addresses: tuple[str, ...]
+    expires_at: float
+    refresh_at: float
+
+
+class DNSCache:
+    """Caches every resolved address of a host, in resolver order, for `ttl_s` seconds.
+
+    Callers try the addresses in order, as `create_connection` would. Once an
+    entry is older than `refresh_ratio * ttl_s`, lookups still return the
+    cached addresses while a background thread re-resolves the host, so
+    probes only wait on the resolver for hosts that are new or fully expired.
+    IP literals bypass the cache. The system resolver does not expose record
+    TTLs, so a single configured TTL applies to every host.
+    """
+
+    def __init__(self, ttl_s: float = 60.0, refresh_ratio: float = 0.8) -> None:
+        self.ttl_s = ttl_s
+        self.refresh_ratio = refresh_ratio
+        self._entries: dict[str, _Entry] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='dns-refresh')
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def lookup(self, host: str) -> tuple[str, ...] | None:
+        """Return cached addresses for `host`, scheduling a refresh if it is due."""
+        if _is_ip_literal(host):
+            return (host,)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None or now >= entry.expires_at:
+                return None
+            self.hits += 1
+            if now >= entry.refresh_at and host not in self._refreshing:
+                self._refreshing.add(host)
+                self._executor.submit(self._refresh, host)
+            return entry.addresses
+
+    def resolve(self, host: str) -> tuple[str, ...]:
+        """Blocking resolve through the cache; raises `OSError` on failure."""
+        cached = self.lookup(host)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.misses += 1
+        return self._fetch(host)
+
+    async def resolve_async(self, host: str) -> tuple[str, ...]:
+        cached = self.lookup(host)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.misses += 1
+        return await asyncio.get_running_loop().run_in_executor(None, self._fetch, host)
+
+    def stats(self) -> dict[str, object]:
+        return {
+            'enabled': True,
+            'ttl_s': self.ttl_s,
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch(self, host: str) -> tuple[str, ...]:
+        try:
+            infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except OSError:
+            with self._lock:
+                self.errors += 1
+            raise
+        addresses = tuple(dict.fromkeys(info[4][0] for info in infos))
+        now = time.monotonic()
+        with self._lock:
+            self._entries[host] = _Entry(
+                addresses=addresses,
+                expires_at=now + self.ttl_s,
+                refresh_at=now + self.ttl_s * self.refresh_ratio,
+            )
+        return addresses
+
+    def _refresh(self, host: str) -> None:
+        try:
+            self._fetch(host)
+            with self._lock:
+                self.refreshes += 1
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(host)
+
+
+def _is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
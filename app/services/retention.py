@@ -0,0 +1,111 @@
+"""Background pruning of probe results past their retention policy."""
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime, timedelta
+
+
+class RetentionPruner:
+    """Periodically deletes results older than `max_age_s` or beyond `keep_per_node`.
+
+    Pruning runs off the insert path, on its own task, every `interval_s`.
+    Repositories delete in batches of `batch_size` rows so each write stays
+    short. A value of 0 disables that part of the policy.
+    """
+
+    def __init__(
+        self,
+        repository,
+        max_age_s: float = 0.0,
+        keep_per_node: int = 0,
+        interval_s: float = 300.0,
+        batch_size: int = 5000,
+    ) -> None:
+        self.repository = repository
+        self.max_age_s = max(0.0, max_age_s)
+        self.keep_per_node = max(0, keep_per_node)
+        self.interval_s = max(1.0, interval_s)
+        self.batch_size = max(1, batch_size)
+        self.runs = 0
+        self.rows_pruned_total = 0
+        self.last_rows_pruned: int | None = None
+        self.last_duration_ms: float | None = None
+        self.last_run: datetime | None = None
+        self.last_error: str | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._logger = logging.getLogger('netsentinel.retention')
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age_s > 0 or self.keep_per_node > 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running or not self.enabled:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> int:
+        """Apply the policy once and return the number of rows deleted."""
+        started = time.perf_counter()
+        older_than = None
+        if self.max_age_s > 0:
+            older_than = datetime.now(UTC) - timedelta(seconds=self.max_age_s)
+        try:
+            pruned = await asyncio.to_thread(
+                self.repository.prune_probe_results,
+                older_than=older_than,
+                keep_per_node=self.keep_per_node,
+                batch_size=self.batch_size,
+            )
+        except Exception as exc:
+            self.last_error = str(exc)
+            self._logger.error('retention_failed', extra={'error': self.last_error})
+            raise
+        self.runs += 1
+        self.rows_pruned_total += pruned
+        self.last_rows_pruned = pruned
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.last_run = datetime.now(UTC)
+        self.last_error = None
+        self._logger.info(
+            'retention_pruned',
+            extra={'duration_ms': self.last_duration_ms, 'rows_pruned': pruned},
+        )
+        return pruned
+
+    def stats(self) -> dict[str, object]:
+        return {
+            'enabled': self.enabled,
+            'max_age_s': self.max_age_s,
+            'keep_per_node': self.keep_per_node,
+            'runs': self.runs,
+            'rows_pruned_total': self.rows_pruned_total,
+            'last_rows_pruned': self.last_rows_pruned,
+            'last_duration_ms': self.last_duration_ms,
+            'last_run': None if self.last_run is None else self.last_run.isoformat(),
+            'last_error': self.last_error,
+        }
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(self.interval_s)
@@ -1,11 +1,27 @@
 import asyncio
+import hashlib
+import heapq
 import logging
+import multiprocessing
+import random
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import UTC, datetime
 
 from fastapi import FastAPI
 
-from app.api.probes import run_probe_cycle
+from app.api.probes import probe_targets, run_probe_cycle, run_sharded_probe_cycle
+from app.domain.models import ProbeResult, RegisteredNode
+from app.services.probe_engine import DEADLINE_EXCEEDED_ERROR
+
+HEAP_DISPATCH_MODES = ('due', 'staggered')
+
+
+def dispatch_phase(node_id: str) -> float:
+    """Deterministic position of a node inside its interval window, in [0, 1)."""
+    digest = hashlib.blake2b(node_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2**64
 
 
 class MonitoringScheduler:
@@ -21,12 +37,51 @@ class MonitoringScheduler:
         self.successful_cycles = 0
         self.failed_cycles = 0
         self.consecutive_failures = 0
+        self.last_cycle_partial = False
+        self.partial_cycles = 0
+        self.deadline_exceeded_probes = 0
+        self.dispatched_batches = 0
+        self.failed_batches = 0
+        self.last_batch_duration_ms: float | None = None
+        self._window_results: list[ProbeResult] = []
+        self._window_busy_s = 0.0
+        self._active_batches = 0
+        self._busy_since = 0.0
+        self.last_shard_timings: list[dict[str, object]] = []
+        self._executor: ProcessPoolExecutor | None = None
+        self._due_heap: list[tuple[float, str, float]] = []
+        self._window_start = 0.0
+        self._dispatches: deque[tuple[float, float]] = deque()
+        self._jitter = random.Random()
+        self._batches: set[asyncio.Task[None]] = set()
         self._logger = logging.getLogger('netsentinel.scheduler')
 
     @property
     def running(self) -> bool:
         return self._task is not None and not self._task.done()
 
+    @property
+    def dispatch_mode(self) -> str:
+        return getattr(self.app.state, 'scheduler_dispatch', 'cycle')
+
+    @property
+    def scheduled_nodes(self) -> int:
+        return len(self._due_heap)
+
+    def dispatch_stats(self) -> dict[str, float | None]:
+        """Achieved dispatch rate and lag over the last global interval."""
+        if self.dispatch_mode not in HEAP_DISPATCH_MODES:
+            return {'rate_per_s': None, 'lag_ms_avg': None, 'lag_ms_max': None}
+        now = time.monotonic()
+        self._trim_dispatches(now)
+        window_s = min(self.interval_s, max(now - self._window_start, 1e-3))
+        lags = [lag_ms for _, lag_ms in self._dispatches]
+        return {
+            'rate_per_s': round(len(lags) / window_s, 3),
+            'lag_ms_avg': round(sum(lags) / len(lags), 3) if lags else None,
+            'lag_ms_max': round(max(lags), 3) if lags else None,
+        }
+
     async def start(self) -> None:
         if self.running:
             return
@@ -43,45 +98,136 @@ class MonitoringScheduler:
         except asyncio.CancelledError:
             pass
         self._task = None
+        for batch in list(self._batches):
+            batch.cancel()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        self._due_heap = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def shard_count(self) -> int:
+        return getattr(self.app.state, 'probe_shards', 1)
+
+    def interval_for(self, node: RegisteredNode) -> float:
+        """Probe interval for a node: its own override, then its region's, then global."""
+        if node.probe_interval_s is not None:
+            return node.probe_interval_s
+        region_intervals = getattr(self.app.state, 'region_intervals', {})
+        return region_intervals.get(node.region, self.interval_s)
+
+    def _first_due(self, node: RegisteredNode, now: float) -> float:
+        interval = self.interval_for(node)
+        if self.dispatch_mode != 'staggered':
+            return now + interval
+        offset = self._window_start + dispatch_phase(node.node_id) * interval
+        if offset > now:
+            return offset
+        return offset + (int((now - offset) // interval) + 1) * interval
+
+    def _jittered(self, node: RegisteredNode, planned_at: float) -> float:
+        jitter_s = getattr(self.app.state, 'dispatch_jitter_s', 0.0)
+        if self.dispatch_mode != 'staggered' or jitter_s <= 0:
+            return planned_at
+        return planned_at + self._jitter.uniform(0, min(jitter_s, self.interval_for(node) / 2))
+
+    def _trim_dispatches(self, now: float) -> None:
+        while self._dispatches and self._dispatches[0][0] < now - self.interval_s:
+            self._dispatches.popleft()
 
     async def run_once(self) -> int:
         async with self._run_lock:
-            started = time.perf_counter()
-            self._logger.info('cycle_start')
-            try:
-                results = await asyncio.to_thread(run_probe_cycle, self.app, None)
-                self.last_cycle_duration_ms = round((time.perf_counter() - started) * 1000, 3)
-                self.last_run = datetime.now(UTC)
-                self.last_error = None
-                self.successful_cycles += 1
-                self.consecutive_failures = 0
-                up_count = sum(1 for result in results if result.status == 'up')
-                down_count = len(results) - up_count
-                self._logger.info(
-                    'cycle_complete',
-                    extra={
-                        'duration_ms': self.last_cycle_duration_ms,
-                        'probed_nodes': len(results),
-                        'up_count': up_count,
-                        'down_count': down_count,
-                    },
+            return await self._run_cycle()
+
+    async def _run_cycle(self) -> int:
+        started = time.perf_counter()
+        self._logger.info('cycle_start')
+        try:
+            if self.shard_count > 1:
+                results, self.last_shard_timings = await run_sharded_probe_cycle(
+                    self.app, self._get_executor(), self.shard_count
                 )
-                return len(results)
-            except Exception as exc:
-                self.last_cycle_duration_ms = round((time.perf_counter() - started) * 1000, 3)
-                self.last_error = str(exc)
-                self.failed_cycles += 1
-                self.consecutive_failures += 1
-                self._logger.error(
-                    'cycle_failed',
+            else:
+                results = await run_probe_cycle(self.app, None)
+            self.last_cycle_duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            self._tune_concurrency(time.perf_counter() - started, results)
+            self.last_run = datetime.now(UTC)
+            self.last_error = None
+            self.successful_cycles += 1
+            self.consecutive_failures = 0
+            up_count = sum(1 for result in results if result.status == 'up')
+            down_count = len(results) - up_count
+            overdue = sum(1 for result in results if result.error == DEADLINE_EXCEEDED_ERROR)
+            self.last_cycle_partial = overdue > 0
+            if overdue:
+                self.partial_cycles += 1
+                self.deadline_exceeded_probes += overdue
+                self._logger.warning(
+                    'cycle_partial',
                     extra={
                         'duration_ms': self.last_cycle_duration_ms,
-                        'error': self.last_error,
+                        'probed_nodes': len(results),
+                        'error': f'{overdue} probes exceeded the cycle deadline',
                     },
                 )
-                raise
+            self._logger.info(
+                'cycle_complete',
+                extra={
+                    'duration_ms': self.last_cycle_duration_ms,
+                    'probed_nodes': len(results),
+                    'up_count': up_count,
+                    'down_count': down_count,
+                },
+            )
+            return len(results)
+        except Exception as exc:
+            self.last_cycle_duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            self.last_error = str(exc)
+            self.failed_cycles += 1
+            self.consecutive_failures += 1
+            self._logger.error(
+                'cycle_failed',
+                extra={
+                    'duration_ms': self.last_cycle_duration_ms,
+                    'error': self.last_error,
+                },
+            )
+            raise
+
+    def concurrency_stats(self) -> dict[str, object]:
+        controller = getattr(self.app.state, 'concurrency_controller', None)
+        if controller is None:
+            return {'mode': 'fixed', 'limit': self.app.state.probe_concurrency}
+        return controller.stats()
+
+    def breaker_stats(self) -> dict[str, object]:
+        breaker = getattr(self.app.state, 'circuit_breaker', None)
+        if breaker is None:
+            return {'enabled': False}
+        return breaker.stats()
+
+    def _tune_concurrency(self, duration_s: float, results: list) -> None:
+        controller = getattr(self.app.state, 'concurrency_controller', None)
+        if controller is None:
+            return
+        self.app.state.probe_concurrency = controller.record_cycle(
+            duration_s, self.interval_s, results
+        )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.shard_count,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._executor
 
     async def _loop(self) -> None:
+        if self.dispatch_mode in HEAP_DISPATCH_MODES:
+            await self._due_loop()
+            return
         try:
             while not self._stop_event.is_set():
                 await asyncio.sleep(self.interval_s)
@@ -93,3 +239,128 @@ class MonitoringScheduler:
                     continue
         except asyncio.CancelledError:
             return
+
+    async def _due_loop(self) -> None:
+        """Dispatch each node when its own due time arrives.
+
+        Due times live in a min-heap keyed on monotonic time. In `due` mode a
+        node first fires one interval after it is scheduled; in `staggered` mode
+        it fires at a hash-derived phase of its interval window, plus optional
+        jitter, so probes spread evenly instead of bursting. The enabled-node
+        catalog is refreshed once per global interval, so new nodes join the
+        schedule and removed or disabled nodes drop out on their next pop.
+        """
+        catalog: dict[str, RegisteredNode] = {}
+        self._window_start = time.monotonic()
+        self._dispatches.clear()
+        next_refresh = 0.0
+        try:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                if now >= next_refresh:
+                    self._close_dispatch_window()
+                    catalog = await self._refresh_due_schedule(catalog, now)
+                    next_refresh = now + self.interval_s
+                due: list[RegisteredNode] = []
+                while self._due_heap and self._due_heap[0][0] <= now:
+                    dispatch_at, node_id, planned_at = heapq.heappop(self._due_heap)
+                    node = catalog.get(node_id)
+                    if node is None:
+                        continue
+                    due.append(node)
+                    self._dispatches.append((now, (now - dispatch_at) * 1000))
+                    interval = self.interval_for(node)
+                    next_planned = planned_at + interval
+                    if next_planned <= now:
+                        next_planned += (int((now - next_planned) // interval) + 1) * interval
+                    heapq.heappush(
+                        self._due_heap,
+                        (self._jittered(node, next_planned), node_id, next_planned),
+                    )
+                self._trim_dispatches(now)
+                if due:
+                    batch = asyncio.create_task(self._run_batch(due))
+                    self._batches.add(batch)
+                    batch.add_done_callback(self._batches.discard)
+                wake_at = next_refresh
+                if self._due_heap:
+                    wake_at = min(wake_at, self._due_heap[0][0])
+                await asyncio.sleep(max(0.0, wake_at - time.monotonic()))
+        except asyncio.CancelledError:
+            return
+
+    async def _refresh_due_schedule(
+        self,
+        catalog: dict[str, RegisteredNode],
+        now: float,
+    ) -> dict[str, RegisteredNode]:
+        try:
+            nodes = await asyncio.to_thread(self.app.state.repository.list_enabled_nodes)
+        except Exception as exc:
+            self.last_error = str(exc)
+            self._logger.error('schedule_refresh_failed', extra={'error': self.last_error})
+            return catalog
+        scheduled = {entry[1] for entry in self._due_heap}
+        refreshed = {node.node_id: node for node in nodes}
+        for node in nodes:
+            if node.node_id not in scheduled:
+                planned_at = self._first_due(node, now)
+                heapq.heappush(
+                    self._due_heap,
+                    (self._jittered(node, planned_at), node.node_id, planned_at),
+                )
+        self._due_heap = [entry for entry in self._due_heap if entry[1] in refreshed]
+        heapq.heapify(self._due_heap)
+        return refreshed
+
+    async def _run_batch(self, targets: list[RegisteredNode]) -> None:
+        """Probe one heap-dispatched batch.
+
+        Batches are counted apart from full cycles, and their results are
+        pooled into the current interval window so concurrency tuning sees
+        per-window totals rather than each small batch on its own.
+        """
+        started = time.perf_counter()
+        if self._active_batches == 0:
+            self._busy_since = started
+        self._active_batches += 1
+        try:
+            results = await probe_targets(self.app, targets, skip_open_breakers=True)
+        except Exception as exc:
+            self.failed_batches += 1
+            self.last_error = str(exc)
+            self._logger.debug('batch_failed', extra={'error': self.last_error})
+            return
+        finally:
+            finished = time.perf_counter()
+            self._active_batches -= 1
+            if self._active_batches == 0:
+                self._window_busy_s += finished - self._busy_since
+            self.last_batch_duration_ms = round((finished - started) * 1000, 3)
+        self.dispatched_batches += 1
+        self.last_run = datetime.now(UTC)
+        self.last_error = None
+        self._window_results.extend(results)
+        self.deadline_exceeded_probes += sum(
+            1 for result in results if result.error == DEADLINE_EXCEEDED_ERROR
+        )
+        self._logger.debug(
+            'batch_complete',
+            extra={'duration_ms': self.last_batch_duration_ms, 'probed_nodes': len(results)},
+        )
+
+    def _close_dispatch_window(self) -> None:
+        """Tune concurrency from the window's pooled batch results.
+
+        The window's duration is the time at least one batch was running, so
+        an interval spent entirely probing reads as an overrun.
+        """
+        busy_s = self._window_busy_s
+        if self._active_batches:
+            now = time.perf_counter()
+            busy_s += now - self._busy_since
+            self._busy_since = now
+        if self._window_results or busy_s > 0:
+            self._tune_concurrency(busy_s, self._window_results)
+        self._window_results = []
+        self._window_busy_s = 0.0
@@ -0,0 +1,90 @@
+"""Adaptive per-node probe timeouts derived from recent latency."""
+import math
+import threading
+from collections import deque
+
+from app.domain.models import ProbeResult, RegisteredNode
+
+
+class AdaptiveTimeouts:
+    """Per-node timeout of `p99(recent up latencies) * factor`, clamped to bounds.
+
+    Each node's latency window is loaded from the repository the first time
+    the node is probed and then updated incrementally from new results, so the
+    hot path never touches storage. Nodes without `min_samples` successful
+    probes fall back to `default_timeout_s`. A probe that times out doubles
+    the node's timeout (up to `max_timeout_s`) so a node whose latency has
+    risen past its window can still get an `up` sample back in.
+    """
+
+    def __init__(
+        self,
+        repository,
+        default_timeout_s: float,
+        factor: float = 3.0,
+        min_timeout_s: float = 0.1,
+        max_timeout_s: float = 10.0,
+        window: int = 50,
+        min_samples: int = 5,
+    ) -> None:
+        self.repository = repository
+        self.default_timeout_s = default_timeout_s
+        self.factor = factor
+        self.min_timeout_s = min_timeout_s
+        self.max_timeout_s = max(min_timeout_s, max_timeout_s)
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[float]] = {}
+        self._timeouts: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def timeout_for(self, node_id: str) -> float:
+        return self._timeouts.get(node_id, self.default_timeout_s)
+
+    def snapshot(self, nodes: list[RegisteredNode]) -> dict[str, float]:
+        return {node.node_id: self.timeout_for(node.node_id) for node in nodes}
+
+    def warm(self, nodes: list[RegisteredNode]) -> None:
+        """Load latency history for nodes that are not cached yet (blocking)."""
+        for node in nodes:
+            if node.node_id in self._samples:
+                continue
+            history = self.repository.list_probe_results(node_id=node.node_id, limit=self.window)
+            latencies = [result.latency_ms for result in reversed(history) if result.status == 'up']
+            with self._lock:
+                self._samples[node.node_id] = deque(latencies, maxlen=self.window)
+                self._recompute(node.node_id)
+
+    def observe(self, results: list[ProbeResult]) -> None:
+        with self._lock:
+            for result in results:
+                if result.error == 'timeout':
+                    if result.node_id in self._timeouts:
+                        self._timeouts[result.node_id] = min(
+                            self.max_timeout_s, self._timeouts[result.node_id] * 2
+                        )
+                    continue
+                if result.status != 'up':
+                    continue
+                samples = self._samples.setdefault(result.node_id, deque(maxlen=self.window))
+                samples.append(result.latency_ms)
+                self._recompute(result.node_id)
+
+    def stats(self) -> dict[str, object]:
+        return {
+            'mode': 'adaptive',
+            'cached_nodes': len(self._samples),
+            'adapted_nodes': len(self._timeouts),
+        }
+
+    def _recompute(self, node_id: str) -> None:
+        samples = self._samples[node_id]
+        if len(samples) < self.min_samples:
+            self._timeouts.pop(node_id, None)
+            return
+        ordered = sorted(samples)
+        p99_ms = ordered[math.ceil(0.99 * len(ordered)) - 1]
+        timeout_s = p99_ms / 1000 * self.factor
+        self._timeouts[node_id] = round(
+            min(self.max_timeout_s, max(self.min_timeout_s, timeout_s)), 3
+        )
@@ -1,9 +1,25 @@
-from datetime import UTC, datetime
+import heapq
+from datetime import UTC, datetime, timedelta
 from typing import Protocol
 
 from uuid import uuid4
 
-from app.domain.models import Node, ProbeResult, ProbeResultsSummary, RegisteredNode
+from app.domain.models import (
+    BreakerState,
+    Node,
+    ProbeResult,
+    ProbeResultsBucket,
+    ProbeResultsGroupSummary,
+    ProbeResultsSummary,
+    RegisteredNode,
+)
+from app.storage.sketch import LatencySketch, latency_quantiles
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+SKETCH_BUCKET_US = 60_000_000
+
+# Position of a result in `(checked_at, id)` order, newest first; used as a page cursor.
+ResultKey = tuple[datetime, int]
 
 
 class RepositoryError(Exception):
@@ -18,6 +34,54 @@ class RepositoryUnavailableError(RepositoryError):
     """Repository backend unavailable."""
 
 
+def summary_fields(
+    total_checks: int,
+    up_checks: int,
+    latency_sum: float,
+    last_checked_at: datetime | None,
+    sketch: LatencySketch,
+) -> dict[str, object]:
+    """`ProbeResultsSummary` fields from running totals, shared by both backends."""
+    availability_pct = 0.0
+    if total_checks > 0:
+        availability_pct = round((up_checks / total_checks) * 100, 3)
+    avg_latency_ms = None
+    if up_checks > 0:
+        avg_latency_ms = round(latency_sum / up_checks, 3)
+    return {
+        'total_checks': total_checks,
+        'up_checks': up_checks,
+        'down_checks': total_checks - up_checks,
+        'availability_pct': availability_pct,
+        'avg_latency_ms': avg_latency_ms,
+        **latency_quantiles(sketch),
+        'last_checked_at': last_checked_at,
+    }
+
+
+def results_bucket(
+    bucket_start: datetime,
+    total_checks: int,
+    up_checks: int,
+    avg_latency_ms: float | None,
+    min_latency_ms: float | None,
+    max_latency_ms: float | None,
+) -> ProbeResultsBucket:
+    availability_pct = 0.0
+    if total_checks > 0:
+        availability_pct = round((up_checks / total_checks) * 100, 3)
+    return ProbeResultsBucket(
+        bucket_start=bucket_start,
+        total_checks=total_checks,
+        up_checks=up_checks,
+        down_checks=total_checks - up_checks,
+        availability_pct=availability_pct,
+        avg_latency_ms=None if avg_latency_ms is None else round(avg_latency_ms, 3),
+        min_latency_ms=min_latency_ms,
+        max_latency_ms=max_latency_ms,
+    )
+
+
 class Repository(Protocol):
     def add_node(self, node: Node) -> RegisteredNode:
         ...
@@ -34,6 +98,9 @@ class Repository(Protocol):
     def add_probe_result(self, result: ProbeResult) -> None:
         ...
 
+    def add_probe_results(self, results: list[ProbeResult]) -> None:
+        ...
+
     def list_probe_results(
         self,
         node_id: str | None = None,
@@ -43,6 +110,16 @@ class Repository(Protocol):
     ) -> list[ProbeResult]:
         ...
 
+    def page_probe_results(
+        self,
+        node_id: str | None = None,
+        limit: int = 100,
+        checked_from: datetime | None = None,
+        checked_to: datetime | None = None,
+        before: ResultKey | None = None,
+    ) -> tuple[list[ProbeResult], ResultKey | None]:
+        ...
+
     def summarize_probe_results(
         self,
         node_id: str | None = None,
@@ -51,17 +128,64 @@ class Repository(Protocol):
     ) -> ProbeResultsSummary:
         ...
 
+    def summarize_probe_results_grouped(
+        self,
+        node_ids: list[str] | None = None,
+        checked_from: datetime | None = None,
+        checked_to: datetime | None = None,
+        group_by: str = 'node',
+    ) -> list[ProbeResultsGroupSummary]:
+        ...
+
+    def bucket_probe_results(
+        self,
+        node_id: str,
+        checked_from: datetime,
+        checked_to: datetime,
+        bucket_s: int,
+    ) -> list[ProbeResultsBucket]:
+        ...
+
+    def prune_probe_results(
+        self,
+        older_than: datetime | None = None,
+        keep_per_node: int = 0,
+        batch_size: int = 5000,
+    ) -> int:
+        ...
+
     def count_probe_results(self) -> int:
         ...
 
+    def list_breaker_states(self) -> list[BreakerState]:
+        ...
+
+    def save_breaker_states(self, states: list[BreakerState]) -> None:
+        ...
+
     def get_last_error(self) -> str | None:
         ...
 
+    def close(self) -> None:
+        ...
+
 
 class InMemoryRepository:
+    """In-process repository.
+
+    Up-latency quantile sketches are kept per node per minute, so summaries
+    merge whole minutes and add only the results at the range edges. Results
+    get increasing ids in `_result_ids`, parallel to `_results`, which break
+    ties between equal `checked_at` values the way SQLite's rowid does.
+    """
+
     def __init__(self) -> None:
         self._nodes: list[RegisteredNode] = []
         self._results: list[ProbeResult] = []
+        self._result_ids: list[int] = []
+        self._next_result_id = 1
+        self._breaker_states: dict[str, BreakerState] = {}
+        self._sketches: dict[tuple[str, int], LatencySketch] = {}
 
     def add_node(self, node: Node) -> RegisteredNode:
         stored = RegisteredNode(node_id=str(uuid4()), **node.model_dump())
@@ -81,7 +205,14 @@ class InMemoryRepository:
         return [node for node in self._nodes if node.enabled]
 
     def add_probe_result(self, result: ProbeResult) -> None:
-        self._results.append(result)
+        self.add_probe_results([result])
+
+    def add_probe_results(self, results: list[ProbeResult]) -> None:
+        first_id = self._next_result_id
+        self._next_result_id += len(results)
+        self._results.extend(results)
+        self._result_ids.extend(range(first_id, self._next_result_id))
+        self._sketch_results(results)
 
     def list_probe_results(
         self,
@@ -101,6 +232,40 @@ class InMemoryRepository:
             return ordered
         return ordered[:limit]
 
+    def page_probe_results(
+        self,
+        node_id: str | None = None,
+        limit: int = 100,
+        checked_from: datetime | None = None,
+        checked_to: datetime | None = None,
+        before: ResultKey | None = None,
+    ) -> tuple[list[ProbeResult], ResultKey | None]:
+        """Up to `limit` results strictly older than `before`, newest first.
+
+        Returns the page and the key to pass as `before` for the next page,
+        or None when this page is the last.
+        """
+        from_bound = self._normalize_datetime(checked_from)
+        to_bound = self._normalize_datetime(checked_to)
+        before_key = None
+        if before is not None:
+            before_key = (self._normalize_datetime(before[0]), before[1])
+        candidates = []
+        for result_id, result in zip(self._result_ids, self._results):
+            if node_id is not None and result.node_id != node_id:
+                continue
+            key = (self._normalize_datetime(result.checked_at), result_id)
+            if from_bound is not None and key[0] < from_bound:
+                continue
+            if to_bound is not None and key[0] > to_bound:
+                continue
+            if before_key is not None and key >= before_key:
+                continue
+            candidates.append((key, result))
+        page = heapq.nlargest(limit + 1, candidates, key=lambda item: item[0])
+        next_key = page[limit - 1][0] if len(page) > limit else None
+        return [result for _, result in page[:limit]], next_key
+
     def summarize_probe_results(
         self,
         node_id: str | None = None,
@@ -112,36 +277,203 @@ class InMemoryRepository:
             checked_from=checked_from,
             checked_to=checked_to,
         )
-        total_checks = len(results)
-        up_checks = sum(1 for result in results if result.status == 'up')
-        down_checks = total_checks - up_checks
-        availability_pct = 0.0
-        if total_checks > 0:
-            availability_pct = round((up_checks / total_checks) * 100, 3)
         up_latencies = [result.latency_ms for result in results if result.status == 'up']
-        avg_latency_ms = None
-        if up_latencies:
-            avg_latency_ms = round(sum(up_latencies) / len(up_latencies), 3)
         last_checked_at = None
         if results:
             last_checked_at = max(
                 self._normalize_datetime(result.checked_at) for result in results
             )
         return ProbeResultsSummary(
-            total_checks=total_checks,
-            up_checks=up_checks,
-            down_checks=down_checks,
-            availability_pct=availability_pct,
-            avg_latency_ms=avg_latency_ms,
-            last_checked_at=last_checked_at,
+            **summary_fields(
+                len(results),
+                len(up_latencies),
+                sum(up_latencies),
+                last_checked_at,
+                self._merge_sketches(results, node_id, checked_from, checked_to),
+            )
         )
 
+    def summarize_probe_results_grouped(
+        self,
+        node_ids: list[str] | None = None,
+        checked_from: datetime | None = None,
+        checked_to: datetime | None = None,
+        group_by: str = 'node',
+    ) -> list[ProbeResultsGroupSummary]:
+        """Summaries per node, or per region, in a single pass over the results."""
+        wanted = None if node_ids is None else set(node_ids)
+        group_of: dict[str, str] = {}
+        region_of: dict[str, str] = {}
+        for node in self._nodes:
+            if wanted is None or node.node_id in wanted:
+                key = node.region if group_by == 'region' else node.node_id
+                group_of[node.node_id] = key
+                region_of[key] = node.region
+        if group_by == 'region':
+            region_of = dict(sorted(region_of.items()))
+        totals = {key: [0, 0, 0.0, None, LatencySketch()] for key in region_of}
+        from_bound = self._normalize_datetime(checked_from)
+        to_bound = self._normalize_datetime(checked_to)
+        for result in self._results:
+            key = group_of.get(result.node_id)
+            if key is None:
+                continue
+            checked_at = self._normalize_datetime(result.checked_at)
+            if from_bound is not None and checked_at < from_bound:
+                continue
+            if to_bound is not None and checked_at > to_bound:
+                continue
+            group = totals[key]
+            group[0] += 1
+            if group[3] is None or checked_at > group[3]:
+                group[3] = checked_at
+            if result.status == 'up':
+                group[1] += 1
+                group[2] += result.latency_ms
+                group[4].add(result.latency_ms)
+        return [
+            ProbeResultsGroupSummary(
+                node_id=None if group_by == 'region' else key,
+                region=region,
+                **summary_fields(*totals[key]),
+            )
+            for key, region in region_of.items()
+        ]
+
+    def bucket_probe_results(
+        self,
+        node_id: str,
+        checked_from: datetime,
+        checked_to: datetime,
+        bucket_s: int,
+    ) -> list[ProbeResultsBucket]:
+        """Aggregate a node's results into epoch-aligned buckets in one pass."""
+        width_us = bucket_s * 1_000_000
+        buckets: dict[int, list] = {}
+        for result in self._filter_probe_results(node_id, checked_from, checked_to):
+            checked_at = self._to_epoch_us(result.checked_at)
+            start = checked_at - checked_at % width_us
+            bucket = buckets.get(start)
+            if bucket is None:
+                bucket = buckets[start] = [0, 0, 0.0, None, None]
+            bucket[0] += 1
+            if result.status == 'up':
+                latency_ms = result.latency_ms
+                bucket[1] += 1
+                bucket[2] += latency_ms
+                bucket[3] = latency_ms if bucket[3] is None else min(bucket[3], latency_ms)
+                bucket[4] = latency_ms if bucket[4] is None else max(bucket[4], latency_ms)
+        return [
+            results_bucket(
+                EPOCH + timedelta(microseconds=start),
+                total,
+                up,
+                None if up == 0 else latency_sum / up,
+                latency_min,
+                latency_max,
+            )
+            for start, (total, up, latency_sum, latency_min, latency_max) in sorted(
+                buckets.items()
+            )
+        ]
+
+    def prune_probe_results(
+        self,
+        older_than: datetime | None = None,
+        keep_per_node: int = 0,
+        batch_size: int = 5000,
+    ) -> int:
+        kept = list(zip(self._result_ids, self._results))
+        if older_than is not None:
+            cutoff = self._normalize_datetime(older_than)
+            kept = [
+                (result_id, result)
+                for result_id, result in kept
+                if self._normalize_datetime(result.checked_at) >= cutoff
+            ]
+        if keep_per_node > 0:
+            newest_first = sorted(
+                kept,
+                key=lambda item: (self._normalize_datetime(item[1].checked_at), item[0]),
+                reverse=True,
+            )
+            seen: dict[str, int] = {}
+            keep_ids = set()
+            for result_id, result in newest_first:
+                seen[result.node_id] = seen.get(result.node_id, 0) + 1
+                if seen[result.node_id] <= keep_per_node:
+                    keep_ids.add(result_id)
+            kept = [(result_id, result) for result_id, result in kept if result_id in keep_ids]
+        pruned = len(self._results) - len(kept)
+        if pruned:
+            self._result_ids = [result_id for result_id, _ in kept]
+            self._results = [result for _, result in kept]
+            self._sketches = {}
+            self._sketch_results(self._results)
+        return pruned
+
     def count_probe_results(self) -> int:
         return len(self._results)
 
+    def list_breaker_states(self) -> list[BreakerState]:
+        return list(self._breaker_states.values())
+
+    def save_breaker_states(self, states: list[BreakerState]) -> None:
+        for state in states:
+            if state.consecutive_failures == 0:
+                self._breaker_states.pop(state.node_id, None)
+            else:
+                self._breaker_states[state.node_id] = state
+
     def get_last_error(self) -> str | None:
         return None
 
+    def close(self) -> None:
+        return None
+
+    def _sketch_results(self, results: list[ProbeResult]) -> None:
+        for result in results:
+            if result.status != 'up':
+                continue
+            checked_at = self._to_epoch_us(result.checked_at)
+            key = (result.node_id, checked_at - checked_at % SKETCH_BUCKET_US)
+            sketch = self._sketches.get(key)
+            if sketch is None:
+                sketch = self._sketches[key] = LatencySketch()
+            sketch.add(result.latency_ms)
+
+    def _merge_sketches(
+        self,
+        results: list[ProbeResult],
+        node_id: str | None,
+        checked_from: datetime | None,
+        checked_to: datetime | None,
+    ) -> LatencySketch:
+        """Merge minute sketches inside the range; sketch edge results one by one."""
+        first = 0
+        if checked_from is not None:
+            first = -(-self._to_epoch_us(checked_from) // SKETCH_BUCKET_US) * SKETCH_BUCKET_US
+        last = None
+        if checked_to is not None:
+            last = (self._to_epoch_us(checked_to) + 1) // SKETCH_BUCKET_US * SKETCH_BUCKET_US
+        merged = LatencySketch()
+        for (sketch_node_id, bucket_start), sketch in self._sketches.items():
+            if node_id is not None and sketch_node_id != node_id:
+                continue
+            if bucket_start >= first and (last is None or bucket_start < last):
+                merged.merge(sketch)
+        for result in results:
+            if result.status != 'up':
+                continue
+            checked_at = self._to_epoch_us(result.checked_at)
+            if checked_at < first or (last is not None and checked_at >= last):
+                merged.add(result.latency_ms)
+        return merged
+
+    @classmethod
+    def _to_epoch_us(cls, value: datetime) -> int:
+        return (cls._normalize_datetime(value) - EPOCH) // timedelta(microseconds=1)
+
     def _filter_probe_results(
         self,
         node_id: str | None,
@@ -0,0 +1,145 @@
+"""Mergeable latency quantile sketch (DDSketch-style log buckets)."""
+import math
+import struct
+
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_MAX_BINS = 2048
+SKETCH_MIN_VALUE_MS = 1e-3
+_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+_HEADER = struct.Struct('<IiI')
+
+
+class LatencySketch:
+    """Counts values in logarithmic bins so any quantile is within 1% of the true value.
+
+    Bin `i` covers (gamma**(i-1), gamma**i]. Values at or below
+    `SKETCH_MIN_VALUE_MS` are counted in a zero bin. Two sketches merge by
+    adding their bin counts, so sketches kept per bucket can be combined for
+    any range. Memory is capped at `SKETCH_MAX_BINS`; past that the lowest
+    bins are folded together, which only coarsens the low quantiles.
+    """
+
+    __slots__ = ('zero_count', 'offset', 'bins')
+
+    def __init__(self) -> None:
+        self.zero_count = 0
+        self.offset = 0
+        self.bins: list[int] = []
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins)
+
+    def add(self, value: float) -> None:
+        if value <= SKETCH_MIN_VALUE_MS:
+            self.zero_count += 1
+            return
+        self._add_to_bin(math.ceil(math.log(value) / _LOG_GAMMA), 1)
+
+    def merge(self, other: 'LatencySketch') -> None:
+        self.zero_count += other.zero_count
+        for position, count in enumerate(other.bins):
+            if count:
+                self._add_to_bin(other.offset + position, count)
+
+    def quantile(self, q: float) -> float | None:
+        total = self.count
+        if total == 0:
+            return None
+        # Nearest-rank: the smallest value with at least q of the samples at or below it.
+        rank = max(0, math.ceil(q * total) - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for position, count in enumerate(self.bins):
+            seen += count
+            if seen > rank:
+                return 2 * _GAMMA ** (self.offset + position) / (_GAMMA + 1)
+        return 2 * _GAMMA ** (self.offset + len(self.bins) - 1) / (_GAMMA + 1)
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.zero_count, self.offset, len(self.bins)) + struct.pack(
+            f'<{len(self.bins)}I', *self.bins
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'LatencySketch':
+        sketch = cls()
+        sketch.zero_count, sketch.offset, size = _HEADER.unpack_from(data)
+        sketch.bins = list(struct.unpack_from(f'<{size}I', data, _HEADER.size))
+        return sketch
+
+    def _add_to_bin(self, index: int, count: int) -> None:
+        if not self.bins:
+            self.offset = index
+            self.bins.append(count)
+            return
+        if index < self.offset:
+            if len(self.bins) + self.offset - index > SKETCH_MAX_BINS:
+                self.bins[0] += count
+                return
+            self.bins[:0] = [0] * (self.offset - index)
+            self.offset = index
+        elif index >= self.offset + len(self.bins):
+            self.bins.extend([0] * (index - self.offset - len(self.bins) + 1))
+            overflow = len(self.bins) - SKETCH_MAX_BINS
+            if overflow > 0:
+                folded = sum(self.bins[: overflow + 1])
+                del self.bins[:overflow]
+                self.bins[0] = folded
+                self.offset += overflow
+        self.bins[index - self.offset] += count
+
+
+def latency_quantiles(sketch: LatencySketch) -> dict[str, float | None]:
+    """p50/p95/p99 fields for `ProbeResultsSummary`."""
+    quantiles = {}
+    for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+        value = sketch.quantile(q)
+        quantiles[f'{name}_latency_ms'] = None if value is None else round(value, 3)
+    return quantiles
+
+
+def merge_sketch_bytes(left: bytes | None, right: bytes | None) -> bytes | None:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    sketch = LatencySketch.from_bytes(left)
+    sketch.merge(LatencySketch.from_bytes(right))
+    return sketch.to_bytes()
+
+
+class SketchUnion:
+    """SQLite aggregate merging serialized sketches; NULLs are skipped."""
+
+    def __init__(self) -> None:
+        self.sketch: LatencySketch | None = None
+
+    def step(self, data: bytes | None) -> None:
+        if data is None:
+            return
+        if self.sketch is None:
+            self.sketch = LatencySketch()
+        self.sketch.merge(LatencySketch.from_bytes(data))
+
+    def finalize(self) -> bytes | None:
+        return None if self.sketch is None else self.sketch.to_bytes()
+
+
+class SketchOf:
+    """SQLite aggregate building a sketch from latency values; NULLs are skipped."""
+
+    def __init__(self) -> None:
+        self.sketch: LatencySketch | None = None
+
+    def step(self, value: float | None) -> None:
+        if value is None:
+            return
+        if self.sketch is None:
+            self.sketch = LatencySketch()
+        self.sketch.add(value)
+
+    def finalize(self) -> bytes | None:
+        return None if self.sketch is None else self.sketch.to_bytes()
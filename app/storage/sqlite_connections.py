@@ -0,0 +1,198 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+class SQLiteConnectionManager:
+    """Long-lived SQLite connections: one writer thread plus a pool of readers.
+
+    The database runs in WAL mode, so readers see the last committed state
+    without waiting for writes. Writes are queued to a single writer thread,
+    which commits up to `group_commit_max` queued writes in one transaction,
+    waiting at most `group_commit_delay_s` for more to arrive. Each write runs
+    under its own savepoint, so a failing write is rolled back alone and its
+    caller's future carries the exception. Connections and the writer thread
+    start lazily and come back on demand after `close()`. `cache_size`
+    follows SQLite's convention: negative values are KiB. `on_connect` runs
+    on every new connection, e.g. to register SQL functions.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        reader_pool_size: int = 4,
+        synchronous: str = 'NORMAL',
+        cache_size: int = -16000,
+        mmap_size: int = 0,
+        group_commit_max: int = 256,
+        group_commit_delay_s: float = 0.002,
+        on_connect: Callable[[sqlite3.Connection], None] | None = None,
+    ) -> None:
+        self._db_path = db_path
+        self._on_connect = on_connect
+        synchronous = synchronous.upper()
+        self._synchronous = synchronous if synchronous in SYNCHRONOUS_MODES else 'NORMAL'
+        self._cache_size = int(cache_size)
+        self._mmap_size = max(0, int(mmap_size))
+        self._group_commit_max = max(1, group_commit_max)
+        self._group_commit_delay_s = max(0.0, group_commit_delay_s)
+        self._writes: queue.Queue[tuple[Callable, Future] | None] = queue.Queue()
+        self._writer_thread: threading.Thread | None = None
+        self._writer_start_lock = threading.Lock()
+        self._idle_readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max(1, reader_pool_size))
+        self.commits = 0
+        self.writes = 0
+
+    def submit(self, fn: Callable[[sqlite3.Connection], object]) -> Future:
+        """Queue `fn` to run on the writer connection; the future holds its result."""
+        future: Future = Future()
+        if threading.current_thread() is self._writer_thread:
+            raise RuntimeError('Nested SQLite writes are not supported')
+        with self._writer_start_lock:
+            self._writes.put((fn, future))
+            if self._writer_thread is None:
+                self._start_writer()
+        return future
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection from the pool."""
+        with self._reader_slots:
+            try:
+                conn = self._idle_readers.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+                conn.execute('PRAGMA query_only = ON')
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle_readers.put(conn)
+
+    def close(self) -> None:
+        with self._writer_start_lock:
+            writer_thread = self._writer_thread
+            if writer_thread is not None:
+                self._writes.put(None)
+        if writer_thread is not None:
+            writer_thread.join()
+        while True:
+            try:
+                self._idle_readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self) -> dict[str, int]:
+        return {'commits': self.commits, 'writes': self.writes}
+
+    def _start_writer(self) -> None:
+        self._writer_thread = threading.Thread(
+            target=self._write_loop, name='sqlite-writer', daemon=True
+        )
+        self._writer_thread.start()
+
+    def _write_loop(self) -> None:
+        try:
+            conn = self._open()
+            conn.isolation_level = None
+            conn.execute('PRAGMA journal_mode = WAL')
+        except sqlite3.Error as exc:
+            self._retire_writer(exc)
+            return
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                self._commit_batch(conn, batch)
+        finally:
+            conn.close()
+        self._retire_writer(None)
+
+    def _retire_writer(self, exc: sqlite3.Error | None) -> None:
+        # Runs under the start lock, so every write queued before this point
+        # is either failed here or handed to a fresh writer thread.
+        with self._writer_start_lock:
+            if self._writer_thread is threading.current_thread():
+                self._writer_thread = None
+            if exc is not None:
+                while True:
+                    try:
+                        item = self._writes.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[1].set_exception(exc)
+            elif self._writer_thread is None and not self._writes.empty():
+                self._start_writer()
+
+    def _next_batch(self) -> list[tuple[Callable, Future]] | None:
+        first = self._writes.get()
+        if first is None:
+            return None
+        batch = [first]
+        flush_at = time.monotonic() + self._group_commit_delay_s
+        while len(batch) < self._group_commit_max:
+            try:
+                item = self._writes.get(timeout=max(0.0, flush_at - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch, then let the loop see the stop marker.
+                self._writes.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _commit_batch(
+        self,
+        conn: sqlite3.Connection,
+        batch: list[tuple[Callable, Future]],
+    ) -> None:
+        outcomes: list[tuple[Future, object, Exception | None]] = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, future in batch:
+                conn.execute('SAVEPOINT write')
+                try:
+                    outcome = fn(conn)
+                except Exception as exc:
+                    conn.execute('ROLLBACK TO write')
+                    conn.execute('RELEASE write')
+                    outcomes.append((future, None, exc))
+                else:
+                    conn.execute('RELEASE write')
+                    outcomes.append((future, outcome, None))
+            conn.execute('COMMIT')
+        except sqlite3.Error as exc:
+            if conn.in_transaction:
+                conn.rollback()
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        self.commits += 1
+        self.writes += len(batch)
+        for future, outcome, exc in outcomes:
+            if exc is None:
+                future.set_result(outcome)
+            else:
+                future.set_exception(exc)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, timeout=5.0, check_same_thread=False)
+        conn.execute('PRAGMA busy_timeout = 5000')
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute(f'PRAGMA synchronous = {self._synchronous}')
+        conn.execute(f'PRAGMA cache_size = {self._cache_size}')
+        conn.execute(f'PRAGMA mmap_size = {self._mmap_size}')
+        if self._on_connect is not None:
+            self._on_connect(conn)
+        return conn
@@ -1,25 +1,127 @@
+import json
 import sqlite3
-import threading
 import time
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from uuid import uuid4
 
-from app.domain.models import Node, ProbeResult, RegisteredNode
-from app.domain.models import ProbeResultsSummary
+from app.domain.models import BreakerState, Node, ProbeResult, RegisteredNode
+from app.domain.models import (
+    ProbeResultsBucket,
+    ProbeResultsGroupSummary,
+    ProbeResultsSummary,
+)
 from app.storage.repository import (
     RepositoryDuplicateError,
     RepositoryUnavailableError,
+    ResultKey,
+    results_bucket,
+    summary_fields,
+)
+from app.storage.sketch import (
+    LatencySketch,
+    SketchOf,
+    SketchUnion,
+    merge_sketch_bytes,
+)
+from app.storage.sqlite_connections import SQLiteConnectionManager
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+STATUS_CODES = {'down': 0, 'up': 1}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+MIGRATION_BATCH_ROWS = 10_000
+RESULT_COLUMNS = (
+    'burst_size', 'latency_min_ms', 'latency_median_ms', 'latency_p95_ms',
+    'jitter_ms', 'loss_ratio', 'dns_ms', 'connect_ms', 'tls_ms', 'status_code',
+)
+RESULT_SELECT = (
+    'SELECT r.id, n.node_id, r.status, r.latency_ms, r.checked_at, e.error, '
+    + ', '.join(f'r.{column}' for column in RESULT_COLUMNS)
+    + ' FROM probe_results AS r'
+    ' JOIN nodes AS n ON n.node_key = r.node_key'
+    ' LEFT JOIN error_codes AS e ON e.error_key = r.error_key'
+)
+RESULT_INSERT = (
+    'INSERT INTO probe_results(node_key, status, latency_ms, checked_at, error_key, '
+    + ', '.join(RESULT_COLUMNS)
+    + ') VALUES (' + ', '.join('?' * (5 + len(RESULT_COLUMNS))) + ')'
+)
+ROLLUP_WIDTHS_S = (60, 3600, 86400)
+OPEN_END_US = 2**62
+ROLLUP_INSERT = (
+    'INSERT INTO probe_rollups(width_s, node_key, bucket_start, total_checks, up_checks, '
+    'latency_sum, latency_min, latency_max, last_checked_at, latency_sketch) '
+)
+ROLLUP_UPSERT = (
+    ROLLUP_INSERT
+    + 'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+    'ON CONFLICT(width_s, node_key, bucket_start) DO UPDATE SET '
+    'total_checks = total_checks + excluded.total_checks, '
+    'up_checks = up_checks + excluded.up_checks, '
+    'latency_sum = latency_sum + excluded.latency_sum, '
+    'latency_min = MIN(COALESCE(latency_min, excluded.latency_min), '
+    'COALESCE(excluded.latency_min, latency_min)), '
+    'latency_max = MAX(COALESCE(latency_max, excluded.latency_max), '
+    'COALESCE(excluded.latency_max, latency_max)), '
+    'last_checked_at = MAX(last_checked_at, excluded.last_checked_at), '
+    'latency_sketch = sketch_merge(latency_sketch, excluded.latency_sketch)'
+)
+# Minute buckets are built from raw rows; hours from minutes and days from hours.
+ROLLUP_FROM_RESULTS = (
+    ROLLUP_INSERT
+    + 'SELECT :width_s, node_key, checked_at - checked_at % :width_us, COUNT(*), '
+    'SUM(status), TOTAL(CASE WHEN status = 1 THEN latency_ms END), '
+    'MIN(CASE WHEN status = 1 THEN latency_ms END), '
+    'MAX(CASE WHEN status = 1 THEN latency_ms END), MAX(checked_at), '
+    'sketch_of(CASE WHEN status = 1 THEN latency_ms END) '
+    'FROM probe_results WHERE {where} '
+    'GROUP BY node_key, checked_at - checked_at % :width_us'
+)
+ROLLUP_FROM_FINER = (
+    ROLLUP_INSERT
+    + 'SELECT :width_s, node_key, bucket_start - bucket_start % :width_us, '
+    'SUM(total_checks), SUM(up_checks), SUM(latency_sum), MIN(latency_min), '
+    'MAX(latency_max), MAX(last_checked_at), sketch_union(latency_sketch) '
+    'FROM probe_rollups WHERE width_s = :finer_s AND {where} '
+    'GROUP BY node_key, bucket_start - bucket_start % :width_us'
 )
 
 
 class SQLiteRepository:
-    SCHEMA_VERSION = 1
+    """SQLite-backed repository.
+
+    Probe results use a compact layout: an integer `node_key` instead of the
+    node's UUID, `checked_at` as epoch microseconds, status as 0/1 and error
+    strings interned in `error_codes`. `probe_rollups` keeps per-node minute,
+    hour and day aggregates in step with every insert and prune, so summaries
+    read rollups for whole buckets and raw rows only at the edges. Each rollup
+    carries a serialized `LatencySketch`; the `sketch_*` SQL functions merge
+    them for latency quantiles.
+    """
+
+    SCHEMA_VERSION = 11
 
-    def __init__(self, db_path: str, retention_per_node: int = 0) -> None:
+    def __init__(
+        self,
+        db_path: str,
+        reader_pool_size: int = 4,
+        synchronous: str = 'NORMAL',
+        cache_size: int = -16000,
+        mmap_size: int = 0,
+        group_commit_max: int = 256,
+        group_commit_delay_s: float = 0.002,
+    ) -> None:
         self._db_path = db_path
-        self._lock = threading.RLock()
-        self._retention_per_node = max(0, retention_per_node)
+        self._connections = SQLiteConnectionManager(
+            db_path,
+            reader_pool_size=reader_pool_size,
+            synchronous=synchronous,
+            cache_size=cache_size,
+            mmap_size=mmap_size,
+            group_commit_max=group_commit_max,
+            group_commit_delay_s=group_commit_delay_s,
+            on_connect=self._register_functions,
+        )
         self._last_error: str | None = None
 
     def initialize(self) -> None:
@@ -41,8 +143,14 @@ class SQLiteRepository:
         def write(conn: sqlite3.Connection) -> None:
             conn.execute(
                 """
-                INSERT INTO nodes(node_id, name, host, port, region, enabled)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO nodes(
+                    node_id, name, host, port, region, enabled, probe_interval_s,
+                    probe_type, http_path, node_key
+                )
+                VALUES (
+                    ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                    (SELECT COALESCE(MAX(node_key), 0) + 1 FROM nodes)
+                )
                 """,
                 (
                     stored.node_id,
@@ -51,6 +159,9 @@ class SQLiteRepository:
                     stored.port,
                     stored.region,
                     1 if stored.enabled else 0,
+                    stored.probe_interval_s,
+                    stored.probe_type,
+                    stored.http_path,
                 ),
             )
         self._run_write(write)
@@ -61,7 +172,8 @@ class SQLiteRepository:
             conn.row_factory = sqlite3.Row
             return conn.execute(
                 """
-                SELECT node_id, name, host, port, region, enabled
+                SELECT node_id, name, host, port, region, enabled, probe_interval_s,
+                    probe_type, http_path
                 FROM nodes
                 ORDER BY rowid ASC
                 """
@@ -74,7 +186,8 @@ class SQLiteRepository:
             conn.row_factory = sqlite3.Row
             return conn.execute(
                 """
-                SELECT node_id, name, host, port, region, enabled
+                SELECT node_id, name, host, port, region, enabled, probe_interval_s,
+                    probe_type, http_path
                 FROM nodes
                 WHERE node_id = ?
                 """,
@@ -90,7 +203,8 @@ class SQLiteRepository:
             conn.row_factory = sqlite3.Row
             return conn.execute(
                 """
-                SELECT node_id, name, host, port, region, enabled
+                SELECT node_id, name, host, port, region, enabled, probe_interval_s,
+                    probe_type, http_path
                 FROM nodes
                 WHERE enabled = 1
                 ORDER BY rowid ASC
@@ -100,35 +214,107 @@ class SQLiteRepository:
         return [self._row_to_node(row) for row in rows]
 
     def add_probe_result(self, result: ProbeResult) -> None:
-        checked_at = result.checked_at.astimezone(UTC).isoformat()
+        self.add_probe_results([result])
+
+    def add_probe_results(self, results: list[ProbeResult]) -> None:
+        """Insert a batch of results in one transaction.
+
+        Node keys and interned error codes are resolved once per batch, and
+        the batch is folded into one rollup upsert per touched bucket.
+        Retention is not applied here; see `prune_probe_results`.
+        """
+        if not results:
+            return
+        node_ids = json.dumps(sorted({result.node_id for result in results}))
+        errors = sorted({result.error for result in results if result.error is not None})
         def write(conn: sqlite3.Connection) -> None:
-            conn.execute(
-                """
-                INSERT INTO probe_results(node_id, status, latency_ms, checked_at, error)
-                VALUES (?, ?, ?, ?, ?)
-                """,
+            node_keys = dict(
+                conn.execute(
+                    'SELECT node_id, node_key FROM nodes '
+                    'WHERE node_id IN (SELECT value FROM json_each(?))',
+                    (node_ids,),
+                ).fetchall()
+            )
+            error_keys = self._intern_errors(conn, errors)
+            rows = [
                 (
-                    result.node_id,
-                    result.status,
+                    node_keys.get(result.node_id),
+                    STATUS_CODES[result.status],
                     result.latency_ms,
-                    checked_at,
-                    result.error,
-                ),
-            )
-            if self._retention_per_node > 0:
-                conn.execute(
+                    self._to_epoch_us(result.checked_at),
+                    error_keys.get(result.error),
+                    *(getattr(result, column) for column in RESULT_COLUMNS),
+                )
+                for result in results
+            ]
+            conn.executemany(RESULT_INSERT, rows)
+            conn.executemany(ROLLUP_UPSERT, self._fold_rollups(rows))
+        self._run_write(write)
+
+    def prune_probe_results(
+        self,
+        older_than: datetime | None = None,
+        keep_per_node: int = 0,
+        batch_size: int = 5000,
+    ) -> int:
+        """Delete results older than `older_than` or beyond the newest `keep_per_node`.
+
+        Each batch of at most `batch_size` rows is its own write, so pruning a
+        large backlog never holds the writer for long. Age-based pruning walks
+        rowid ranges below the cutoff; count-based pruning repeats a bounded
+        windowed DELETE until a short batch shows nothing is left. Rollup
+        buckets touched by a batch are rebuilt in the same transaction.
+        """
+        batch_size = max(1, batch_size)
+        pruned = 0
+        if older_than is not None:
+            cutoff = self._to_epoch_us(self._normalize_datetime(older_than))
+            def bounds(conn: sqlite3.Connection) -> tuple[int | None, int | None]:
+                row = conn.execute(
+                    'SELECT MIN(id), MAX(id) FROM probe_results WHERE checked_at < ?',
+                    (cutoff,),
+                ).fetchone()
+                return row[0], row[1]
+            low, high = self._run_read(bounds)
+            if low is not None:
+                for start in range(low, high + 1, batch_size):
+                    def delete_range(conn: sqlite3.Connection, start=start) -> int:
+                        deleted = conn.execute(
+                            'DELETE FROM probe_results '
+                            'WHERE id >= ? AND id < ? AND checked_at < ? '
+                            'RETURNING node_key, checked_at',
+                            (start, start + batch_size, cutoff),
+                        ).fetchall()
+                        self._rebuild_rollups(conn, deleted)
+                        return len(deleted)
+                    pruned += self._run_write(delete_range)
+        if keep_per_node > 0:
+            def delete_surplus(conn: sqlite3.Connection) -> int:
+                deleted = conn.execute(
                     """
                     DELETE FROM probe_results
                     WHERE id IN (
-                        SELECT id FROM probe_results
-                        WHERE node_id = ?
-                        ORDER BY checked_at DESC, id DESC
-                        LIMIT -1 OFFSET ?
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY node_key ORDER BY checked_at DESC, id DESC
+                            ) AS position
+                            FROM probe_results
+                        )
+                        WHERE position > ?
+                        LIMIT ?
                     )
+                    RETURNING node_key, checked_at
                     """,
-                    (result.node_id, self._retention_per_node),
-                )
-        self._run_write(write)
+                    (keep_per_node, batch_size),
+                ).fetchall()
+                self._rebuild_rollups(conn, deleted)
+                return len(deleted)
+            while True:
+                deleted = self._run_write(delete_surplus)
+                pruned += deleted
+                if deleted < batch_size:
+                    break
+        return pruned
 
     def count_probe_results(self) -> int:
         def read(conn: sqlite3.Connection) -> int:
@@ -136,6 +322,60 @@ class SQLiteRepository:
             return int(row[0])
         return self._run_read(read)
 
+    def list_breaker_states(self) -> list[BreakerState]:
+        def read(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                """
+                SELECT node_id, consecutive_failures, backoff_s, open_until
+                FROM node_breakers
+                """
+            ).fetchall()
+        rows = self._run_read(read)
+        return [
+            BreakerState(
+                node_id=row['node_id'],
+                consecutive_failures=row['consecutive_failures'],
+                backoff_s=row['backoff_s'],
+                open_until=(
+                    datetime.fromisoformat(row['open_until'])
+                    if row['open_until'] is not None
+                    else None
+                ),
+            )
+            for row in rows
+        ]
+
+    def save_breaker_states(self, states: list[BreakerState]) -> None:
+        def write(conn: sqlite3.Connection) -> None:
+            for state in states:
+                if state.consecutive_failures == 0:
+                    conn.execute(
+                        'DELETE FROM node_breakers WHERE node_id = ?',
+                        (state.node_id,),
+                    )
+                    continue
+                open_until = self._normalize_datetime(state.open_until)
+                conn.execute(
+                    """
+                    INSERT INTO node_breakers(
+                        node_id, consecutive_failures, backoff_s, open_until
+                    )
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(node_id) DO UPDATE SET
+                        consecutive_failures = excluded.consecutive_failures,
+                        backoff_s = excluded.backoff_s,
+                        open_until = excluded.open_until
+                    """,
+                    (
+                        state.node_id,
+                        state.consecutive_failures,
+                        state.backoff_s,
+                        None if open_until is None else open_until.isoformat(),
+                    ),
+                )
+        self._run_write(write)
+
     def list_probe_results(
         self,
         node_id: str | None = None,
@@ -143,29 +383,11 @@ class SQLiteRepository:
         checked_from: datetime | None = None,
         checked_to: datetime | None = None,
     ) -> list[ProbeResult]:
-        query = (
-            "SELECT node_id, status, latency_ms, checked_at, error "
-            "FROM probe_results"
-        )
-        params: list[object] = []
-        conditions: list[str] = []
-
-        if node_id is not None:
-            conditions.append('node_id = ?')
-            params.append(node_id)
-        from_bound = self._normalize_datetime(checked_from)
-        if from_bound is not None:
-            conditions.append('checked_at >= ?')
-            params.append(from_bound.isoformat())
-        to_bound = self._normalize_datetime(checked_to)
-        if to_bound is not None:
-            conditions.append('checked_at <= ?')
-            params.append(to_bound.isoformat())
+        conditions, params = self._result_filters(node_id, checked_from, checked_to)
+        query = RESULT_SELECT
         if conditions:
             query += ' WHERE ' + ' AND '.join(conditions)
-
-        query += ' ORDER BY checked_at DESC'
-
+        query += ' ORDER BY r.checked_at DESC, r.id DESC'
         if limit is not None:
             query += ' LIMIT ?'
             params.append(limit)
@@ -174,17 +396,41 @@ class SQLiteRepository:
             conn.row_factory = sqlite3.Row
             return conn.execute(query, params).fetchall()
         rows = self._run_read(read)
+        return [self._row_to_result(row) for row in rows]
 
-        return [
-            ProbeResult(
-                node_id=row['node_id'],
-                status=row['status'],
-                latency_ms=row['latency_ms'],
-                checked_at=datetime.fromisoformat(row['checked_at']),
-                error=row['error'],
-            )
-            for row in rows
-        ]
+    def page_probe_results(
+        self,
+        node_id: str | None = None,
+        limit: int = 100,
+        checked_from: datetime | None = None,
+        checked_to: datetime | None = None,
+        before: ResultKey | None = None,
+    ) -> tuple[list[ProbeResult], ResultKey | None]:
+        """Keyset page over `(checked_at, id)`, newest first.
+
+        The row-value bound lets SQLite seek straight into
+        `idx_probe_results_node_checked_at` (or `idx_probe_results_checked_at`
+        without a node filter), so every page costs the same however deep.
+        """
+        conditions, params = self._result_filters(node_id, checked_from, checked_to)
+        if before is not None:
+            conditions.append('(r.checked_at, r.id) < (?, ?)')
+            params.extend([self._to_epoch_us(before[0]), before[1]])
+        query = RESULT_SELECT
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY r.checked_at DESC, r.id DESC LIMIT ?'
+        params.append(limit + 1)
+
+        def read(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(query, params).fetchall()
+        rows = self._run_read(read)
+        next_key = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_key = (self._from_epoch_us(last['checked_at']), last['id'])
+        return [self._row_to_result(row) for row in rows[:limit]], next_key
 
     def summarize_probe_results(
         self,
@@ -192,58 +438,105 @@ class SQLiteRepository:
         checked_from: datetime | None = None,
         checked_to: datetime | None = None,
     ) -> ProbeResultsSummary:
-        query = (
-            'SELECT '
-            'COUNT(*) AS total_checks, '
-            "SUM(CASE WHEN status = 'up' THEN 1 ELSE 0 END) AS up_checks, "
-            "SUM(CASE WHEN status = 'down' THEN 1 ELSE 0 END) AS down_checks, "
-            "AVG(CASE WHEN status = 'up' THEN latency_ms END) AS avg_latency_ms, "
-            'MAX(checked_at) AS last_checked_at '
-            'FROM probe_results'
-        )
+        node_filter = ''
         params: list[object] = []
-        conditions: list[str] = []
         if node_id is not None:
-            conditions.append('node_id = ?')
+            node_filter = ' AND node_key = (SELECT node_key FROM nodes WHERE node_id = ?)'
             params.append(node_id)
-        from_bound = self._normalize_datetime(checked_from)
-        if from_bound is not None:
-            conditions.append('checked_at >= ?')
-            params.append(from_bound.isoformat())
-        to_bound = self._normalize_datetime(checked_to)
-        if to_bound is not None:
-            conditions.append('checked_at <= ?')
-            params.append(to_bound.isoformat())
-        if conditions:
-            query += ' WHERE ' + ' AND '.join(conditions)
+        source, params = self._summary_source(checked_from, checked_to, node_filter, params)
+        query = (
+            'SELECT SUM(total_checks) AS total_checks, SUM(up_checks) AS up_checks, '
+            'SUM(latency_sum) AS latency_sum, MAX(last_checked_at) AS last_checked_at, '
+            'sketch_union(latency_sketch) AS latency_sketch FROM ' + source
+        )
 
         def read(conn: sqlite3.Connection) -> sqlite3.Row:
             conn.row_factory = sqlite3.Row
             return conn.execute(query, params).fetchone()
 
-        row = self._run_read(read)
-        total_checks = int(row['total_checks'] or 0)
-        up_checks = int(row['up_checks'] or 0)
-        down_checks = int(row['down_checks'] or 0)
-        availability_pct = 0.0
-        if total_checks > 0:
-            availability_pct = round((up_checks / total_checks) * 100, 3)
-        avg_latency_ms = row['avg_latency_ms']
-        if avg_latency_ms is not None:
-            avg_latency_ms = round(float(avg_latency_ms), 3)
-        last_checked_at = row['last_checked_at']
-        return ProbeResultsSummary(
-            total_checks=total_checks,
-            up_checks=up_checks,
-            down_checks=down_checks,
-            availability_pct=availability_pct,
-            avg_latency_ms=avg_latency_ms,
-            last_checked_at=(
-                datetime.fromisoformat(last_checked_at)
-                if last_checked_at is not None
-                else None
-            ),
+        return ProbeResultsSummary(**self._summary_fields(self._run_read(read)))
+
+    def summarize_probe_results_grouped(
+        self,
+        node_ids: list[str] | None = None,
+        checked_from: datetime | None = None,
+        checked_to: datetime | None = None,
+        group_by: str = 'node',
+    ) -> list[ProbeResultsGroupSummary]:
+        """Summaries per node, or per region, for many nodes in one grouped query."""
+        node_filter = ''
+        params: list[object] = []
+        if node_ids is not None:
+            node_filter = (
+                ' AND node_key IN (SELECT node_key FROM nodes '
+                'WHERE node_id IN (SELECT value FROM json_each(?)))'
+            )
+            params.append(json.dumps(node_ids))
+        source, params = self._summary_source(checked_from, checked_to, node_filter, params)
+        if group_by == 'region':
+            columns = 'NULL AS node_id, n.region AS region'
+            grouping = 'n.region ORDER BY n.region'
+        else:
+            columns = 'n.node_id AS node_id, n.region AS region'
+            grouping = 'n.node_key ORDER BY n.node_key'
+        query = (
+            f'SELECT {columns}, SUM(u.total_checks) AS total_checks, '
+            'SUM(u.up_checks) AS up_checks, SUM(u.latency_sum) AS latency_sum, '
+            'MAX(u.last_checked_at) AS last_checked_at, '
+            'sketch_union(u.latency_sketch) AS latency_sketch '
+            f'FROM nodes AS n LEFT JOIN {source} AS u ON u.node_key = n.node_key'
         )
+        if node_ids is not None:
+            query += ' WHERE n.node_id IN (SELECT value FROM json_each(?))'
+            params.append(json.dumps(node_ids))
+        query += f' GROUP BY {grouping}'
+
+        def read(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(query, params).fetchall()
+
+        return [
+            ProbeResultsGroupSummary(
+                node_id=row['node_id'], region=row['region'], **self._summary_fields(row)
+            )
+            for row in self._run_read(read)
+        ]
+
+    def bucket_probe_results(
+        self,
+        node_id: str,
+        checked_from: datetime,
+        checked_to: datetime,
+        bucket_s: int,
+    ) -> list[ProbeResultsBucket]:
+        """Aggregate a node's results into epoch-aligned buckets with one GROUP BY."""
+        conditions, params = self._result_filters(node_id, checked_from, checked_to)
+        query = (
+            'SELECT r.checked_at - r.checked_at % ? AS bucket_start, '
+            'COUNT(*) AS total_checks, SUM(r.status) AS up_checks, '
+            'AVG(CASE WHEN r.status = 1 THEN r.latency_ms END) AS avg_latency_ms, '
+            'MIN(CASE WHEN r.status = 1 THEN r.latency_ms END) AS min_latency_ms, '
+            'MAX(CASE WHEN r.status = 1 THEN r.latency_ms END) AS max_latency_ms '
+            'FROM probe_results AS r WHERE ' + ' AND '.join(conditions)
+            + ' GROUP BY bucket_start ORDER BY bucket_start'
+        )
+        params.insert(0, bucket_s * 1_000_000)
+
+        def read(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(query, params).fetchall()
+        rows = self._run_read(read)
+        return [
+            results_bucket(
+                self._from_epoch_us(row['bucket_start']),
+                int(row['total_checks']),
+                int(row['up_checks']),
+                row['avg_latency_ms'],
+                row['min_latency_ms'],
+                row['max_latency_ms'],
+            )
+            for row in rows
+        ]
 
     def get_last_error(self) -> str | None:
         return self._last_error
@@ -256,6 +549,203 @@ class SQLiteRepository:
             return value.replace(tzinfo=UTC)
         return value.astimezone(UTC)
 
+    @staticmethod
+    def _to_epoch_us(value: datetime) -> int:
+        delta = SQLiteRepository._normalize_datetime(value) - EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+    @staticmethod
+    def _from_epoch_us(value: int) -> datetime:
+        return EPOCH + timedelta(microseconds=value)
+
+    def _result_filters(
+        self,
+        node_id: str | None,
+        checked_from: datetime | None,
+        checked_to: datetime | None,
+    ) -> tuple[list[str], list[object]]:
+        conditions: list[str] = []
+        params: list[object] = []
+        if node_id is not None:
+            conditions.append('r.node_key = (SELECT node_key FROM nodes WHERE node_id = ?)')
+            params.append(node_id)
+        if checked_from is not None:
+            conditions.append('r.checked_at >= ?')
+            params.append(self._to_epoch_us(checked_from))
+        if checked_to is not None:
+            conditions.append('r.checked_at <= ?')
+            params.append(self._to_epoch_us(checked_to))
+        return conditions, params
+
+    def _summary_source(
+        self,
+        checked_from: datetime | None,
+        checked_to: datetime | None,
+        node_filter: str,
+        node_params: list[object],
+    ) -> tuple[str, list[object]]:
+        """A UNION ALL subquery of per-node partial aggregates covering the range.
+
+        Whole buckets come from the coarsest rollups, the edges from raw rows.
+        """
+        lo = 0 if checked_from is None else self._to_epoch_us(checked_from)
+        hi = OPEN_END_US if checked_to is None else self._to_epoch_us(checked_to) + 1
+        rollup_spans, raw_spans = self._plan_summary(lo, hi)
+        parts: list[str] = []
+        params: list[object] = []
+        for width_s, start, end in rollup_spans:
+            parts.append(
+                'SELECT node_key, total_checks, up_checks, latency_sum, last_checked_at, '
+                'latency_sketch FROM probe_rollups WHERE width_s = ? AND bucket_start >= ? '
+                'AND bucket_start < ?' + node_filter
+            )
+            params.extend([width_s, start, end, *node_params])
+        for start, end in raw_spans:
+            parts.append(
+                'SELECT node_key, COUNT(*) AS total_checks, SUM(status) AS up_checks, '
+                'TOTAL(CASE WHEN status = 1 THEN latency_ms END) AS latency_sum, '
+                'MAX(checked_at) AS last_checked_at, '
+                'sketch_of(CASE WHEN status = 1 THEN latency_ms END) AS latency_sketch '
+                'FROM probe_results WHERE checked_at >= ? AND checked_at < ?' + node_filter
+                + ' GROUP BY node_key'
+            )
+            params.extend([start, end, *node_params])
+        if not parts:
+            parts.append(
+                'SELECT NULL AS node_key, 0 AS total_checks, 0 AS up_checks, '
+                '0.0 AS latency_sum, NULL AS last_checked_at, NULL AS latency_sketch'
+            )
+        return '(' + ' UNION ALL '.join(parts) + ')', params
+
+    def _summary_fields(self, row: sqlite3.Row) -> dict[str, object]:
+        sketch = LatencySketch()
+        if row['latency_sketch'] is not None:
+            sketch = LatencySketch.from_bytes(row['latency_sketch'])
+        last_checked_at = row['last_checked_at']
+        return summary_fields(
+            int(row['total_checks'] or 0),
+            int(row['up_checks'] or 0),
+            float(row['latency_sum'] or 0.0),
+            None if last_checked_at is None else self._from_epoch_us(last_checked_at),
+            sketch,
+        )
+
+    @staticmethod
+    def _plan_summary(
+        lo: int, hi: int
+    ) -> tuple[list[tuple[int, int, int]], list[tuple[int, int]]]:
+        """Cover [lo, hi) with the coarsest whole rollup buckets, raw rows at the edges."""
+        rollup_spans: list[tuple[int, int, int]] = []
+        raw_spans: list[tuple[int, int]] = []
+        pending = [(lo, hi, len(ROLLUP_WIDTHS_S) - 1)]
+        while pending:
+            start, end, level = pending.pop()
+            if start >= end:
+                continue
+            if level < 0:
+                raw_spans.append((start, end))
+                continue
+            width_s = ROLLUP_WIDTHS_S[level]
+            width_us = width_s * 1_000_000
+            first = -(-start // width_us) * width_us
+            last = end // width_us * width_us
+            if first >= last:
+                pending.append((start, end, level - 1))
+                continue
+            rollup_spans.append((width_s, first, last))
+            pending.append((start, first, level - 1))
+            pending.append((last, end, level - 1))
+        return rollup_spans, raw_spans
+
+    @staticmethod
+    def _fold_rollups(rows: list[tuple]) -> list[tuple]:
+        """Aggregate inserted result rows into one upsert per rollup bucket."""
+        buckets: dict[tuple[int, int, int], list] = {}
+        for node_key, status, latency_ms, checked_at, *_ in rows:
+            for width_s in ROLLUP_WIDTHS_S:
+                width_us = width_s * 1_000_000
+                key = (width_s, node_key, checked_at - checked_at % width_us)
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = [0, 0, 0.0, None, None, checked_at, None]
+                bucket[0] += 1
+                bucket[5] = max(bucket[5], checked_at)
+                if status:
+                    bucket[1] += 1
+                    bucket[2] += latency_ms
+                    bucket[3] = latency_ms if bucket[3] is None else min(bucket[3], latency_ms)
+                    bucket[4] = latency_ms if bucket[4] is None else max(bucket[4], latency_ms)
+                    if bucket[6] is None:
+                        bucket[6] = LatencySketch()
+                    bucket[6].add(latency_ms)
+        return [
+            (*key, *bucket[:6], None if bucket[6] is None else bucket[6].to_bytes())
+            for key, bucket in buckets.items()
+        ]
+
+    @staticmethod
+    def _rebuild_rollups(conn: sqlite3.Connection, deleted: list[tuple[int, int]]) -> None:
+        """Recompute the rollup buckets that contained `deleted` (node_key, checked_at) rows."""
+        finer_s = None
+        for width_s in ROLLUP_WIDTHS_S:
+            width_us = width_s * 1_000_000
+            buckets = [
+                {
+                    'width_s': width_s,
+                    'width_us': width_us,
+                    'finer_s': finer_s,
+                    'node_key': node_key,
+                    'start': start,
+                    'end': start + width_us,
+                }
+                for node_key, start in sorted(
+                    {(node_key, checked_at - checked_at % width_us)
+                     for node_key, checked_at in deleted}
+                )
+            ]
+            conn.executemany(
+                'DELETE FROM probe_rollups '
+                'WHERE width_s = :width_s AND node_key = :node_key AND bucket_start = :start',
+                buckets,
+            )
+            if finer_s is None:
+                statement = ROLLUP_FROM_RESULTS.format(
+                    where='node_key = :node_key AND checked_at >= :start AND checked_at < :end'
+                )
+            else:
+                statement = ROLLUP_FROM_FINER.format(
+                    where='node_key = :node_key AND bucket_start >= :start '
+                    'AND bucket_start < :end'
+                )
+            conn.executemany(statement, buckets)
+            finer_s = width_s
+
+    @staticmethod
+    def _intern_errors(conn: sqlite3.Connection, errors: list[str]) -> dict[str, int]:
+        if not errors:
+            return {}
+        conn.executemany(
+            'INSERT OR IGNORE INTO error_codes(error) VALUES (?)',
+            [(error,) for error in errors],
+        )
+        return dict(
+            conn.execute(
+                'SELECT error, error_key FROM error_codes '
+                'WHERE error IN (SELECT value FROM json_each(?))',
+                (json.dumps(errors),),
+            ).fetchall()
+        )
+
+    def _row_to_result(self, row: sqlite3.Row) -> ProbeResult:
+        return ProbeResult(
+            node_id=row['node_id'],
+            status=STATUS_NAMES[row['status']],
+            latency_ms=row['latency_ms'],
+            checked_at=self._from_epoch_us(row['checked_at']),
+            error=row['error'],
+            **{column: row[column] for column in RESULT_COLUMNS},
+        )
+
     def _get_schema_version(self, conn: sqlite3.Connection) -> int:
         row = conn.execute('PRAGMA user_version').fetchone()
         return int(row[0])
@@ -266,6 +756,26 @@ class SQLiteRepository:
             next_version = version + 1
             if next_version == 1:
                 self._migrate_to_v1(conn)
+            elif next_version == 2:
+                self._migrate_to_v2(conn)
+            elif next_version == 3:
+                self._migrate_to_v3(conn)
+            elif next_version == 4:
+                self._migrate_to_v4(conn)
+            elif next_version == 5:
+                self._migrate_to_v5(conn)
+            elif next_version == 6:
+                self._migrate_to_v6(conn)
+            elif next_version == 7:
+                self._migrate_to_v7(conn)
+            elif next_version == 8:
+                self._migrate_to_v8(conn)
+            elif next_version == 9:
+                self._migrate_to_v9(conn)
+            elif next_version == 10:
+                self._migrate_to_v10(conn)
+            elif next_version == 11:
+                self._migrate_to_v11(conn)
             else:
                 raise RepositoryUnavailableError(
                     f'Missing migration step to version {next_version}'
@@ -313,36 +823,208 @@ class SQLiteRepository:
             """
         )
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self._db_path, timeout=5.0)
-        conn.execute('PRAGMA busy_timeout = 5000')
-        conn.execute('PRAGMA foreign_keys = ON')
-        return conn
+    @staticmethod
+    def _migrate_to_v2(conn: sqlite3.Connection) -> None:
+        conn.execute('ALTER TABLE nodes ADD COLUMN probe_interval_s REAL')
+
+    @staticmethod
+    def _migrate_to_v3(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS node_breakers (
+                node_id TEXT PRIMARY KEY,
+                consecutive_failures INTEGER NOT NULL,
+                backoff_s REAL NOT NULL,
+                open_until TEXT,
+                FOREIGN KEY(node_id) REFERENCES nodes(node_id)
+            )
+            """
+        )
+
+    @staticmethod
+    def _migrate_to_v4(conn: sqlite3.Connection) -> None:
+        for column, column_type in (
+            ('burst_size', 'INTEGER'),
+            ('latency_min_ms', 'REAL'),
+            ('latency_median_ms', 'REAL'),
+            ('latency_p95_ms', 'REAL'),
+            ('jitter_ms', 'REAL'),
+            ('loss_ratio', 'REAL'),
+        ):
+            conn.execute(f'ALTER TABLE probe_results ADD COLUMN {column} {column_type}')
+
+    @staticmethod
+    def _migrate_to_v5(conn: sqlite3.Connection) -> None:
+        for column in ('dns_ms', 'connect_ms', 'tls_ms'):
+            conn.execute(f'ALTER TABLE probe_results ADD COLUMN {column} REAL')
+
+    @staticmethod
+    def _migrate_to_v6(conn: sqlite3.Connection) -> None:
+        conn.execute("ALTER TABLE nodes ADD COLUMN probe_type TEXT NOT NULL DEFAULT 'tcp'")
+
+    @staticmethod
+    def _migrate_to_v7(conn: sqlite3.Connection) -> None:
+        conn.execute("ALTER TABLE nodes ADD COLUMN http_path TEXT NOT NULL DEFAULT '/'")
+        conn.execute('ALTER TABLE probe_results ADD COLUMN status_code INTEGER')
+
+    @classmethod
+    def _migrate_to_v8(cls, conn: sqlite3.Connection) -> None:
+        """Rewrite probe_results into the compact layout, in rowid batches."""
+        conn.execute('ALTER TABLE nodes ADD COLUMN node_key INTEGER')
+        conn.execute('UPDATE nodes SET node_key = rowid')
+        conn.execute('CREATE UNIQUE INDEX idx_nodes_node_key ON nodes(node_key)')
+        conn.execute(
+            """
+            CREATE TABLE error_codes (
+                error_key INTEGER PRIMARY KEY,
+                error TEXT NOT NULL UNIQUE
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE probe_results_compact (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                node_key INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                latency_ms REAL NOT NULL,
+                checked_at INTEGER NOT NULL,
+                error_key INTEGER,
+                burst_size INTEGER,
+                latency_min_ms REAL,
+                latency_median_ms REAL,
+                latency_p95_ms REAL,
+                jitter_ms REAL,
+                loss_ratio REAL,
+                dns_ms REAL,
+                connect_ms REAL,
+                tls_ms REAL,
+                status_code INTEGER,
+                FOREIGN KEY(node_key) REFERENCES nodes(node_key),
+                FOREIGN KEY(error_key) REFERENCES error_codes(error_key)
+            )
+            """
+        )
+        select = (
+            'SELECT r.id, n.node_key, r.status, r.latency_ms, r.checked_at, r.error, '
+            + ', '.join(f'r.{column}' for column in RESULT_COLUMNS)
+            + ' FROM probe_results AS r JOIN nodes AS n ON n.node_id = r.node_id'
+            ' WHERE r.id > ? ORDER BY r.id LIMIT ?'
+        )
+        insert = RESULT_INSERT.replace(
+            'INSERT INTO probe_results(', 'INSERT INTO probe_results_compact(id, '
+        ).replace('VALUES (', 'VALUES (?, ')
+        last_id = 0
+        while True:
+            rows = [tuple(row) for row in conn.execute(select, (last_id, MIGRATION_BATCH_ROWS))]
+            if not rows:
+                break
+            error_keys = cls._intern_errors(
+                conn, sorted({row[5] for row in rows if row[5] is not None})
+            )
+            conn.executemany(
+                insert,
+                [
+                    (
+                        row[0],
+                        row[1],
+                        STATUS_CODES.get(row[2], 0),
+                        row[3],
+                        cls._to_epoch_us(datetime.fromisoformat(row[4])),
+                        error_keys.get(row[5]),
+                        *row[6:],
+                    )
+                    for row in rows
+                ],
+            )
+            last_id = rows[-1][0]
+        conn.execute('DROP TABLE probe_results')
+        conn.execute('ALTER TABLE probe_results_compact RENAME TO probe_results')
+        conn.execute(
+            """
+            CREATE INDEX idx_probe_results_node_checked_at
+            ON probe_results(node_key, checked_at DESC)
+            """
+        )
+
+    @staticmethod
+    def _migrate_to_v9(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE probe_rollups (
+                width_s INTEGER NOT NULL,
+                node_key INTEGER NOT NULL,
+                bucket_start INTEGER NOT NULL,
+                total_checks INTEGER NOT NULL,
+                up_checks INTEGER NOT NULL,
+                latency_sum REAL NOT NULL,
+                latency_min REAL,
+                latency_max REAL,
+                last_checked_at INTEGER NOT NULL,
+                PRIMARY KEY(width_s, node_key, bucket_start)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            'CREATE INDEX idx_probe_results_checked_at ON probe_results(checked_at)'
+        )
+
+    @staticmethod
+    def _migrate_to_v10(conn: sqlite3.Connection) -> None:
+        # Rollups written at v9 have no sketches; rebuild them all from raw rows.
+        conn.execute('ALTER TABLE probe_rollups ADD COLUMN latency_sketch BLOB')
+        conn.execute('DELETE FROM probe_rollups')
+        SQLiteRepository._backfill_rollups(conn)
+
+    @staticmethod
+    def _migrate_to_v11(conn: sqlite3.Connection) -> None:
+        # An ascending index scanned backwards yields (checked_at, id) DESC with
+        # no sort step; the DESC index left ties on checked_at to a temp b-tree.
+        conn.execute('DROP INDEX idx_probe_results_node_checked_at')
+        conn.execute(
+            'CREATE INDEX idx_probe_results_node_checked_at '
+            'ON probe_results(node_key, checked_at)'
+        )
+
+    @staticmethod
+    def _backfill_rollups(conn: sqlite3.Connection) -> None:
+        finer_s = None
+        for width_s in ROLLUP_WIDTHS_S:
+            params = {'width_s': width_s, 'width_us': width_s * 1_000_000, 'finer_s': finer_s}
+            if finer_s is None:
+                conn.execute(ROLLUP_FROM_RESULTS.format(where='1'), params)
+            else:
+                conn.execute(ROLLUP_FROM_FINER.format(where='1'), params)
+            finer_s = width_s
+
+    @staticmethod
+    def _register_functions(conn: sqlite3.Connection) -> None:
+        conn.create_function('sketch_merge', 2, merge_sketch_bytes, deterministic=True)
+        conn.create_aggregate('sketch_union', 1, SketchUnion)
+        conn.create_aggregate('sketch_of', 1, SketchOf)
+
+    def close(self) -> None:
+        self._connections.close()
+
+    def write_stats(self) -> dict[str, int]:
+        return self._connections.stats()
 
     def _run_write(self, fn):
-        for attempt in range(3):
-            try:
-                with self._lock, self._connect() as conn:
-                    fn(conn)
-                self._last_error = None
-                return
-            except sqlite3.IntegrityError as exc:
-                self._last_error = str(exc)
-                raise RepositoryDuplicateError('Duplicate node registration') from exc
-            except sqlite3.OperationalError as exc:
-                if self._is_locked(exc) and attempt < 2:
-                    time.sleep(0.05)
-                    continue
-                self._last_error = str(exc)
-                raise RepositoryUnavailableError('SQLite write operation failed') from exc
-            except sqlite3.Error as exc:
-                self._last_error = str(exc)
-                raise RepositoryUnavailableError('SQLite write operation failed') from exc
+        try:
+            result = self._connections.submit(fn).result()
+        except sqlite3.IntegrityError as exc:
+            self._last_error = str(exc)
+            raise RepositoryDuplicateError('Duplicate node registration') from exc
+        except sqlite3.Error as exc:
+            self._last_error = str(exc)
+            raise RepositoryUnavailableError('SQLite write operation failed') from exc
+        self._last_error = None
+        return result
 
     def _run_read(self, fn):
         for attempt in range(3):
             try:
-                with self._lock, self._connect() as conn:
+                with self._connections.reader() as conn:
                     result = fn(conn)
                 self._last_error = None
                 return result
@@ -370,4 +1052,7 @@ class SQLiteRepository:
             port=row['port'],
             region=row['region'],
             enabled=bool(row['enabled']),
+            probe_interval_s=row['probe_interval_s'],
+            probe_type=row['probe_type'],
+            http_path=row['http_path'],
         )
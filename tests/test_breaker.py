@@ -0,0 +1,118 @@
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.domain.models import ProbeResult, RegisteredNode
+from app.main import create_app
+from app.services.breaker import CircuitBreaker
+from app.services.probe_engine import DEADLINE_EXCEEDED_ERROR
+
+
+def _result(node_id: str, status: str, error: str | None = None) -> ProbeResult:
+    return ProbeResult(
+        node_id=node_id,
+        status=status,
+        latency_ms=1.0,
+        checked_at=datetime.now(UTC),
+        error=error,
+    )
+
+
+def _node(node_id: str) -> RegisteredNode:
+    return RegisteredNode(node_id=node_id, name=node_id, host='10.0.0.1', port=443, region='us')
+
+
+def _always_down(node) -> ProbeResult:
+    return _result(node.node_id, 'down', error='connection_refused')
+
+
+def test_breaker_opens_after_threshold_and_backs_off_exponentially() -> None:
+    breaker = CircuitBreaker(threshold=2, base_backoff_s=10.0, max_backoff_s=25.0)
+
+    assert breaker.record([_result('a', 'down')])[0].open_until is None
+    backoffs = [breaker.record([_result('a', 'down')])[0].backoff_s for _ in range(3)]
+
+    assert backoffs == [10.0, 20.0, 25.0]
+    assert breaker.allowed([_node('a'), _node('b')]) == [_node('b')]
+    assert breaker.stats()['open_breakers'] == 1
+    assert breaker.stats()['skipped_total'] == 1
+
+
+def test_breaker_resets_on_first_success_and_ignores_inconclusive_errors() -> None:
+    breaker = CircuitBreaker(threshold=1, base_backoff_s=10.0)
+    breaker.record([_result('a', 'down')])
+
+    assert breaker.record([_result('a', 'down', error=DEADLINE_EXCEEDED_ERROR)]) == []
+    assert breaker.states()[0].consecutive_failures == 1
+
+    changed = breaker.record([_result('a', 'up')])
+    assert changed[0].consecutive_failures == 0
+    assert breaker.states() == []
+    assert breaker.allowed([_node('a')]) == [_node('a')]
+
+
+def test_breaker_allows_half_open_probe_after_backoff_expires() -> None:
+    breaker = CircuitBreaker(threshold=1, base_backoff_s=10.0)
+    stale = _result('a', 'down')
+    stale.checked_at = datetime.now(UTC) - timedelta(seconds=11)
+    breaker.record([stale])
+
+    assert breaker.allowed([_node('a')]) == [_node('a')]
+
+
+def test_scheduler_skips_open_breakers_but_manual_runs_still_probe(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_BREAKER_THRESHOLD', '1')
+    app = create_app(scheduler_interval_s=60.0)
+    app.state.probe_node = _always_down
+
+    with TestClient(app) as client:
+        node = client.post(
+            '/nodes',
+            json={'name': 'dead', 'host': '10.0.0.1', 'port': 443, 'region': 'us'},
+        ).json()
+
+        assert client.post('/scheduler/run-once').json()['results_count'] == 1
+        assert client.post('/scheduler/run-once').json()['results_count'] == 0
+        manual = client.post('/probes/run', json={'node_id': node['node_id']}).json()
+        breakers = client.get('/scheduler/breakers').json()
+        status_payload = client.get('/scheduler/status').json()
+
+    assert len(manual['results']) == 1
+    assert breakers[0]['node_id'] == node['node_id']
+    assert breakers[0]['consecutive_failures'] == 2
+    assert breakers[0]['backoff_s'] == 120.0
+    assert status_payload['breakers']['open_breakers'] == 1
+    assert status_payload['breakers']['skipped_total'] == 1
+
+
+def test_breaker_state_survives_restart_with_sqlite(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('NETSENTINEL_SQLITE_PATH', str(tmp_path / 'netsentinel.sqlite3'))
+    monkeypatch.setenv('NETSENTINEL_BREAKER_THRESHOLD', '1')
+
+    app_one = create_app(scheduler_interval_s=60.0)
+    app_one.state.probe_node = _always_down
+    with TestClient(app_one) as client:
+        client.post(
+            '/nodes',
+            json={'name': 'dead', 'host': '10.0.0.1', 'port': 443, 'region': 'us'},
+        )
+        client.post('/scheduler/run-once')
+
+    app_two = create_app(scheduler_interval_s=60.0)
+    app_two.state.probe_node = _always_down
+    with TestClient(app_two) as client:
+        breakers = client.get('/scheduler/breakers').json()
+        run_payload = client.post('/scheduler/run-once').json()
+
+    assert len(breakers) == 1
+    assert breakers[0]['consecutive_failures'] == 1
+    assert run_payload['results_count'] == 0
+
+
+def test_breakers_are_disabled_by_default() -> None:
+    app = create_app(scheduler_interval_s=60.0)
+
+    with TestClient(app) as client:
+        assert client.get('/scheduler/breakers').json() == []
+        assert client.get('/scheduler/status').json()['breakers'] == {'enabled': False}
@@ -0,0 +1,88 @@
+import errno
+from datetime import UTC, datetime
+
+from fastapi.testclient import TestClient
+
+from app.domain.models import Node, ProbeResult
+from app.main import create_app
+from app.services.concurrency import AIMDConcurrency
+from app.services.prober import describe_socket_error
+
+
+def _results(count: int, error: str | None = None) -> list[ProbeResult]:
+    return [
+        ProbeResult(
+            node_id=f'node-{index}',
+            status='up' if error is None else 'down',
+            latency_ms=1.0,
+            checked_at=datetime.now(UTC),
+            error=error,
+        )
+        for index in range(count)
+    ]
+
+
+def test_aimd_increases_additively_only_when_limit_was_saturated() -> None:
+    controller = AIMDConcurrency(initial=20, minimum=10, maximum=35, increase_step=10)
+
+    assert controller.record_cycle(1.0, 60.0, _results(10)) == 20
+    assert controller.record_cycle(1.0, 60.0, _results(50)) == 30
+    assert controller.record_cycle(1.0, 60.0, _results(50)) == 35
+    assert controller.increases == 2
+
+
+def test_aimd_decreases_multiplicatively_on_overrun_or_local_errors() -> None:
+    controller = AIMDConcurrency(initial=100, minimum=30, decrease_factor=0.5)
+
+    assert controller.record_cycle(55.0, 60.0, _results(200)) == 50
+    local_error = describe_socket_error(OSError(errno.EMFILE, 'Too many open files'))
+    assert controller.record_cycle(1.0, 60.0, _results(1, error=local_error)) == 30
+    assert controller.record_cycle(59.0, 60.0, _results(1)) == 30
+    assert controller.stats()['decreases'] == 2
+    assert controller.stats()['last_adjustment'] == 'decrease'
+
+
+def test_describe_socket_error_flags_only_local_exhaustion() -> None:
+    assert describe_socket_error(OSError(errno.EMFILE, 'Too many open files')).startswith(
+        'local_socket_error: '
+    )
+    assert describe_socket_error(OSError(errno.ECONNREFUSED, 'Connection refused')) == (
+        '[Errno 111] Connection refused'
+    )
+
+
+def test_scheduler_tunes_concurrency_and_reports_it(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_CONCURRENCY_MODE', 'aimd')
+    monkeypatch.setenv('NETSENTINEL_PROBE_CONCURRENCY_MIN', '1')
+    app = create_app(scheduler_interval_s=60.0, probe_concurrency=1)
+
+    def fake_probe(node) -> ProbeResult:
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=1.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    app.state.probe_node = fake_probe
+    for index in range(3):
+        app.state.repository.add_node(
+            Node(name=f'aimd-{index}', host=f'10.0.0.{index}', port=443, region='us')
+        )
+
+    with TestClient(app) as client:
+        client.post('/scheduler/run-once')
+        payload = client.get('/scheduler/status').json()
+
+    assert app.state.probe_concurrency == 11
+    assert payload['probe_concurrency']['mode'] == 'aimd'
+    assert payload['probe_concurrency']['limit'] == 11
+
+
+def test_fixed_concurrency_is_reported_by_default() -> None:
+    app = create_app(scheduler_interval_s=60.0, probe_concurrency=25)
+
+    with TestClient(app) as client:
+        payload = client.get('/scheduler/status').json()
+
+    assert payload['probe_concurrency'] == {'mode': 'fixed', 'limit': 25}
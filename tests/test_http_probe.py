@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.domain.models import RegisteredNode
+from app.services.http_probe import HTTPProber
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self) -> None:
+        status = 503 if self.path == '/broken' else 200
+        body = b'ok'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.path == '/slow-body':
+            self.wfile.flush()
+            time.sleep(1.0)
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def _start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _node(port: int, path: str = '/health') -> RegisteredNode:
+    return RegisteredNode(
+        node_id='panel',
+        name='panel',
+        host='127.0.0.1',
+        port=port,
+        region='us',
+        probe_type='http',
+        http_path=path,
+    )
+
+
+def _probe_twice(prober: HTTPProber, node: RegisteredNode):
+    async def run():
+        try:
+            return [await prober.probe(node, timeout_s=2.0) for _ in range(2)]
+        finally:
+            await prober.aclose()
+
+    return asyncio.run(run())
+
+
+def test_http_probe_reuses_keepalive_connections_across_probes() -> None:
+    server = _start_server()
+    try:
+        results = _probe_twice(HTTPProber(), _node(server.server_address[1]))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert [result.status for result in results] == ['up', 'up']
+    assert [result.status_code for result in results] == [200, 200]
+    assert server.connections == 1
+
+
+def test_http_probe_opens_fresh_connections_without_keepalive() -> None:
+    server = _start_server()
+    try:
+        _probe_twice(HTTPProber(keepalive=False), _node(server.server_address[1]))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert server.connections == 2
+
+
+def test_http_probe_reports_server_errors_as_down() -> None:
+    server = _start_server()
+    prober = HTTPProber()
+    try:
+        result = asyncio.run(prober.probe(_node(server.server_address[1], '/broken')))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result.status == 'down'
+    assert result.status_code == 503
+    assert result.error == 'http_status_503'
+
+
+def test_http_probe_judges_on_headers_not_a_slow_body() -> None:
+    server = _start_server()
+    prober = HTTPProber(drain_timeout_s=0.05)
+
+    async def run():
+        try:
+            return await prober.probe(_node(server.server_address[1], '/slow-body'), 0.5)
+        finally:
+            await prober.aclose()
+
+    try:
+        result = asyncio.run(run())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result.status == 'up'
+    assert result.status_code == 200
+    assert result.error is None
+    assert result.latency_ms < 500
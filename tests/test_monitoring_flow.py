@@ -1,3 +1,4 @@
+import base64
 from datetime import UTC, datetime
 
 from fastapi.testclient import TestClient
@@ -390,6 +391,8 @@ def test_results_summary_returns_expected_aggregates() -> None:
     assert payload['down_checks'] == 1
     assert payload['availability_pct'] == 66.667
     assert payload['avg_latency_ms'] == 20.0
+    assert abs(payload['p50_latency_ms'] - 10.0) <= 0.1
+    assert abs(payload['p99_latency_ms'] - 30.0) <= 0.3
     assert payload['last_checked_at'] == base.replace(minute=2).isoformat().replace(
         '+00:00', 'Z'
     )
@@ -437,3 +440,154 @@ def test_results_summary_returns_zero_state_for_empty_window() -> None:
     assert payload['availability_pct'] == 0.0
     assert payload['avg_latency_ms'] is None
     assert payload['last_checked_at'] is None
+
+
+def test_results_series_buckets_results_by_width() -> None:
+    app = create_app()
+    base = datetime(2026, 1, 1, 9, 0, tzinfo=UTC)
+    scripted = [
+        ('up', 10.0, base.replace(second=5)),
+        ('down', 0.0, base.replace(second=40)),
+        ('up', 30.0, base.replace(minute=1, second=10)),
+        ('up', 50.0, base.replace(minute=1, second=20)),
+        ('up', 70.0, base.replace(minute=9)),
+    ]
+
+    def fake_probe(node) -> ProbeResult:
+        status, latency_ms, checked_at = scripted.pop(0)
+        return ProbeResult(
+            node_id=node.node_id,
+            status=status,
+            latency_ms=latency_ms,
+            checked_at=checked_at,
+        )
+
+    app.state.probe_node = fake_probe
+    client = TestClient(app)
+    node = client.post(
+        '/nodes',
+        json={'name': 'series-node', 'host': '127.0.0.1', 'port': 443, 'region': 'us'},
+    ).json()
+    for _ in range(5):
+        client.post('/probes/run', json={'node_id': node['node_id']})
+
+    response = client.get(
+        '/results/series',
+        params={
+            'node_id': node['node_id'],
+            'from': base.isoformat(),
+            'to': base.replace(minute=5).isoformat(),
+            'bucket_s': 60,
+        },
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload['bucket_s'] == 60
+    assert [bucket['total_checks'] for bucket in payload['buckets']] == [2, 2]
+    first, second = payload['buckets']
+    assert first['bucket_start'] == base.isoformat().replace('+00:00', 'Z')
+    assert first['availability_pct'] == 50.0
+    assert first['avg_latency_ms'] == 10.0
+    assert (second['min_latency_ms'], second['max_latency_ms']) == (30.0, 50.0)
+    assert second['avg_latency_ms'] == 40.0
+
+    too_many = client.get(
+        '/results/series',
+        params={
+            'node_id': node['node_id'],
+            'from': base.isoformat(),
+            'to': base.replace(year=2027).isoformat(),
+            'bucket_s': 1,
+        },
+    )
+    assert too_many.status_code == 422
+
+
+def test_results_summaries_cover_all_nodes_and_regions() -> None:
+    app = create_app()
+    latency = {'eu-a': 10.0, 'eu-b': 30.0, 'us-a': 50.0}
+
+    def fake_probe(node) -> ProbeResult:
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=latency[node.name],
+            checked_at=datetime.now(UTC),
+        )
+
+    app.state.probe_node = fake_probe
+    client = TestClient(app)
+    nodes = [
+        client.post(
+            '/nodes',
+            json={'name': name, 'host': '127.0.0.1', 'port': 443, 'region': name[:2]},
+        ).json()
+        for name in ('eu-a', 'eu-b', 'us-a')
+    ]
+    client.post('/probes/run', json={'node_id': nodes[0]['node_id']})
+    client.post('/probes/run', json={'node_id': nodes[1]['node_id']})
+
+    per_node = client.get('/results/summaries').json()
+    assert [item['node_id'] for item in per_node] == [node['node_id'] for node in nodes]
+    assert [item['total_checks'] for item in per_node] == [1, 1, 0]
+    assert per_node[2]['avg_latency_ms'] is None
+
+    selected = client.get(
+        '/results/summaries', params={'node_id': [nodes[1]['node_id'], nodes[2]['node_id']]}
+    ).json()
+    assert [item['node_id'] for item in selected] == [nodes[1]['node_id'], nodes[2]['node_id']]
+
+    per_region = client.get('/results/summaries', params={'group_by': 'region'}).json()
+    assert [(item['region'], item['total_checks']) for item in per_region] == [
+        ('eu', 2),
+        ('us', 0),
+    ]
+    assert per_region[0]['node_id'] is None
+    assert per_region[0]['avg_latency_ms'] == 20.0
+
+
+def test_results_cursor_pages_through_history_without_gaps() -> None:
+    app = create_app()
+    base = datetime(2026, 1, 1, 9, 0, tzinfo=UTC)
+    # Pairs of results share a timestamp, so pages must break ties by id.
+    stamps = [base.replace(minute=minute // 2) for minute in range(7)]
+
+    def fake_probe(node) -> ProbeResult:
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=float(len(stamps)),
+            checked_at=stamps.pop(0),
+        )
+
+    app.state.probe_node = fake_probe
+    client = TestClient(app)
+    node = client.post(
+        '/nodes',
+        json={'name': 'paged-node', 'host': '127.0.0.1', 'port': 443, 'region': 'us'},
+    ).json()
+    for _ in range(7):
+        client.post('/probes/run', json={'node_id': node['node_id']})
+
+    pages = []
+    params = {'node_id': node['node_id'], 'limit': 3}
+    while True:
+        response = client.get('/results', params=params)
+        assert response.status_code == 200
+        pages.append([item['latency_ms'] for item in response.json()])
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+        params['cursor'] = cursor
+
+    assert pages == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0]]
+    for token in (
+        b'not-a-cursor',
+        b'99999999999999999999:1',
+        b'-99999999999999999:1',
+        b'0:9223372036854775808',
+    ):
+        cursor = base64.urlsafe_b64encode(token).decode().rstrip('=')
+        invalid = client.get('/results', params={'cursor': cursor})
+        assert invalid.status_code == 422
+    assert client.get('/results', params={'cursor': 'not-a-cursor'}).status_code == 422
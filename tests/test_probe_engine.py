@@ -0,0 +1,408 @@
+import asyncio
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+import app.api.probes as probes_module
+from app.domain.models import Node, ProbeResult, RegisteredNode
+from app.main import create_app
+from app.services.concurrency import ProbeSlots
+from app.services.probe_engine import (
+    DEADLINE_EXCEEDED_ERROR,
+    ShardProbeSettings,
+    probe_shard,
+    reduce_burst,
+    run_probes,
+)
+from app.services.prober import bulk_tcp_probe
+
+
+def _nodes(count: int) -> list[RegisteredNode]:
+    return [
+        RegisteredNode(
+            node_id=f'node-{index}',
+            name=f'node-{index}',
+            host='127.0.0.1',
+            port=443,
+            region='us',
+            enabled=True,
+        )
+        for index in range(count)
+    ]
+
+
+def test_run_probes_overlaps_slow_probes_within_concurrency_limit() -> None:
+    active = 0
+    max_active = 0
+
+    async def slow_probe(node) -> ProbeResult:
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.1)
+        active -= 1
+        return ProbeResult(
+            node_id=node.node_id,
+            status='down',
+            latency_ms=100.0,
+            checked_at=datetime.now(UTC),
+            error='timeout',
+        )
+
+    started = time.perf_counter()
+    results = asyncio.run(run_probes(_nodes(20), slow_probe, concurrency=10))
+    elapsed = time.perf_counter() - started
+
+    assert [result.node_id for result in results] == [f'node-{i}' for i in range(20)]
+    assert max_active == 10
+    assert elapsed < 1.0
+
+
+def test_overlapping_runs_share_one_concurrency_limit() -> None:
+    active = 0
+    max_active = 0
+    limit = 4
+
+    async def slow_probe(node) -> ProbeResult:
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=50.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    async def overlapping_runs() -> list[list[ProbeResult]]:
+        slots = ProbeSlots(lambda: limit)
+        return await asyncio.gather(
+            *(run_probes(_nodes(8), slow_probe, concurrency=limit, slots=slots) for _ in range(3))
+        )
+
+    outcomes = asyncio.run(overlapping_runs())
+    assert [len(results) for results in outcomes] == [8, 8, 8]
+    assert max_active == 4
+
+    active = max_active = 0
+    limit = 2
+    asyncio.run(overlapping_runs())
+    assert max_active == 2
+
+
+def test_run_probes_keeps_retry_semantics_per_node() -> None:
+    calls: dict[str, int] = {}
+
+    async def flaky_probe(node) -> ProbeResult:
+        calls[node.node_id] = calls.get(node.node_id, 0) + 1
+        status = 'up' if node.node_id == 'node-0' and calls[node.node_id] == 2 else 'down'
+        return ProbeResult(
+            node_id=node.node_id,
+            status=status,
+            latency_ms=1.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    results = asyncio.run(run_probes(_nodes(2), flaky_probe, retry_count=2))
+
+    assert [result.status for result in results] == ['up', 'down']
+    assert calls == {'node-0': 2, 'node-1': 3}
+
+
+def test_run_probes_accepts_blocking_probe_callables() -> None:
+    def blocking_probe(node) -> ProbeResult:
+        time.sleep(0.01)
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=10.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    results = asyncio.run(run_probes(_nodes(3), blocking_probe))
+
+    assert all(result.status == 'up' for result in results)
+
+
+def test_probe_concurrency_is_read_from_env_and_clamped(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_CONCURRENCY', '0')
+    assert create_app().state.probe_concurrency == 1
+
+    monkeypatch.setenv('NETSENTINEL_PROBE_CONCURRENCY', 'many')
+    assert create_app().state.probe_concurrency == 100
+
+
+def test_selector_mode_routes_cycles_through_bulk_prober(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_MODE', 'selector')
+    app = create_app(scheduler_interval_s=60.0, probe_retry_count=1)
+    batches: list[list[str]] = []
+
+    def fake_bulk_probe(nodes, deadline_s=None) -> list[ProbeResult]:
+        batches.append([node.node_id for node in nodes])
+        return [
+            ProbeResult(
+                node_id=node.node_id,
+                status='up' if len(batches) > 1 else 'down',
+                latency_ms=2.0,
+                checked_at=datetime.now(UTC),
+            )
+            for node in nodes
+        ]
+
+    assert app.state.probe_mode == 'selector'
+    app.state.probe_nodes = fake_bulk_probe
+    repository = app.state.repository
+    for index in range(3):
+        repository.add_node(
+            Node(name=f'bulk-{index}', host='127.0.0.1', port=443 + index, region='us')
+        )
+
+    count = asyncio.run(app.state.scheduler.run_once())
+
+    assert count == 3
+    assert len(batches) == 2
+    assert len(batches[1]) == 3
+    assert all(result.status == 'up' for result in repository.list_probe_results())
+
+
+def test_run_probes_cancels_stragglers_at_deadline() -> None:
+    async def probe(node) -> ProbeResult:
+        if node.node_id == 'node-1':
+            await asyncio.sleep(5)
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=1.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    started = time.perf_counter()
+    results = asyncio.run(run_probes(_nodes(2), probe, deadline_s=0.2))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.0
+    assert results[0].status == 'up'
+    assert results[1].status == 'down'
+    assert results[1].error == DEADLINE_EXCEEDED_ERROR
+    assert results[1].latency_ms >= 200
+
+
+def test_bulk_tcp_probe_reports_unstarted_nodes_after_deadline() -> None:
+    results = bulk_tcp_probe(_nodes(3), timeout_s=1.0, deadline_s=0)
+
+    assert [result.error for result in results] == [DEADLINE_EXCEEDED_ERROR] * 3
+
+
+def test_cycle_deadline_defaults_to_interval_and_zero_disables(monkeypatch) -> None:
+    assert create_app(scheduler_interval_s=30.0).state.cycle_deadline_s == 30.0
+
+    monkeypatch.setenv('NETSENTINEL_CYCLE_DEADLINE_S', '0')
+    assert create_app(scheduler_interval_s=30.0).state.cycle_deadline_s is None
+
+
+def test_scheduler_marks_cycle_partial_when_deadline_is_hit(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_CYCLE_DEADLINE_S', '0.2')
+    app = create_app(scheduler_interval_s=60.0)
+
+    async def hanging_probe(node) -> ProbeResult:
+        await asyncio.sleep(5)
+        raise AssertionError('probe should have been cancelled')
+
+    app.state.probe_node = hanging_probe
+    repository = app.state.repository
+    node = repository.add_node(Node(name='slow', host='10.0.0.1', port=443, region='us'))
+
+    with TestClient(app) as client:
+        response = client.post('/scheduler/run-once')
+        status_payload = client.get('/scheduler/status').json()
+        metrics_payload = client.get('/metrics').json()
+
+    assert response.json()['results_count'] == 1
+    stored = repository.list_probe_results(node_id=node.node_id)
+    assert stored[0].error == DEADLINE_EXCEEDED_ERROR
+    assert status_payload['last_cycle_partial'] is True
+    assert status_payload['partial_cycles'] == 1
+    assert status_payload['deadline_exceeded_probes'] == 1
+    assert metrics_payload['scheduler']['partial_cycles'] == 1
+
+
+def _sample(latency_ms: float, status: str = 'up') -> ProbeResult:
+    return ProbeResult(
+        node_id='node-0',
+        status=status,
+        latency_ms=latency_ms,
+        checked_at=datetime.now(UTC),
+        error=None if status == 'up' else 'timeout',
+    )
+
+
+def test_reduce_burst_computes_latency_loss_and_jitter() -> None:
+    samples = [_sample(10.0), _sample(30.0), _sample(20.0), _sample(1500.0, 'down'), _sample(40.0)]
+
+    result = reduce_burst(_nodes(1)[0], samples)
+
+    assert result.status == 'up'
+    assert result.latency_ms == 25.0
+    assert result.latency_min_ms == 10.0
+    assert result.latency_median_ms == 25.0
+    assert result.latency_p95_ms == 40.0
+    assert result.jitter_ms == 16.667
+    assert result.loss_ratio == 0.2
+    assert result.burst_size == 5
+
+
+def test_reduce_burst_reports_down_when_every_sample_is_lost() -> None:
+    result = reduce_burst(_nodes(1)[0], [_sample(1500.0, 'down')] * 3)
+
+    assert result.status == 'down'
+    assert result.error == 'timeout'
+    assert result.loss_ratio == 1.0
+    assert result.latency_median_ms is None
+
+
+def test_burst_mode_is_stored_alongside_probe_results(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_BURST_SIZE', '4')
+    monkeypatch.setenv('NETSENTINEL_PROBE_BURST_SPACING_MS', '5')
+    app = create_app(
+        scheduler_interval_s=60.0,
+        storage_backend='sqlite',
+        sqlite_path=str(tmp_path / 'netsentinel.sqlite3'),
+    )
+    calls: list[float] = []
+
+    async def fake_probe(node) -> ProbeResult:
+        calls.append(time.monotonic())
+        status = 'down' if len(calls) == 2 else 'up'
+        return ProbeResult(
+            node_id=node.node_id,
+            status=status,
+            latency_ms=float(len(calls)),
+            checked_at=datetime.now(UTC),
+        )
+
+    app.state.probe_node = fake_probe
+    with TestClient(app) as client:
+        node = client.post(
+            '/nodes',
+            json={'name': 'burst', 'host': '10.0.0.1', 'port': 443, 'region': 'us'},
+        ).json()
+        client.post('/probes/run', json={'node_id': node['node_id']})
+        stored = client.get('/results', params={'node_id': node['node_id']}).json()
+
+    assert len(calls) == 4
+    assert calls[-1] - calls[0] >= 0.014
+    assert stored[0]['burst_size'] == 4
+    assert stored[0]['loss_ratio'] == 0.25
+    assert stored[0]['latency_min_ms'] == 1.0
+    assert stored[0]['latency_p95_ms'] == 4.0
+
+
+def test_probe_shard_keeps_one_deadline_budget_across_probe_types() -> None:
+    silent_udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent_udp.bind(('127.0.0.1', 0))
+    stalled_http = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    stalled_http.bind(('127.0.0.1', 0))
+    stalled_http.listen()
+    targets = [
+        RegisteredNode(
+            node_id='udp',
+            name='udp',
+            host='127.0.0.1',
+            port=silent_udp.getsockname()[1],
+            region='us',
+            probe_type='udp',
+        ),
+        RegisteredNode(
+            node_id='http',
+            name='http',
+            host='127.0.0.1',
+            port=stalled_http.getsockname()[1],
+            region='us',
+            probe_type='http',
+        ),
+    ]
+
+    try:
+        results, duration_ms = probe_shard(
+            targets, ShardProbeSettings(timeout_s=5.0, deadline_s=0.5)
+        )
+    finally:
+        silent_udp.close()
+        stalled_http.close()
+
+    assert [result.node_id for result in results] == ['udp', 'http']
+    assert all(result.error == DEADLINE_EXCEEDED_ERROR for result in results)
+    assert duration_ms < 900
+
+
+def test_probe_shard_applies_phases_bursts_and_per_node_timeouts() -> None:
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    node = RegisteredNode(
+        node_id='phased',
+        name='phased',
+        host='localhost',
+        port=listener.getsockname()[1],
+        region='us',
+    )
+    settings = ShardProbeSettings(
+        timeout_s=0.0001,
+        node_timeouts={'phased': 2.0},
+        dns_cache_ttl_s=60.0,
+        phases=True,
+    )
+
+    try:
+        phased, _ = probe_shard([node], settings)
+        burst, _ = probe_shard(
+            [node], ShardProbeSettings(timeout_s=2.0, burst_size=3, burst_spacing_s=0.0)
+        )
+    finally:
+        listener.close()
+
+    assert phased[0].status == 'up'
+    assert phased[0].connect_ms is not None
+    assert burst[0].status == 'up'
+    assert burst[0].burst_size == 3
+
+
+def test_sharded_cycle_divides_concurrency_and_passes_node_timeouts(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_TIMEOUT_MODE', 'adaptive')
+    monkeypatch.setenv('NETSENTINEL_PROBE_PHASES', 'true')
+    app = create_app(scheduler_interval_s=60.0, probe_concurrency=10)
+    for index in range(5):
+        app.state.repository.add_node(
+            Node(name=f'node-{index}', host='127.0.0.1', port=1000 + index, region='us')
+        )
+    seen: list[tuple[list[str], ShardProbeSettings]] = []
+
+    def fake_probe_shard(targets, settings):
+        seen.append(([node.node_id for node in targets], settings))
+        return [], 0.0
+
+    monkeypatch.setattr(probes_module, 'probe_shard', fake_probe_shard)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        asyncio.run(probes_module.run_sharded_probe_cycle(app, executor, 3))
+
+    assert [len(node_ids) for node_ids, _ in seen] == [2, 2, 1]
+    for node_ids, settings in seen:
+        assert settings.concurrency == 3
+        assert settings.phases is True
+        assert sorted(settings.node_timeouts) == sorted(node_ids)
+        assert settings.dns_cache_ttl_s == 60.0
+
+
+def test_sharding_is_refused_with_heap_dispatch(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_SHARDS', '2')
+    monkeypatch.setenv('NETSENTINEL_SCHEDULER_DISPATCH', 'due')
+
+    with pytest.raises(RuntimeError, match='NETSENTINEL_SCHEDULER_DISPATCH'):
+        create_app(scheduler_interval_s=60.0)
@@ -1,8 +1,23 @@
+import asyncio
+import selectors
+import shutil
 import socket
+import ssl
+import subprocess
+import threading
+
+import pytest
 
 from app.main import create_app
-from app.domain.models import RegisteredNode
-from app.services.prober import tcp_probe
+from app.api.probes import probe_targets
+from app.domain.models import Node, RegisteredNode
+from app.services.prober import (
+    async_phased_probe,
+    async_tcp_probe,
+    bulk_tcp_probe,
+    bulk_udp_probe,
+    tcp_probe,
+)
 
 
 def test_tcp_probe_classifies_timeout_error(monkeypatch) -> None:
@@ -30,3 +45,324 @@ def test_non_positive_probe_timeout_env_falls_back_to_default(monkeypatch) -> No
     monkeypatch.setenv('NETSENTINEL_PROBE_TIMEOUT_S', '0')
     app = create_app()
     assert app.state.probe_timeout_s == 1.5
+
+
+def test_async_tcp_probe_reports_up_for_listening_port() -> None:
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    node = RegisteredNode(
+        node_id='node-local',
+        name='local-node',
+        host='127.0.0.1',
+        port=listener.getsockname()[1],
+        region='us',
+        enabled=True,
+    )
+
+    try:
+        result = asyncio.run(async_tcp_probe(node, timeout_s=1.0))
+    finally:
+        listener.close()
+
+    assert result.status == 'up'
+    assert result.error is None
+
+
+def test_async_tcp_probe_classifies_timeout_error(monkeypatch) -> None:
+    node = RegisteredNode(
+        node_id='node-timeout',
+        name='timeout-node',
+        host='203.0.113.10',
+        port=443,
+        region='us',
+        enabled=True,
+    )
+
+    async def never_connects(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(asyncio, 'open_connection', never_connects)
+
+    result = asyncio.run(async_tcp_probe(node, timeout_s=0.05))
+
+    assert result.status == 'down'
+    assert result.error == 'timeout'
+
+
+def test_async_tcp_probe_reports_connection_errors(monkeypatch) -> None:
+    node = RegisteredNode(
+        node_id='node-refused',
+        name='refused-node',
+        host='127.0.0.1',
+        port=443,
+        region='us',
+        enabled=True,
+    )
+
+    async def refuse(*args, **kwargs):
+        raise ConnectionRefusedError('connection refused')
+
+    monkeypatch.setattr(asyncio, 'open_connection', refuse)
+
+    result = asyncio.run(async_tcp_probe(node, timeout_s=0.5))
+
+    assert result.status == 'down'
+    assert result.error == 'connection refused'
+
+
+def test_bulk_tcp_probe_returns_results_in_node_order() -> None:
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(512)
+    closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    closed.bind(('127.0.0.1', 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+    nodes = [
+        RegisteredNode(
+            node_id=f'node-{index}',
+            name=f'node-{index}',
+            host='127.0.0.1',
+            port=listener.getsockname()[1] if index % 2 == 0 else closed_port,
+            region='us',
+            enabled=True,
+        )
+        for index in range(40)
+    ]
+
+    try:
+        results = bulk_tcp_probe(nodes, timeout_s=1.0, max_in_flight=8)
+    finally:
+        listener.close()
+
+    assert [result.node_id for result in results] == [node.node_id for node in nodes]
+    assert all(result.status == 'up' for result in results[0::2])
+    assert all(result.status == 'down' for result in results[1::2])
+    assert 'refused' in results[1].error.lower()
+
+
+def test_bulk_tcp_probe_reports_resolution_errors(monkeypatch) -> None:
+    node = RegisteredNode(
+        node_id='node-dns',
+        name='dns-node',
+        host='unresolvable.invalid',
+        port=443,
+        region='us',
+        enabled=True,
+    )
+
+    def fail_resolution(*args, **kwargs):
+        raise socket.gaierror(-2, 'Name or service not known')
+
+    monkeypatch.setattr(socket, 'getaddrinfo', fail_resolution)
+
+    results = bulk_tcp_probe([node], timeout_s=0.5)
+
+    assert results[0].status == 'down'
+    assert 'Name or service not known' in results[0].error
+
+
+def test_async_phased_probe_times_dns_and_connect_phases() -> None:
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    node = RegisteredNode(
+        node_id='node-local',
+        name='local-node',
+        host='127.0.0.1',
+        port=listener.getsockname()[1],
+        region='us',
+        enabled=True,
+    )
+
+    try:
+        result = asyncio.run(async_phased_probe(node, timeout_s=1.0))
+    finally:
+        listener.close()
+
+    assert result.status == 'up'
+    assert result.dns_ms is not None
+    assert result.connect_ms is not None
+    assert result.tls_ms is None
+    assert result.latency_ms >= result.connect_ms
+
+
+@pytest.mark.skipif(shutil.which('openssl') is None, reason='openssl CLI not available')
+def test_async_phased_probe_times_tls_handshake(tmp_path) -> None:
+    cert_path = tmp_path / 'cert.pem'
+    key_path = tmp_path / 'key.pem'
+    subprocess.run(
+        [
+            'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+            '-keyout', str(key_path), '-out', str(cert_path),
+            '-days', '1', '-subj', '/CN=localhost',
+        ],
+        check=True,
+        capture_output=True,
+    )
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_context.load_cert_chain(cert_path, key_path)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+
+    def serve_once() -> None:
+        conn, _ = listener.accept()
+        try:
+            with server_context.wrap_socket(conn, server_side=True):
+                pass
+        except (OSError, ssl.SSLError):
+            conn.close()
+
+    server = threading.Thread(target=serve_once, daemon=True)
+    server.start()
+    client_context = ssl.create_default_context()
+    client_context.check_hostname = False
+    client_context.verify_mode = ssl.CERT_NONE
+    node = RegisteredNode(
+        node_id='node-tls',
+        name='tls-node',
+        host='127.0.0.1',
+        port=listener.getsockname()[1],
+        region='us',
+        enabled=True,
+    )
+
+    try:
+        result = asyncio.run(
+            async_phased_probe(node, timeout_s=2.0, ssl_context=client_context)
+        )
+    finally:
+        server.join(timeout=2.0)
+        listener.close()
+
+    assert result.status == 'up'
+    assert result.tls_ms is not None
+    assert result.connect_ms is not None
+
+
+def test_probe_tls_env_enables_phased_probing(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_TLS', 'true')
+    monkeypatch.setenv('NETSENTINEL_PROBE_TLS_VERIFY', 'false')
+    app = create_app()
+    assert app.state.probe_phases is True
+    assert app.state.probe_tls_context.verify_mode == ssl.CERT_NONE
+
+
+def _start_udp_server(reply=None) -> tuple[socket.socket, threading.Event]:
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+    server.settimeout(0.05)
+    stop = threading.Event()
+
+    def serve() -> None:
+        while not stop.is_set():
+            try:
+                payload, sender = server.recvfrom(2048)
+            except OSError:
+                continue
+            server.sendto(payload if reply is None else reply, sender)
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server, stop
+
+
+def _udp_node(node_id: str, port: int) -> RegisteredNode:
+    return RegisteredNode(
+        node_id=node_id,
+        name=node_id,
+        host='127.0.0.1',
+        port=port,
+        region='us',
+        probe_type='udp',
+    )
+
+
+def test_bulk_udp_probe_matches_echo_replies_and_times_out_silent_nodes() -> None:
+    echo, stop = _start_udp_server()
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent.bind(('127.0.0.1', 0))
+    echo_port = echo.getsockname()[1]
+    nodes = [
+        _udp_node('echo-a', echo_port),
+        _udp_node('silent', silent.getsockname()[1]),
+        _udp_node('echo-b', echo_port),
+    ]
+
+    try:
+        results = bulk_udp_probe(nodes, timeout_s=0.3)
+    finally:
+        stop.set()
+        silent.close()
+
+    assert [result.node_id for result in results] == ['echo-a', 'silent', 'echo-b']
+    assert [result.status for result in results] == ['up', 'down', 'up']
+    assert results[1].error == 'timeout'
+
+
+def test_bulk_udp_probe_credits_untokened_replies_by_address() -> None:
+    server, stop = _start_udp_server(reply=b'pong')
+    node = _udp_node('pong', server.getsockname()[1])
+
+    try:
+        results = bulk_udp_probe([node], timeout_s=0.5)
+    finally:
+        stop.set()
+
+    assert results[0].status == 'up'
+
+
+def test_probe_targets_routes_udp_nodes_to_the_udp_prober() -> None:
+    server, stop = _start_udp_server()
+    app = create_app()
+    node = app.state.repository.add_node(
+        Node(
+            name='wg',
+            host='127.0.0.1',
+            port=server.getsockname()[1],
+            region='us',
+            probe_type='udp',
+        )
+    )
+
+    async def fail_tcp(node: RegisteredNode):
+        raise AssertionError('UDP nodes must not use the TCP prober')
+
+    app.state.probe_node = fail_tcp
+    try:
+        results = asyncio.run(probe_targets(app, [node]))
+    finally:
+        stop.set()
+
+    assert results[0].status == 'up'
+    assert app.state.repository.list_probe_results(node_id=node.node_id)[0].status == 'up'
+
+
+def test_bulk_udp_probe_waits_for_writability_when_send_blocks(monkeypatch) -> None:
+    echo, stop = _start_udp_server()
+    node = _udp_node('echo', echo.getsockname()[1])
+    blocked = {'remaining': 1}
+    watched_events: list[int] = []
+    send = socket.socket.sendto
+    modify = selectors.DefaultSelector.modify
+
+    def flaky_sendto(self, *args):
+        if blocked['remaining']:
+            blocked['remaining'] -= 1
+            raise BlockingIOError('send buffer full')
+        return send(self, *args)
+
+    def recording_modify(self, fileobj, events, data=None):
+        watched_events.append(events)
+        return modify(self, fileobj, events, data)
+
+    monkeypatch.setattr(socket.socket, 'sendto', flaky_sendto)
+    monkeypatch.setattr(selectors.DefaultSelector, 'modify', recording_modify)
+    try:
+        results = bulk_udp_probe([node], timeout_s=0.5)
+    finally:
+        stop.set()
+
+    assert results[0].status == 'up'
+    assert any(events & selectors.EVENT_WRITE for events in watched_events)
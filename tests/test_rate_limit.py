@@ -0,0 +1,163 @@
+import asyncio
+import time
+
+import pytest
+from datetime import UTC, datetime
+
+from fastapi.testclient import TestClient
+
+from app.domain.models import ProbeResult, RegisteredNode
+from app.main import create_app
+from app.services.probe_engine import run_bulk_probes, run_probes
+from app.services.rate_limit import ProbeRateLimiter, TokenBucket
+
+
+def _node(index: int, host: str, region: str = 'us') -> RegisteredNode:
+    return RegisteredNode(
+        node_id=f'node-{index}',
+        name=f'node-{index}',
+        host=host,
+        port=443 + index,
+        region=region,
+    )
+
+
+def test_token_bucket_allows_burst_then_spaces_reservations() -> None:
+    bucket = TokenBucket(rate_per_s=10.0, burst=2)
+
+    waits = [bucket.reserve() for _ in range(4)]
+
+    assert waits[0] == 0.0
+    assert waits[1] == 0.0
+    assert 0.05 < waits[2] <= 0.1
+    assert 0.15 < waits[3] <= 0.2
+
+
+def test_run_probes_bounds_rate_per_host_but_not_globally() -> None:
+    limiter = ProbeRateLimiter(host_rate_per_s=20.0, host_burst=1)
+    started_at: dict[str, float] = {}
+
+    async def fake_probe(node) -> ProbeResult:
+        started_at[node.node_id] = time.monotonic()
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=1.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    shared = [_node(index, '10.0.0.1') for index in range(5)]
+    spread = [_node(index, f'10.0.1.{index}') for index in range(5, 10)]
+    origin = time.monotonic()
+    asyncio.run(run_probes(shared + spread, fake_probe, rate_limiter=limiter))
+
+    shared_starts = sorted(started_at[node.node_id] - origin for node in shared)
+    spread_starts = [started_at[node.node_id] - origin for node in spread]
+    assert shared_starts[-1] >= 0.18
+    assert max(spread_starts) < 0.1
+    assert limiter.stats()['throttled_total'] == 4
+    assert limiter.stats()['buckets'] == 6
+
+
+def test_region_buckets_apply_across_hosts() -> None:
+    limiter = ProbeRateLimiter(region_rate_per_s=20.0, region_burst=2)
+    nodes = [_node(index, f'10.0.0.{index}', region='eu') for index in range(4)]
+
+    async def acquire_all() -> float:
+        started = time.monotonic()
+        for node in nodes:
+            await limiter.acquire(node)
+        return time.monotonic() - started
+
+    assert asyncio.run(acquire_all()) >= 0.09
+    assert limiter.stats()['throttled_total'] == 2
+
+
+def test_rate_limit_config_is_exposed_in_metrics(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_HOST_RATE_PER_S', '5')
+    monkeypatch.setenv('NETSENTINEL_REGION_RATE_PER_S', 'bad')
+    app = create_app(scheduler_interval_s=60.0)
+
+    limiter = app.state.probe_rate_limiter
+    assert limiter.host_rate_per_s == 5.0
+    assert limiter.region_rate_per_s == 0.0
+
+    payload = TestClient(app).get('/metrics').json()
+    assert payload['rate_limit'] == {
+        'enabled': True,
+        'buckets': 0,
+        'throttled_total': 0,
+        'wait_s_total': 0.0,
+    }
+
+
+def test_probes_cancelled_at_deadline_refund_their_rate_limit_tokens() -> None:
+    limiter = ProbeRateLimiter(host_rate_per_s=10.0, host_burst=1)
+
+    async def fake_probe(node) -> ProbeResult:
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=1.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    nodes = [_node(index, '10.0.0.1') for index in range(100)]
+    first = asyncio.run(run_probes(nodes, fake_probe, rate_limiter=limiter, deadline_s=0.3))
+    assert sum(result.error == 'deadline_exceeded' for result in first) > 90
+
+    started = time.monotonic()
+    second = asyncio.run(
+        run_probes(nodes[:1], fake_probe, rate_limiter=limiter, deadline_s=1.0)
+    )
+
+    assert second[0].status == 'up'
+    assert time.monotonic() - started < 0.5
+
+
+def test_bulk_probes_are_paced_through_rate_limit_buckets() -> None:
+    limiter = ProbeRateLimiter(host_rate_per_s=20.0, host_burst=1)
+    started_at: dict[str, float] = {}
+
+    def fake_bulk_probe(nodes, deadline_s=None) -> list[ProbeResult]:
+        now = time.monotonic()
+        for node in nodes:
+            started_at[node.node_id] = now
+        return [
+            ProbeResult(
+                node_id=node.node_id,
+                status='up',
+                latency_ms=1.0,
+                checked_at=datetime.now(UTC),
+            )
+            for node in nodes
+        ]
+
+    shared = [_node(index, '10.0.0.1') for index in range(5)]
+    spread = [_node(index, f'10.0.1.{index}') for index in range(5, 10)]
+    throttled = [_node(index, '10.0.0.2') for index in range(10, 60)]
+    origin = time.monotonic()
+    results = asyncio.run(
+        run_bulk_probes(
+            shared + spread + throttled,
+            fake_bulk_probe,
+            rate_limiter=limiter,
+            deadline_s=0.5,
+        )
+    )
+
+    shared_starts = sorted(started_at[node.node_id] - origin for node in shared)
+    assert shared_starts[-1] >= 0.18
+    assert max(started_at[node.node_id] - origin for node in spread) < 0.1
+    assert [result.node_id for result in results] == [
+        node.node_id for node in shared + spread + throttled
+    ]
+    assert sum(result.error == 'deadline_exceeded' for result in results[10:]) > 30
+
+
+def test_rate_limits_are_refused_with_sharded_probing(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_SHARDS', '2')
+    monkeypatch.setenv('NETSENTINEL_HOST_RATE_PER_S', '5')
+
+    with pytest.raises(RuntimeError, match='NETSENTINEL_PROBE_SHARDS'):
+        create_app(scheduler_interval_s=60.0)
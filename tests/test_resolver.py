@@ -0,0 +1,147 @@
+import asyncio
+import socket
+import time
+
+from fastapi.testclient import TestClient
+
+from app.domain.models import RegisteredNode
+from app.main import create_app
+from app.services.prober import async_phased_probe, async_tcp_probe, bulk_tcp_probe
+from app.services.resolver import DNSCache
+
+_real_getaddrinfo = socket.getaddrinfo
+
+
+def _fake_resolver(monkeypatch, delay_s: float = 0.0) -> list[str]:
+    calls: list[str] = []
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host != 'probe.test':
+            return _real_getaddrinfo(host, port, *args, **kwargs)
+        calls.append(host)
+        time.sleep(delay_s)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port or 0))]
+
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    return calls
+
+
+def test_dns_cache_counts_misses_then_hits(monkeypatch) -> None:
+    calls = _fake_resolver(monkeypatch)
+    cache = DNSCache(ttl_s=60.0)
+
+    assert cache.resolve('probe.test') == ('127.0.0.1',)
+    assert cache.resolve('probe.test') == ('127.0.0.1',)
+    assert cache.resolve('10.0.0.1') == ('10.0.0.1',)
+
+    assert calls == ['probe.test']
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    cache.close()
+
+
+def test_dns_cache_refreshes_in_background_before_expiry(monkeypatch) -> None:
+    calls = _fake_resolver(monkeypatch)
+    cache = DNSCache(ttl_s=0.4, refresh_ratio=0.25)
+
+    cache.resolve('probe.test')
+    time.sleep(0.15)
+    assert cache.lookup('probe.test') == ('127.0.0.1',)
+    deadline = time.time() + 1.0
+    while cache.refreshes == 0 and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert cache.refreshes == 1
+    assert len(calls) == 2
+    assert cache.misses == 1
+    cache.close()
+
+
+def test_dns_cache_resolves_again_after_expiry(monkeypatch) -> None:
+    calls = _fake_resolver(monkeypatch)
+    cache = DNSCache(ttl_s=0.05, refresh_ratio=1.0)
+
+    cache.resolve('probe.test')
+    time.sleep(0.1)
+    cache.resolve('probe.test')
+
+    assert len(calls) == 2
+    assert cache.misses == 2
+    cache.close()
+
+
+def test_async_tcp_probe_can_exclude_dns_time_from_latency(monkeypatch) -> None:
+    _fake_resolver(monkeypatch, delay_s=0.2)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    node = RegisteredNode(
+        node_id='node-dns',
+        name='dns-node',
+        host='probe.test',
+        port=listener.getsockname()[1],
+        region='us',
+    )
+
+    try:
+        excluded = asyncio.run(
+            async_tcp_probe(node, timeout_s=1.0, resolver=DNSCache(), include_dns=False)
+        )
+        included = asyncio.run(
+            async_tcp_probe(node, timeout_s=1.0, resolver=DNSCache(), include_dns=True)
+        )
+    finally:
+        listener.close()
+
+    assert excluded.status == 'up'
+    assert excluded.latency_ms < 150
+    assert included.status == 'up'
+    assert included.latency_ms >= 200
+
+
+def test_probes_fall_back_to_later_cached_addresses(monkeypatch) -> None:
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host != 'multi.test':
+            return _real_getaddrinfo(host, port, *args, **kwargs)
+        return [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.2', port or 0)),
+            (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port or 0)),
+        ]
+
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    node = RegisteredNode(
+        node_id='node-multi',
+        name='multi-node',
+        host='multi.test',
+        port=listener.getsockname()[1],
+        region='us',
+    )
+    cache = DNSCache()
+
+    try:
+        assert cache.resolve('multi.test') == ('127.0.0.2', '127.0.0.1')
+        results = [
+            asyncio.run(async_tcp_probe(node, timeout_s=1.0, resolver=cache)),
+            asyncio.run(async_phased_probe(node, timeout_s=1.0, resolver=cache)),
+            bulk_tcp_probe([node], timeout_s=1.0, resolver=cache)[0],
+        ]
+    finally:
+        listener.close()
+        cache.close()
+
+    assert [result.status for result in results] == ['up', 'up', 'up']
+
+
+def test_dns_cache_stats_are_exposed_in_metrics(monkeypatch) -> None:
+    app = create_app(scheduler_interval_s=60.0)
+    payload = TestClient(app).get('/metrics').json()
+    assert payload['dns_cache']['enabled'] is True
+    assert payload['dns_cache']['hits'] == 0
+
+    monkeypatch.setenv('NETSENTINEL_DNS_CACHE_TTL_S', '0')
+    app = create_app(scheduler_interval_s=60.0)
+    payload = TestClient(app).get('/metrics').json()
+    assert payload['dns_cache'] == {'enabled': False}
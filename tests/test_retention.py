@@ -0,0 +1,65 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from app.domain.models import Node, ProbeResult
+from app.services.retention import RetentionPruner
+from app.storage.repository import InMemoryRepository
+
+
+def _seed(repository: InMemoryRepository, ages_h: list[int]) -> list[str]:
+    now = datetime.now(UTC)
+    node_ids = []
+    for name in ('a', 'b'):
+        node = repository.add_node(Node(name=name, host='127.0.0.1', port=443, region='us'))
+        node_ids.append(node.node_id)
+        repository.add_probe_results(
+            [
+                ProbeResult(
+                    node_id=node.node_id,
+                    status='up',
+                    latency_ms=float(age),
+                    checked_at=now - timedelta(hours=age),
+                )
+                for age in ages_h
+            ]
+        )
+    return node_ids
+
+
+def test_pruner_drops_results_older_than_max_age() -> None:
+    repository = InMemoryRepository()
+    node_ids = _seed(repository, [1, 5, 30, 50])
+    pruner = RetentionPruner(repository, max_age_s=86400)
+
+    assert asyncio.run(pruner.run_once()) == 4
+
+    assert repository.count_probe_results() == 4
+    kept = repository.list_probe_results(node_id=node_ids[0])
+    assert [result.latency_ms for result in kept] == [1.0, 5.0]
+    stats = pruner.stats()
+    assert stats['runs'] == 1
+    assert stats['rows_pruned_total'] == 4
+    assert stats['last_duration_ms'] is not None
+
+
+def test_pruner_keeps_newest_results_per_node() -> None:
+    repository = InMemoryRepository()
+    node_ids = _seed(repository, [1, 5, 30, 50])
+    pruner = RetentionPruner(repository, keep_per_node=1)
+
+    assert asyncio.run(pruner.run_once()) == 6
+    for node_id in node_ids:
+        assert [r.latency_ms for r in repository.list_probe_results(node_id=node_id)] == [1.0]
+
+
+def test_disabled_pruner_does_not_start() -> None:
+    pruner = RetentionPruner(InMemoryRepository())
+
+    async def start_and_check() -> bool:
+        await pruner.start()
+        running = pruner.running
+        await pruner.stop()
+        return running
+
+    assert pruner.enabled is False
+    assert asyncio.run(start_and_check()) is False
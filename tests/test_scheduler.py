@@ -1,4 +1,5 @@
 import asyncio
+import socket
 import time
 from datetime import UTC, datetime
 
@@ -6,6 +7,7 @@ from fastapi.testclient import TestClient
 
 from app.domain.models import Node, ProbeResult
 from app.main import create_app
+from app.services.scheduler import dispatch_phase
 
 
 def test_scheduler_status_endpoint_reports_running() -> None:
@@ -285,3 +287,195 @@ def test_explicit_scheduler_interval_and_timeout_are_also_clamped() -> None:
     app = create_app(scheduler_interval_s=0.2, probe_timeout_s=0.01)
     assert app.state.scheduler.interval_s == 1.0
     assert app.state.probe_timeout_s == 0.1
+
+
+def test_scheduler_sharded_cycle_probes_in_worker_processes(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_SHARDS', '2')
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    port = listener.getsockname()[1]
+    app = create_app(scheduler_interval_s=60.0)
+
+    try:
+        with TestClient(app) as client:
+            for index in range(5):
+                client.post(
+                    '/nodes',
+                    json={
+                        'name': f'shard-node-{index}',
+                        'host': '127.0.0.1',
+                        'port': port,
+                        'region': f'r{index}',
+                    },
+                )
+
+            run_response = client.post('/scheduler/run-once')
+            assert run_response.status_code == 200
+            assert run_response.json()['results_count'] == 5
+
+            results = client.get('/results').json()
+            assert len(results) == 5
+            assert all(result['status'] == 'up' for result in results)
+
+            payload = client.get('/scheduler/status').json()
+            assert payload['probe_shards'] == 2
+            assert [timing['nodes'] for timing in payload['shard_timings']] == [3, 2]
+            assert all(timing['duration_ms'] >= 0 for timing in payload['shard_timings'])
+    finally:
+        listener.close()
+
+    assert app.state.scheduler._executor is None
+
+
+def test_scheduler_interval_for_prefers_node_then_region_then_global(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_REGION_INTERVALS', 'eu=10, us=bad,ap=300')
+    app = create_app(scheduler_interval_s=60.0)
+    scheduler = app.state.scheduler
+    repository = app.state.repository
+
+    pinned = repository.add_node(
+        Node(name='pinned', host='10.0.0.1', port=443, region='eu', probe_interval_s=5)
+    )
+    regional = repository.add_node(Node(name='regional', host='10.0.0.2', port=443, region='eu'))
+    default = repository.add_node(Node(name='default', host='10.0.0.3', port=443, region='us'))
+
+    assert app.state.region_intervals == {'eu': 10.0, 'ap': 300.0}
+    assert scheduler.interval_for(pinned) == 5
+    assert scheduler.interval_for(regional) == 10.0
+    assert scheduler.interval_for(default) == 60.0
+
+
+def test_scheduler_due_dispatch_probes_nodes_on_their_own_interval(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_SCHEDULER_DISPATCH', 'due')
+    app = create_app(scheduler_interval_s=60.0)
+
+    def fake_probe(node) -> ProbeResult:
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=1.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    app.state.probe_node = fake_probe
+    repository = app.state.repository
+    fast = repository.add_node(
+        Node(name='fast', host='10.0.0.1', port=443, region='us', probe_interval_s=1)
+    )
+    slow = repository.add_node(Node(name='slow', host='10.0.0.2', port=443, region='us'))
+
+    with TestClient(app) as client:
+        deadline = time.time() + 3.0
+        while time.time() < deadline:
+            if len(repository.list_probe_results(node_id=fast.node_id)) >= 2:
+                break
+            time.sleep(0.05)
+
+        payload = client.get('/scheduler/status').json()
+
+    assert len(repository.list_probe_results(node_id=fast.node_id)) >= 2
+    assert repository.list_probe_results(node_id=slow.node_id) == []
+    assert payload['dispatch_mode'] == 'due'
+    assert payload['scheduled_nodes'] == 2
+    assert payload['dispatched_batches'] >= 2
+    assert payload['successful_cycles'] == 0
+
+
+def test_dispatch_phase_is_deterministic_and_spread() -> None:
+    phases = [dispatch_phase(f'node-{index}') for index in range(1000)]
+
+    assert phases == [dispatch_phase(f'node-{index}') for index in range(1000)]
+    assert all(0 <= phase < 1 for phase in phases)
+    deciles = [sum(1 for phase in phases if int(phase * 10) == bucket) for bucket in range(10)]
+    assert min(deciles) > 50
+    assert max(deciles) < 150
+
+
+def test_scheduler_staggered_dispatch_spreads_probes_across_window(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_SCHEDULER_DISPATCH', 'staggered')
+    monkeypatch.setenv('NETSENTINEL_DISPATCH_JITTER_S', '0.05')
+    app = create_app(scheduler_interval_s=1.0)
+    first_probe_at: dict[str, float] = {}
+
+    def fake_probe(node) -> ProbeResult:
+        first_probe_at.setdefault(node.node_id, time.monotonic())
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=1.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    app.state.probe_node = fake_probe
+    for index in range(20):
+        app.state.repository.add_node(
+            Node(name=f'stagger-{index}', host=f'10.0.0.{index}', port=443, region='us')
+        )
+
+    with TestClient(app) as client:
+        deadline = time.time() + 3.0
+        while time.time() < deadline and len(first_probe_at) < 20:
+            time.sleep(0.05)
+        payload = client.get('/scheduler/status').json()
+
+    assert len(first_probe_at) == 20
+    assert max(first_probe_at.values()) - min(first_probe_at.values()) > 0.3
+    assert payload['dispatch_mode'] == 'staggered'
+    assert payload['dispatch']['rate_per_s'] > 0
+    assert payload['dispatch']['lag_ms_max'] is not None
+    assert payload['dispatch']['lag_ms_max'] < 500
+
+
+def test_scheduler_cycle_mode_reports_no_dispatch_stats() -> None:
+    app = create_app(scheduler_interval_s=60.0)
+
+    with TestClient(app) as client:
+        payload = client.get('/scheduler/status').json()
+
+    assert payload['dispatch_mode'] == 'cycle'
+    assert payload['dispatch'] == {'rate_per_s': None, 'lag_ms_avg': None, 'lag_ms_max': None}
+
+
+def test_heap_batches_tune_concurrency_once_per_window(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_SCHEDULER_DISPATCH', 'due')
+    monkeypatch.setenv('NETSENTINEL_PROBE_CONCURRENCY_MODE', 'aimd')
+    app = create_app(scheduler_interval_s=60.0)
+    recorded: list[tuple[float, int]] = []
+    controller = app.state.concurrency_controller
+
+    def record_cycle(duration_s, interval_s, results):
+        recorded.append((duration_s, len(results)))
+        return controller.limit
+
+    monkeypatch.setattr(controller, 'record_cycle', record_cycle)
+
+    def fake_probe(node) -> ProbeResult:
+        return ProbeResult(
+            node_id=node.node_id,
+            status='up',
+            latency_ms=1.0,
+            checked_at=datetime.now(UTC),
+        )
+
+    app.state.probe_node = fake_probe
+    nodes = [
+        app.state.repository.add_node(
+            Node(name=f'node-{index}', host=f'10.0.0.{index}', port=443, region='us')
+        )
+        for index in range(3)
+    ]
+    scheduler = app.state.scheduler
+
+    async def run_window() -> None:
+        await scheduler._run_batch(nodes[:2])
+        await scheduler._run_batch(nodes[2:])
+        scheduler._close_dispatch_window()
+
+    asyncio.run(run_window())
+
+    assert scheduler.dispatched_batches == 2
+    assert scheduler.successful_cycles == 0
+    assert scheduler.last_cycle_duration_ms is None
+    assert len(recorded) == 1
+    assert recorded[0][1] == 3
@@ -0,0 +1,53 @@
+import math
+import random
+
+from app.storage.sketch import (
+    SKETCH_MAX_BINS,
+    SKETCH_RELATIVE_ACCURACY,
+    LatencySketch,
+    merge_sketch_bytes,
+)
+
+
+def _exact(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def test_sketch_quantiles_stay_within_relative_accuracy() -> None:
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3.0, 1.2) for _ in range(20000)]
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = _exact(values, q)
+        assert abs(sketch.quantile(q) - exact) <= exact * SKETCH_RELATIVE_ACCURACY
+
+
+def test_merged_sketches_match_a_single_sketch_of_all_values() -> None:
+    rng = random.Random(11)
+    left, right, whole = LatencySketch(), LatencySketch(), LatencySketch()
+    for index in range(5000):
+        value = rng.uniform(0.5, 900.0)
+        (left if index % 3 else right).add(value)
+        whole.add(value)
+
+    merged = merge_sketch_bytes(left.to_bytes(), right.to_bytes())
+
+    assert merged == whole.to_bytes()
+    assert LatencySketch.from_bytes(merged).quantile(0.95) == whole.quantile(0.95)
+    assert merge_sketch_bytes(None, merged) == merged
+
+
+def test_sketch_memory_is_capped() -> None:
+    sketch = LatencySketch()
+    for exponent in range(-2, 60):
+        sketch.add(10.0**exponent)
+    sketch.add(0.0)
+
+    assert len(sketch.bins) <= SKETCH_MAX_BINS
+    assert sketch.count == 63
+    assert sketch.quantile(0.0) == 0.0
+    assert LatencySketch().quantile(0.5) is None
@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.storage.sqlite_connections import SQLiteConnectionManager
+
+
+def _manager(tmp_path, **kwargs) -> SQLiteConnectionManager:
+    manager = SQLiteConnectionManager(str(tmp_path / 'writes.sqlite3'), **kwargs)
+    manager.submit(
+        lambda conn: conn.execute('CREATE TABLE items (value INTEGER UNIQUE)')
+    ).result(timeout=5.0)
+    return manager
+
+
+def _insert(value: int):
+    return lambda conn: conn.execute('INSERT INTO items(value) VALUES (?)', (value,))
+
+
+def _count(manager: SQLiteConnectionManager) -> int:
+    with manager.reader() as conn:
+        return conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+
+
+def test_writer_groups_queued_writes_into_one_commit(tmp_path) -> None:
+    manager = _manager(tmp_path, group_commit_delay_s=0.05)
+    release = threading.Event()
+    blocker = manager.submit(lambda conn: release.wait(timeout=5.0))
+    futures = [manager.submit(_insert(value)) for value in range(5)]
+    commits_before = manager.commits
+    release.set()
+    blocker.result(timeout=5.0)
+    for future in futures:
+        future.result(timeout=5.0)
+
+    assert _count(manager) == 5
+    assert manager.commits - commits_before <= 1
+    manager.close()
+
+
+def test_failing_write_is_rolled_back_alone(tmp_path) -> None:
+    manager = _manager(tmp_path, group_commit_delay_s=0.05)
+    release = threading.Event()
+    blocker = manager.submit(lambda conn: release.wait(timeout=5.0))
+    first = manager.submit(_insert(1))
+
+    def insert_then_fail(conn: sqlite3.Connection) -> None:
+        _insert(2)(conn)
+        _insert(1)(conn)
+
+    failing = manager.submit(insert_then_fail)
+    last = manager.submit(_insert(3))
+    release.set()
+    blocker.result(timeout=5.0)
+
+    first.result(timeout=5.0)
+    last.result(timeout=5.0)
+    with pytest.raises(sqlite3.IntegrityError):
+        failing.result(timeout=5.0)
+    with manager.reader() as conn:
+        values = [row[0] for row in conn.execute('SELECT value FROM items ORDER BY value')]
+    assert values == [1, 3]
+    manager.close()
+
+
+def test_writer_restarts_after_close(tmp_path) -> None:
+    manager = _manager(tmp_path)
+    manager.close()
+
+    manager.submit(_insert(1)).result(timeout=5.0)
+
+    assert _count(manager) == 1
+    manager.close()
+
+
+def test_writer_open_failure_fails_queued_writes(tmp_path) -> None:
+    manager = SQLiteConnectionManager(str(tmp_path))
+
+    with pytest.raises(sqlite3.Error):
+        manager.submit(lambda conn: None).result(timeout=5.0)
+    with pytest.raises(sqlite3.Error):
+        manager.submit(lambda conn: None).result(timeout=5.0)
@@ -1,10 +1,15 @@
+import asyncio
+import math
 import sqlite3
-from datetime import UTC, datetime
+import threading
+import time
+from datetime import UTC, datetime, timedelta
 
 from fastapi.testclient import TestClient
 
-from app.domain.models import ProbeResult
+from app.domain.models import Node, ProbeResult, ProbeResultsGroupSummary
 from app.main import create_app
+from app.storage.repository import InMemoryRepository
 from app.storage.sqlite_repository import SQLiteRepository
 
 
@@ -128,12 +133,18 @@ def test_sqlite_retention_keeps_latest_results_per_node(tmp_path, monkeypatch) -
 
         client.post('/probes/run', json={'node_id': node['node_id']})
         client.post('/probes/run', json={'node_id': node['node_id']})
+        assert len(client.get('/results', params={'node_id': node['node_id']}).json()) == 2
+
+        assert asyncio.run(app.state.retention_pruner.run_once()) == 1
 
         results_response = client.get('/results', params={'node_id': node['node_id']})
         assert results_response.status_code == 200
         results = results_response.json()
         assert len(results) == 1
         assert results[0]['latency_ms'] == 2.0
+        retention = client.get('/metrics').json()['retention']
+        assert retention['last_rows_pruned'] == 1
+        assert retention['last_duration_ms'] is not None
 
 
 def test_sqlite_init_failure_fails_fast_with_clear_message(tmp_path) -> None:
@@ -266,6 +277,428 @@ def test_sqlite_results_summary_matches_in_memory_contract(tmp_path, monkeypatch
         assert payload['down_checks'] == 1
         assert payload['availability_pct'] == 66.667
         assert payload['avg_latency_ms'] == 20.0
+        assert abs(payload['p50_latency_ms'] - 10.0) <= 0.1
+        assert abs(payload['p99_latency_ms'] - 30.0) <= 0.3
         assert payload['last_checked_at'] == base.replace(minute=2).isoformat().replace(
             '+00:00', 'Z'
         )
+
+
+def test_sqlite_migrates_v1_nodes_and_persists_probe_interval(tmp_path) -> None:
+    db_path = tmp_path / 'netsentinel.sqlite3'
+    with sqlite3.connect(str(db_path)) as conn:
+        SQLiteRepository._migrate_to_v1(conn)
+        conn.execute(
+            "INSERT INTO nodes(node_id, name, host, port, region, enabled) "
+            "VALUES ('legacy', 'legacy', '127.0.0.1', 443, 'us', 1)"
+        )
+        conn.execute('PRAGMA user_version = 1')
+
+    repository = SQLiteRepository(str(db_path))
+    repository.initialize()
+    created = repository.add_node(
+        Node(name='fast', host='127.0.0.1', port=8443, region='us', probe_interval_s=10)
+    )
+
+    nodes = {node.node_id: node for node in repository.list_nodes()}
+    assert nodes['legacy'].probe_interval_s is None
+    assert nodes[created.node_id].probe_interval_s == 10
+    assert nodes['legacy'].probe_type == 'tcp'
+
+
+def test_sqlite_persists_node_probe_settings_and_status_codes(tmp_path) -> None:
+    repository = SQLiteRepository(str(tmp_path / 'netsentinel.sqlite3'))
+    repository.initialize()
+    created = repository.add_node(
+        Node(name='wg', host='127.0.0.1', port=51820, region='us', probe_type='udp')
+    )
+    panel = repository.add_node(
+        Node(
+            name='panel',
+            host='127.0.0.1',
+            port=8443,
+            region='us',
+            probe_type='https',
+            http_path='/healthz',
+        )
+    )
+    repository.add_probe_result(
+        ProbeResult(node_id=panel.node_id, status='up', latency_ms=12.5, status_code=204)
+    )
+
+    assert repository.get_node(created.node_id).probe_type == 'udp'
+    assert repository.get_node(panel.node_id).http_path == '/healthz'
+    assert repository.list_probe_results(node_id=panel.node_id)[0].status_code == 204
+
+
+def test_sqlite_add_probe_results_writes_batch_in_one_transaction(tmp_path) -> None:
+    repository = SQLiteRepository(str(tmp_path / 'netsentinel.sqlite3'))
+    repository.initialize()
+    nodes = [
+        repository.add_node(
+            Node(name=f'node-{index}', host='127.0.0.1', port=1000 + index, region='us')
+        )
+        for index in range(3)
+    ]
+    transactions = {'n': 0}
+    run_write = repository._run_write
+
+    def counting_run_write(fn):
+        transactions['n'] += 1
+        return run_write(fn)
+
+    repository._run_write = counting_run_write
+    repository.add_probe_results(
+        [
+            ProbeResult(
+                node_id=node.node_id,
+                status='up',
+                latency_ms=float(sample),
+                checked_at=datetime(2024, 1, 1, 0, 0, sample, tzinfo=UTC),
+            )
+            for sample in range(5)
+            for node in nodes
+        ]
+    )
+
+    assert transactions['n'] == 1
+    assert repository.count_probe_results() == 15
+    assert repository.prune_probe_results(keep_per_node=2, batch_size=4) == 9
+    assert repository.count_probe_results() == 6
+    kept = repository.list_probe_results(node_id=nodes[0].node_id)
+    assert [result.latency_ms for result in kept] == [4.0, 3.0]
+
+
+def test_sqlite_prune_deletes_old_results_in_bounded_batches(tmp_path) -> None:
+    repository = SQLiteRepository(str(tmp_path / 'netsentinel.sqlite3'))
+    repository.initialize()
+    node = repository.add_node(Node(name='old', host='127.0.0.1', port=443, region='us'))
+    repository.add_probe_results(
+        [
+            ProbeResult(
+                node_id=node.node_id,
+                status='up',
+                latency_ms=float(minute),
+                checked_at=datetime(2024, 1, 1, 0, minute, tzinfo=UTC),
+            )
+            for minute in range(10)
+        ]
+    )
+    deletes = []
+    run_write = repository._run_write
+
+    def recording_run_write(fn):
+        deleted = run_write(fn)
+        deletes.append(deleted)
+        return deleted
+
+    repository._run_write = recording_run_write
+    pruned = repository.prune_probe_results(
+        older_than=datetime(2024, 1, 1, 0, 7, tzinfo=UTC), batch_size=3
+    )
+
+    assert pruned == 7
+    assert deletes == [3, 3, 1]
+    kept = repository.list_probe_results(node_id=node.node_id)
+    assert [result.latency_ms for result in kept] == [9.0, 8.0, 7.0]
+
+
+def test_sqlite_reads_do_not_wait_for_an_open_write(tmp_path) -> None:
+    repository = SQLiteRepository(str(tmp_path / 'netsentinel.sqlite3'))
+    repository.initialize()
+    node = repository.add_node(Node(name='busy', host='127.0.0.1', port=443, region='us'))
+    repository.add_probe_result(ProbeResult(node_id=node.node_id, status='up', latency_ms=1.0))
+    writing = threading.Event()
+    release = threading.Event()
+
+    def slow_write(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "INSERT INTO probe_results(node_key, status, latency_ms, checked_at) "
+            "SELECT node_key, 0, 2.0, 0 FROM nodes WHERE node_id = ?",
+            (node.node_id,),
+        )
+        writing.set()
+        release.wait(timeout=5.0)
+
+    writer = threading.Thread(target=repository._run_write, args=(slow_write,))
+    writer.start()
+    try:
+        assert writing.wait(timeout=5.0)
+        started = time.perf_counter()
+        results = repository.list_probe_results(node_id=node.node_id)
+        elapsed_s = time.perf_counter() - started
+    finally:
+        release.set()
+        writer.join()
+        repository.close()
+
+    assert elapsed_s < 1.0
+    assert [result.status for result in results] == ['up']
+    with sqlite3.connect(str(tmp_path / 'netsentinel.sqlite3')) as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_sqlite_migrates_results_to_compact_layout_in_batches(tmp_path, monkeypatch) -> None:
+    db_path = str(tmp_path / 'netsentinel.sqlite3')
+    monkeypatch.setattr(SQLiteRepository, 'SCHEMA_VERSION', 7)
+    legacy = SQLiteRepository(db_path)
+    legacy.initialize()
+    legacy.close()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO nodes(node_id, name, host, port, region, enabled) "
+            "VALUES ('legacy', 'legacy', '127.0.0.1', 443, 'us', 1)"
+        )
+        conn.executemany(
+            "INSERT INTO probe_results(node_id, status, latency_ms, checked_at, error) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    'legacy',
+                    'down' if second % 2 else 'up',
+                    float(second),
+                    datetime(2024, 1, 1, 0, 0, second, 250, tzinfo=UTC).isoformat(),
+                    'timeout' if second % 2 else None,
+                )
+                for second in range(5)
+            ],
+        )
+    monkeypatch.undo()
+    monkeypatch.setattr('app.storage.sqlite_repository.MIGRATION_BATCH_ROWS', 2)
+
+    repository = SQLiteRepository(db_path)
+    repository.initialize()
+    results = repository.list_probe_results(node_id='legacy')
+    repository.close()
+
+    assert [result.latency_ms for result in results] == [4.0, 3.0, 2.0, 1.0, 0.0]
+    assert results[0].checked_at == datetime(2024, 1, 1, 0, 0, 4, 250, tzinfo=UTC)
+    assert [result.error for result in results[:2]] == [None, 'timeout']
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM error_codes').fetchone()[0] == 1
+        assert conn.execute(
+            'SELECT typeof(node_key), typeof(status), typeof(checked_at) '
+            'FROM probe_results LIMIT 1'
+        ).fetchone() == ('integer', 'integer', 'integer')
+
+
+def _summary_by_scan(results, checked_from, checked_to):
+    window = [r for r in results if checked_from <= r.checked_at <= checked_to]
+    up = [r.latency_ms for r in window if r.status == 'up']
+    return (
+        len(window),
+        len(up),
+        None if not up else round(sum(up) / len(up), 3),
+        max((r.checked_at for r in window), default=None),
+    )
+
+
+def test_sqlite_summary_reads_rollups_and_raw_edges(tmp_path) -> None:
+    repository = SQLiteRepository(str(tmp_path / 'netsentinel.sqlite3'))
+    repository.initialize()
+    node = repository.add_node(Node(name='busy', host='127.0.0.1', port=443, region='us'))
+    start = datetime(2024, 1, 1, 22, 0, tzinfo=UTC)
+    results = [
+        ProbeResult(
+            node_id=node.node_id,
+            status='down' if step % 7 == 0 else 'up',
+            latency_ms=float(step % 50),
+            checked_at=start + timedelta(seconds=37 * step),
+        )
+        for step in range(6000)
+    ]
+    repository.add_probe_results(results)
+
+    def summary_of(checked_from, checked_to):
+        summary = repository.summarize_probe_results(
+            node_id=node.node_id, checked_from=checked_from, checked_to=checked_to
+        )
+        return (
+            summary.total_checks,
+            summary.up_checks,
+            summary.avg_latency_ms,
+            summary.last_checked_at,
+        )
+
+    ranges = [
+        (start + timedelta(minutes=7, seconds=13), start + timedelta(days=2, minutes=91)),
+        (start, start + timedelta(hours=1)),
+        (start + timedelta(seconds=5), start + timedelta(seconds=50)),
+    ]
+    for checked_from, checked_to in ranges:
+        assert summary_of(checked_from, checked_to) == _summary_by_scan(
+            results, checked_from, checked_to
+        )
+    checked_from, checked_to = ranges[0]
+    up = sorted(
+        r.latency_ms for r in results
+        if r.status == 'up' and checked_from <= r.checked_at <= checked_to
+    )
+    p95 = repository.summarize_probe_results(
+        node_id=node.node_id, checked_from=checked_from, checked_to=checked_to
+    ).p95_latency_ms
+    assert abs(p95 - up[math.ceil(0.95 * len(up)) - 1]) <= up[-1] * 0.01
+    plan, raw = repository._plan_summary(0, 86400 * 3 * 1_000_000 + 61_000_000)
+    assert [width for width, _, _ in plan] == [86400, 60]
+    assert raw == [(86400 * 3 * 1_000_000 + 60_000_000, 86400 * 3 * 1_000_000 + 61_000_000)]
+
+    cutoff = start + timedelta(hours=5, minutes=3, seconds=30)
+    repository.prune_probe_results(older_than=cutoff, batch_size=500)
+    remaining = [r for r in results if r.checked_at >= cutoff]
+    end = results[-1].checked_at
+    assert summary_of(start, end) == _summary_by_scan(remaining, start, end)
+    with sqlite3.connect(str(tmp_path / 'netsentinel.sqlite3')) as conn:
+        rebuilt = conn.execute(
+            'SELECT width_s, node_key, bucket_start, total_checks, up_checks, '
+            'latency_sum, latency_min, latency_max, last_checked_at '
+            'FROM probe_rollups ORDER BY 1, 2, 3'
+        ).fetchall()
+        SQLiteRepository._register_functions(conn)
+        conn.execute('DELETE FROM probe_rollups')
+        SQLiteRepository._backfill_rollups(conn)
+        backfilled = conn.execute(
+            'SELECT width_s, node_key, bucket_start, total_checks, up_checks, '
+            'latency_sum, latency_min, latency_max, last_checked_at '
+            'FROM probe_rollups ORDER BY 1, 2, 3'
+        ).fetchall()
+    assert rebuilt == backfilled
+
+
+def test_sqlite_series_matches_in_memory_buckets(tmp_path) -> None:
+    sqlite_repository = SQLiteRepository(str(tmp_path / 'netsentinel.sqlite3'))
+    sqlite_repository.initialize()
+    memory_repository = InMemoryRepository()
+    node = sqlite_repository.add_node(
+        Node(name='chart', host='127.0.0.1', port=443, region='us')
+    )
+    memory_repository._nodes.append(node)
+    start = datetime(2024, 3, 1, 12, 0, tzinfo=UTC)
+    results = [
+        ProbeResult(
+            node_id=node.node_id,
+            status='down' if step % 5 == 0 else 'up',
+            latency_ms=float(step % 13),
+            checked_at=start + timedelta(seconds=17 * step),
+        )
+        for step in range(500)
+    ]
+    sqlite_repository.add_probe_results(results)
+    memory_repository.add_probe_results(results)
+
+    window = (start + timedelta(seconds=95), start + timedelta(hours=2))
+    series = [
+        repository.bucket_probe_results(node.node_id, *window, bucket_s=300)
+        for repository in (sqlite_repository, memory_repository)
+    ]
+
+    assert series[0] == series[1]
+    assert len(series[0]) == 24
+    assert series[0][0].bucket_start == start
+    assert sum(bucket.total_checks for bucket in series[0]) == sum(
+        1 for result in results if window[0] <= result.checked_at <= window[1]
+    )
+
+
+def test_sqlite_grouped_summaries_match_in_memory_in_one_read(tmp_path) -> None:
+    sqlite_repository = SQLiteRepository(str(tmp_path / 'netsentinel.sqlite3'))
+    sqlite_repository.initialize()
+    memory_repository = InMemoryRepository()
+    nodes = [
+        sqlite_repository.add_node(
+            Node(name=f'node-{index}', host='127.0.0.1', port=1000 + index, region=region)
+        )
+        for index, region in enumerate(['eu', 'us', 'eu', 'ap'])
+    ]
+    memory_repository._nodes.extend(nodes)
+    start = datetime(2024, 3, 1, 12, 0, tzinfo=UTC)
+    results = [
+        ProbeResult(
+            node_id=node.node_id,
+            status='down' if step % 4 == 0 else 'up',
+            latency_ms=float(index * 10 + step % 7),
+            checked_at=start + timedelta(seconds=41 * step),
+        )
+        for index, node in enumerate(nodes[:3])
+        for step in range(300)
+    ]
+    sqlite_repository.add_probe_results(results)
+    memory_repository.add_probe_results(results)
+    reads = {'n': 0}
+    run_read = sqlite_repository._run_read
+
+    def counting_run_read(fn):
+        reads['n'] += 1
+        return run_read(fn)
+
+    sqlite_repository._run_read = counting_run_read
+    window = {
+        'checked_from': start + timedelta(seconds=95),
+        'checked_to': start + timedelta(hours=2, seconds=3),
+    }
+    for kwargs in (
+        {},
+        {'group_by': 'region'},
+        {'node_ids': [nodes[0].node_id, nodes[3].node_id]},
+    ):
+        grouped = sqlite_repository.summarize_probe_results_grouped(**kwargs, **window)
+        assert grouped == memory_repository.summarize_probe_results_grouped(**kwargs, **window)
+
+    assert reads['n'] == 3
+    per_node = sqlite_repository.summarize_probe_results_grouped(**window)
+    assert [item.node_id for item in per_node] == [node.node_id for node in nodes]
+    assert per_node[0] == ProbeResultsGroupSummary(
+        node_id=nodes[0].node_id,
+        region='eu',
+        **sqlite_repository.summarize_probe_results(node_id=nodes[0].node_id, **window)
+        .model_dump(),
+    )
+    assert per_node[3].total_checks == 0
+
+
+def test_sqlite_pages_by_keyset_without_sorting(tmp_path) -> None:
+    repository = SQLiteRepository(str(tmp_path / 'netsentinel.sqlite3'))
+    repository.initialize()
+    node = repository.add_node(Node(name='paged', host='127.0.0.1', port=443, region='us'))
+    other = repository.add_node(Node(name='other', host='127.0.0.1', port=444, region='us'))
+    start = datetime(2024, 3, 1, 12, 0, tzinfo=UTC)
+    results = [
+        ProbeResult(
+            node_id=(node if step % 3 else other).node_id,
+            status='up',
+            latency_ms=float(step),
+            checked_at=start + timedelta(seconds=step // 2),
+        )
+        for step in range(50)
+    ]
+    repository.add_probe_results(results)
+
+    for node_id in (node.node_id, None):
+        seen = []
+        before = None
+        while True:
+            page, before = repository.page_probe_results(
+                node_id=node_id, limit=4, before=before
+            )
+            seen.extend(result.latency_ms for result in page)
+            if before is None:
+                break
+        expected = [
+            result.latency_ms
+            for result in results
+            if node_id is None or result.node_id == node_id
+        ]
+        assert seen == expected[::-1]
+
+    with sqlite3.connect(str(tmp_path / 'netsentinel.sqlite3')) as conn:
+        for node_filter in ('node_key = 1 AND ', ''):
+            plan = ' '.join(
+                row[3]
+                for row in conn.execute(
+                    'EXPLAIN QUERY PLAN SELECT id FROM probe_results '
+                    f'WHERE {node_filter}(checked_at, id) < (?, ?) '
+                    'ORDER BY checked_at DESC, id DESC LIMIT 5',
+                    (10**15, 10),
+                )
+            )
+            assert 'TEMP B-TREE' not in plan
+            assert 'idx_probe_results_' in plan
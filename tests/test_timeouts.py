@@ -0,0 +1,109 @@
+from datetime import UTC, datetime
+
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.domain.models import Node, ProbeResult
+from app.main import create_app
+from app.services.timeouts import AdaptiveTimeouts
+from app.storage.repository import InMemoryRepository
+
+
+def _result(
+    node_id: str, latency_ms: float, status: str = 'up', error: str | None = None
+) -> ProbeResult:
+    return ProbeResult(
+        node_id=node_id,
+        status=status,
+        latency_ms=latency_ms,
+        checked_at=datetime.now(UTC),
+        error=error,
+    )
+
+
+def test_adaptive_timeouts_warm_from_repository_history() -> None:
+    repository = InMemoryRepository()
+    node = repository.add_node(Node(name='near', host='10.0.0.1', port=443, region='eu'))
+    for latency_ms in (10.0, 12.0, 11.0, 40.0, 9.0):
+        repository.add_probe_result(_result(node.node_id, latency_ms))
+    repository.add_probe_result(_result(node.node_id, 1500.0, status='down'))
+    timeouts = AdaptiveTimeouts(repository, default_timeout_s=1.5, factor=3.0, min_timeout_s=0.1)
+
+    assert timeouts.timeout_for(node.node_id) == 1.5
+    timeouts.warm([node])
+
+    assert timeouts.timeout_for(node.node_id) == 0.12
+
+
+def test_adaptive_timeouts_clamp_and_fall_back_without_enough_samples() -> None:
+    timeouts = AdaptiveTimeouts(
+        InMemoryRepository(),
+        default_timeout_s=1.5,
+        factor=3.0,
+        min_timeout_s=0.2,
+        max_timeout_s=2.0,
+        min_samples=3,
+    )
+
+    timeouts.observe([_result('fast', 1.0), _result('fast', 2.0)])
+    assert timeouts.timeout_for('fast') == 1.5
+
+    timeouts.observe([_result('fast', 1.0), _result('far', 900.0)] + [_result('far', 950.0)] * 2)
+    assert timeouts.timeout_for('fast') == 0.2
+    assert timeouts.timeout_for('far') == 2.0
+
+
+def test_adaptive_timeouts_keep_a_bounded_window() -> None:
+    timeouts = AdaptiveTimeouts(InMemoryRepository(), default_timeout_s=1.5, window=5)
+
+    timeouts.observe([_result('node', 500.0)] * 5)
+    assert timeouts.timeout_for('node') == 1.5
+    timeouts.observe([_result('node', 20.0)] * 5)
+
+    assert timeouts.timeout_for('node') == 0.1
+
+
+def test_adaptive_timeouts_widen_on_timeouts_so_a_slower_node_recovers() -> None:
+    timeouts = AdaptiveTimeouts(
+        InMemoryRepository(), default_timeout_s=1.5, min_timeout_s=0.1, max_timeout_s=1.0
+    )
+    timeouts.observe([_result('node', 10.0)] * 5)
+    assert timeouts.timeout_for('node') == 0.1
+
+    rtt_ms = 300.0
+    for _ in range(5):
+        timeout_s = timeouts.timeout_for('node')
+        if rtt_ms / 1000 <= timeout_s:
+            timeouts.observe([_result('node', rtt_ms)])
+            break
+        timeouts.observe([_result('node', timeout_s * 1000, 'down', 'timeout')])
+    assert timeouts.timeout_for('node') == 0.9
+
+    timeouts.observe([_result('node', 5000.0, 'down', 'timeout')] * 3)
+    assert timeouts.timeout_for('node') == 1.0
+    timeouts.observe([_result('node', 1.0, 'down', 'connection_refused')])
+    assert timeouts.timeout_for('node') == 1.0
+
+
+def test_adaptive_mode_probes_with_per_node_timeouts(monkeypatch) -> None:
+    monkeypatch.setenv('NETSENTINEL_PROBE_TIMEOUT_MODE', 'adaptive')
+    app = create_app(scheduler_interval_s=60.0)
+    seen: dict[str, float] = {}
+
+    async def fake_async_probe(node, timeout_s: float, **kwargs) -> ProbeResult:
+        seen[node.node_id] = timeout_s
+        return _result(node.node_id, 20.0)
+
+    monkeypatch.setattr(main_module, 'async_tcp_probe', fake_async_probe)
+    repository = app.state.repository
+    known = repository.add_node(Node(name='known', host='10.0.0.1', port=443, region='eu'))
+    fresh = repository.add_node(Node(name='fresh', host='10.0.0.2', port=443, region='eu'))
+    for _ in range(5):
+        repository.add_probe_result(_result(known.node_id, 100.0))
+
+    with TestClient(app) as client:
+        client.post('/scheduler/run-once')
+        payload = client.get('/metrics').json()
+
+    assert seen == {known.node_id: 0.3, fresh.node_id: 1.5}
+    assert payload['probe_timeouts'] == {'mode': 'adaptive', 'cached_nodes': 2, 'adapted_nodes': 1}